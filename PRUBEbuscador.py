@@ -1,32 +1,43 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
 import os
-import re
-from datetime import date
+import time
+import uuid
+from datetime import date, timedelta
 
 import pandas as pd
 import streamlit as st
-from streamlit.runtime.scriptrunner import RerunException, RerunData
 from streamlit.components.v1 import html as st_html
 
+import catalogo
 import config
+import cotizacion
+import ingesta
+import pedidos
+import perf
+import precios
+import reportes
 import utils
+from listados import process_file, process_text_block_memo
 
 # ===================== AUTENTICACIÓN =====================
 PASSWORD = "1224"
 if "authenticated" not in st.session_state:
     st.session_state["authenticated"] = False
 
+def _login():
+    # Callback: corre antes del rerun, así que la app se dibuja directo sin el campo
+    ok = st.session_state.get("pwd") == PASSWORD
+    st.session_state["authenticated"] = ok
+    st.session_state["login_error"]   = not ok
+
 if not st.session_state["authenticated"]:
-    pwd = st.text_input("🔒 Contraseña", type="password")
-    if not pwd:
-        st.stop()
-    if pwd != PASSWORD:
+    st.text_input("🔒 Contraseña", type="password", key="pwd", on_change=_login)
+    if st.session_state.get("login_error"):
         st.error("⛔️ Contraseña incorrecta")
-        st.stop()
-    st.session_state["authenticated"] = True
-    raise RerunException(RerunData())
+    st.stop()
 
 # ===================== HELPERS COMUNES =====================
 def copy_to_clipboard_button(text: str, label="📋 Copiar resultado"):
@@ -71,40 +82,85 @@ def copy_to_clipboard_button(text: str, label="📋 Copiar resultado"):
         height=60,
     )
 
+def buscar_en_catalogo(tabla, busq):
+    """
+    Filtra la tabla (utils.tabla_*) con su buscador. Si no hay coincidencia
+    literal, devuelve los modelos más parecidos (ordenados por similitud) y avisa.
+    Retorna (df_filtrado, ordenado_por_similitud).
+    """
+    with perf.seccion("buscar"):
+        df_f, sugeridos = tabla.buscar(busq)
+    if sugeridos:
+        top = ", ".join(f"{texto} ({score:.0%})" for texto, score in sugeridos[:3])
+        st.caption(f"Sin coincidencias exactas. Más parecidos: {top}")
+    return df_f, bool(sugeridos)
+
+def opciones(serie, ordenado):
+    """Valores únicos para un selectbox: por similitud si viene de sugerencias, si no alfabético."""
+    valores = serie.dropna().unique()
+    return list(valores) if ordenado else sorted(valores)
+
+# ===================== COTIZACIÓN =====================
+def blue_actual():
+    """Dólar blue en caché del proceso (None si todavía no hay); si venció, se refresca en segundo plano."""
+    with perf.seccion("cotizacion"):
+        return cotizacion.cotizador().actual()
+
+def _actualizar_blue():
+    cotizacion.cotizador().forzar()
+
+def estado_blue(cot):
+    c1, c2 = st.columns([8, 1])
+    if cot:
+        c1.caption(f"Dólar blue: $ {cot.valor:,.2f} ({cot.origen}, {cot.fecha:%d/%m %H:%M})")
+    elif cotizacion.cotizador().refrescando:
+        c1.caption("Consultando la cotización del blue… mientras tanto cargala a mano.")
+    else:
+        c1.caption(f"Sin cotización del blue ({cotizacion.cotizador().error}). Cargala a mano.")
+    c2.button("🔄", key="blue_refrescar", help="Actualizar cotización", on_click=_actualizar_blue)
+
 # ===================== SOLAPA PRESUPUESTO =====================
-def solapa_presupuesto(precios_df, costos_df, clave_estado, titulo):
+def _agregar_item(clave_estado, item):
+    st.session_state[clave_estado].append(item)
+    precios.sumar_item(st.session_state[f"{clave_estado}_totales"], item)
+
+def _quitar_item(clave_estado, idx):
+    item = st.session_state[clave_estado].pop(idx)
+    precios.sumar_item(st.session_state[f"{clave_estado}_totales"], item, signo=-1)
+
+def solapa_presupuesto(tabla_precios, tabla_costos, clave_estado, titulo, cot=None):
     st.subheader(titulo)
-    precios_df.columns = precios_df.columns.str.strip()
     if clave_estado not in st.session_state:
         st.session_state[clave_estado] = []
+    if f"{clave_estado}_totales" not in st.session_state:
+        totales = precios.totales_vacios()
+        for it in st.session_state[clave_estado]:
+            precios.sumar_item(totales, it)
+        st.session_state[f"{clave_estado}_totales"] = totales
 
-    # Buscador
-    busq = st.text_input("Buscar modelo o marca", key=f"{clave_estado}_buscador").strip().upper()
-    df_f = precios_df.copy()
-    if busq:
-        df_f = df_f[
-            df_f["Marca"].str.upper().str.contains(busq) |
-            df_f["Modelo"].str.upper().str.contains(busq)
-        ]
+    # Buscador (índice precalculado; si no hay coincidencia exacta, sugerencias por similitud)
+    busq = st.text_input("Buscar modelo o marca", key=f"{clave_estado}_buscador").strip()
+    df_f, ordenado = buscar_en_catalogo(tabla_precios, busq)
 
     # Marca / Modelo
     c1, c2 = st.columns(2)
     with c1:
-        marca_sel = st.selectbox("Marca", sorted(df_f["Marca"].dropna().unique()), key=f"{clave_estado}_marca")
+        marca_sel = st.selectbox("Marca", opciones(df_f["Marca"], ordenado), key=f"{clave_estado}_marca")
     with c2:
         modelo_sel = st.selectbox(
             "Modelo",
-            sorted(df_f[df_f["Marca"] == marca_sel]["Modelo"].dropna().unique()),
+            opciones(df_f[df_f["Marca"] == marca_sel]["Modelo"], ordenado),
             key=f"{clave_estado}_modelo"
         )
 
     # Dinámicos
-    cols     = precios_df.columns.tolist()
+    cols     = tabla_precios.columns.tolist()
     prov_col = next(c for c in cols if "proveedor" in c.lower())
     prec_col = next(c for c in cols if "precio"    in c.lower())
     col_col  = next(c for c in cols if "color"     in c.lower())
     gan_col  = next(c for c in cols if "ganancia"  in c.lower())
-    mask_p = (precios_df["Marca"] == marca_sel) & (precios_df["Modelo"] == modelo_sel)
+    with perf.seccion("filas_precios"):
+        fila_p = tabla_precios.filas(marca_sel, modelo_sel)
 
     # Cálculo manual?
     calc_man = st.checkbox("Calcular manualmente", key=f"{clave_estado}_calcular")
@@ -114,12 +170,8 @@ def solapa_presupuesto(precios_df, costos_df, clave_estado, titulo):
         marca_m  = m1.text_input("Marca", value=marca_sel, key=f"{clave_estado}_man_marca")
         modelo_m = m2.text_input("Modelo", value=modelo_sel, key=f"{clave_estado}_man_modelo")
 
-        opts = sorted(
-            costos_df[
-                (costos_df["Marca"]  == marca_m) &
-                (costos_df["Modelo"] == modelo_m)
-            ]["Proveedor"].dropna().unique()
-        )
+        costos_m = tabla_costos.filas(marca_m, modelo_m)
+        opts = sorted(costos_m["Proveedor"].dropna().unique())
         col_p, col_cost, col_blue = st.columns(3)
         # ✅ corregido: sin '}' extra y usando paréntesis
         prov_m = (
@@ -128,18 +180,19 @@ def solapa_presupuesto(precios_df, costos_df, clave_estado, titulo):
             else col_p.text_input("Proveedor", key=f"{clave_estado}_man_prov")
         )
 
-        mask_c  = (costos_df["Marca"]==marca_m)&(costos_df["Modelo"]==modelo_m)&(costos_df["Proveedor"]==prov_m)
-        mask_cm = (costos_df["Marca"]==marca_m)&(costos_df["Modelo"]==modelo_m)
+        mask_c = costos_m["Proveedor"] == prov_m
         if mask_c.any():
-            default_cost = float(costos_df.loc[mask_c, "Costo USD"].iat[0])
-        elif mask_cm.any():
-            default_cost = float(costos_df.loc[mask_cm, "Costo USD"].iat[0])
+            default_cost = float(costos_m.loc[mask_c, "Costo USD"].iat[0])
+        elif not costos_m.empty:
+            default_cost = float(costos_m["Costo USD"].iat[0])
         else:
             default_cost = 0.0
 
         costo_m = col_cost.number_input("Costo USD", min_value=0.0, format="%.2f",
                                         value=default_cost, key=f"{clave_estado}_man_costo")
+        # Arranca con la cotización compartida; el vendedor la puede pisar
         blue_m  = col_blue.number_input("Dólar Blue", min_value=0.0, format="%.2f",
+                                        value=cot.valor if cot else 0.0,
                                         key=f"{clave_estado}_man_blue")
 
         g1, g2, g3 = st.columns(3)
@@ -155,116 +208,159 @@ def solapa_presupuesto(precios_df, costos_df, clave_estado, titulo):
                                       key=f"{clave_estado}_man_with_colors")
 
         if st.button("Calcular y Agregar", key=f"{clave_estado}_man_calc"):
-            gan       = max(costo_m * pct_m / 100, 30.0)
-            bruto     = costo_m + gan
-            final_usd = max(round(bruto / 5) * 5 - desc_m, 0)
-            final_ars = final_usd * blue_m
-
-            if moneda_m == "USD":
-                precio_str = f"USD {final_usd:.0f}"
-            elif moneda_m == "Pesos":
-                precio_str = f"$ {final_ars:,.0f}"
-            else:
-                precio_str = f"USD {final_usd:.0f} / $ {final_ars:,.0f}"
-
-            st.session_state[clave_estado].append({
-                "Marca":     marca_m,
-                "Modelo":    modelo_m,
-                "Precio":    precio_str,
-                "Colores":   "" if man_with_colors else "",
-                "Proveedor": prov_m,
-            })
-            st.success(f"{marca_m} {modelo_m} agregado: {precio_str}")
+            final_usd = precios.precio_manual(costo_m, pct_m, desc_m)
+            usd, ars  = precios.montos_manual(final_usd, blue_m, moneda_m)
+            item      = precios.item_presupuesto(marca_m, modelo_m, usd, ars,
+                                                 colores="" if man_with_colors else "",
+                                                 proveedor=prov_m)
+            _agregar_item(clave_estado, item)
+            st.success(f"{marca_m} {modelo_m} agregado: {item['Precio']}")
 
     else:
         # automático
-        if mask_p.any():
-            resultado = precios_df.loc[mask_p].iloc[[0]]
+        if not fila_p.empty:
+            resultado = fila_p.iloc[[0]]
+            mostrar   = [prov_col, prec_col, gan_col]
+            # Con DRB_MARGENES=hojas un modelo puede no tener precio en la hoja del margen
+            sin_precio = "Final USD" in resultado.columns and pd.isna(resultado["Final USD"].iat[0])
+            if cot and "Final USD" in resultado.columns:
+                resultado = cotizacion.tabla_en_ars(resultado, cot.valor)
+                mostrar.append("Final ARS")
             st.write("Precios:")
-            st.dataframe(resultado[[prov_col, prec_col, gan_col]],
-                         use_container_width=True, hide_index=True)
+            st.dataframe(resultado[mostrar], use_container_width=True, hide_index=True,
+                         column_config={"Final ARS": st.column_config.NumberColumn("Precio $", format="$ %d")})
 
-            costos = costos_df[(costos_df["Marca"]==marca_sel)&(costos_df["Modelo"]==modelo_sel)]
-            if not costos.empty:
+            with perf.seccion("tabla_costos"):
+                costos = tabla_costos.filas(marca_sel, modelo_sel)
                 data_c = [
                     {"Proveedor": r["Proveedor"],
                      "Costo":      f"USD {r['Costo USD']:.2f}"}
                     for _, r in costos.iterrows()
                 ]
+            if not costos.empty:
                 st.write("Costos:")
                 st.dataframe(pd.DataFrame(data_c),
                              use_container_width=True, hide_index=True)
 
             auto_with_colors = st.checkbox("Con colores", value=False,
                                            key=f"{clave_estado}_auto_with_colors")
-            if st.button(f"Agregar al {titulo}", key=f"{clave_estado}_add"):
-                raw        = str(resultado[prec_col].iat[0]).strip()
-                precio_val = raw if raw.lower().startswith("usd") else f"USD {raw}"
-                color_val  = resultado[col_col].iat[0] if auto_with_colors else ""
-                st.session_state[clave_estado].append({
-                    "Marca":     marca_sel,
-                    "Modelo":    modelo_sel,
-                    "Precio":    precio_val,
-                    "Colores":   color_val,
-                    "Proveedor": str(resultado[prov_col].iat[0]).strip(),
-                })
+            auto_pesos = "Final ARS" in resultado.columns and st.checkbox(
+                "Incluir precio en pesos", value=False, key=f"{clave_estado}_auto_pesos")
+            if sin_precio:
+                st.warning("Este modelo no tiene precio en la hoja del margen elegido. "
+                           "Marca 'Calcular manualmente' para agregarlo.")
+            if st.button(f"Agregar al {titulo}", key=f"{clave_estado}_add", disabled=sin_precio):
+                if "Final USD" in resultado.columns:
+                    usd = round(float(resultado["Final USD"].iat[0]))
+                else:
+                    raw = str(resultado[prec_col].iat[0]).strip()
+                    usd, _ = precios.parse_precio(raw if raw.lower().startswith("usd") else f"USD {raw}")
+                ars = int(resultado["Final ARS"].iat[0]) if auto_pesos else None
+                color_val = resultado[col_col].iat[0] if auto_with_colors else ""
+                _agregar_item(clave_estado, precios.item_presupuesto(
+                    marca_sel, modelo_sel, usd, ars,
+                    colores=color_val,
+                    proveedor=str(resultado[prov_col].iat[0]).strip(),
+                ))
                 st.success("Ítem agregado al presupuesto.")
         else:
             st.info("Modelo no encontrado. Marca 'Calcular manualmente' para agregarlo.")
 
-    # detalle y total
-    if st.session_state[clave_estado]:
-        st.markdown("---")
-        st.subheader(f"Detalle del {titulo}")
-        usd_total = pes_total = 0
-        hoy       = date.today().strftime("%d/%m/%Y")
-        msg       = f"*Presupuesto DRB ELECTRO*\n_{hoy}_\n\n"
-        for it in st.session_state[clave_estado]:
-            m_usd = re.search(r"USD\s*([\d,]+)", it["Precio"])
-            if m_usd:
-                usd_total += int(m_usd.group(1).replace(",", ""))
-            m_pes = re.search(r"\$\s*([\d,]+)", it["Precio"])
-            if m_pes:
-                pes_total += int(m_pes.group(1).replace(",", ""))
-
-            line = f"- {it['Marca']} {it['Modelo']} • {it['Precio']}"
-            if it["Colores"]:
-                line += f" • {it['Colores']}"
-            st.markdown(line)
-            msg += line.replace("•", "") + "\n"
-
-        msg += "---------------------------\n"
-        if pes_total > 0 and usd_total == 0:
-            total_str = f"$ {pes_total:,.0f}"
-        elif usd_total > 0 and pes_total == 0:
-            total_str = f"USD {usd_total}"
-        else:
-            total_str = f"USD {usd_total} / $ {pes_total:,.0f}"
+    detalle_presupuesto(clave_estado, titulo)
 
-        st.markdown(f"**TOTAL: {total_str}**")
-        msg += f"*TOTAL: {total_str}*"
-        st.text_area("Mensaje para copiar", value=msg, height=200, key=f"{clave_estado}_msg")
+def _limpiar_presupuesto(clave_estado):
+    st.session_state[clave_estado] = []
+    st.session_state[f"{clave_estado}_totales"] = precios.totales_vacios()
 
-        if st.button("Limpiar presupuesto", key=f"{clave_estado}_clear_all"):
-            st.session_state[clave_estado] = []
-            raise RerunException(RerunData())
+@st.fragment
+def detalle_presupuesto(clave_estado, titulo):
+    """Detalle y total: quitar o limpiar ítems vuelve a correr solo este bloque."""
+    items = st.session_state[clave_estado]
+    if not items:
+        return
+    st.markdown("---")
+    st.subheader(f"Detalle del {titulo}")
+    totales = st.session_state[f"{clave_estado}_totales"]
+    for idx, it in enumerate(items):
+        cA, cB = st.columns([12, 1])
+        cA.markdown(precios.linea_item(it))
+        cB.button("❌", key=f"{clave_estado}_del_{idx}",
+                  on_click=_quitar_item, args=(clave_estado, idx))
+
+    total_str = precios.formato_total(totales["USD"], totales["ARS"])
+    st.markdown(f"**TOTAL: {total_str}**")
+    hoy = date.today().strftime("%d/%m/%Y")
+    # Se asigna por session_state para que el widget muestre siempre el mensaje actual
+    st.session_state[f"{clave_estado}_msg"] = precios.mensaje_presupuesto(items, totales, hoy)
+    st.text_area("Mensaje para copiar", height=200, key=f"{clave_estado}_msg")
+
+    st.button("Limpiar presupuesto", key=f"{clave_estado}_clear_all",
+              on_click=_limpiar_presupuesto, args=(clave_estado,))
+
+def _lista_en_pesos(margen, blue):
+    # Toda la tabla del margen pasada a pesos de una vez; se arma recién al descargar
+    df = cotizacion.tabla_en_ars(utils.margin_tables()[margen], blue)
+    return df.drop(columns=["Ganancia", "Costo USD"]).to_csv(index=False).encode("utf-8-sig")
 
 def run_presupuesto():
-    EXCEL_PATH   = str(config.CATALOGO_PATH)
-    proveedores  = ["Eze", "Di", "Ale"]
-    sheets       = pd.read_excel(EXCEL_PATH, sheet_name=proveedores)
-    costos_list  = []
-    for prov, dfp in sheets.items():
-        price_col = next(c for c in dfp.columns if "precio" in c.lower())
-        dfp = dfp.rename(columns={price_col: "Costo USD"})
-        dfp["Costo USD"] = pd.to_numeric(dfp["Costo USD"], errors="coerce").fillna(0)
-        dfp["Proveedor"] = prov
-        costos_list.append(dfp[["Marca","Modelo","Proveedor","Costo USD"]])
-    costos_df    = pd.concat(costos_list, ignore_index=True)
-    precios10_df = pd.read_excel(EXCEL_PATH, sheet_name="10%")
-    solapa_presupuesto(precios10_df, costos_df, "presupuesto_items", "Presupuesto")
+    cot = blue_actual()
+    estado_blue(cot)
+    margen = st.radio("Margen", utils.margenes_disponibles(), horizontal=True,
+                      key="presupuesto_margen")
+    if cot:
+        st.download_button(f"💱 Lista {margen} en pesos (CSV)",
+                           data=lambda: _lista_en_pesos(margen, cot.valor),
+                           file_name=f"lista_{margen.replace('%', '')}_ars.csv".replace(" ", "_"),
+                           mime="text/csv", key="presupuesto_lista_ars", on_click="ignore")
+    solapa_presupuesto(utils.tabla_precios(margen), utils.tabla_costos(),
+                       "presupuesto_items", "Presupuesto", cot)
 
 # ===================== RUN PEDIDOS =====================
+def _quitar_item_pedido(idx):
+    st.session_state["pedido_items"].pop(idx)
+
+@st.fragment
+def items_pedido():
+    """Ítems del pedido: quitar uno vuelve a correr solo esta lista."""
+    if not st.session_state["pedido_items"]:
+        return
+    st.markdown("**Ítems en este pedido:**")
+    for idx, itm in enumerate(st.session_state["pedido_items"]):
+        cA, cB = st.columns([8,1])
+        cA.write(f"{idx+1}. {itm['Cantidad']}× {itm['Marca']} {itm['Modelo']} — Color {itm['Color']} — USD {itm['Costo USD']:.2f}")
+        cB.button("❌", key=f"del_{idx}", on_click=_quitar_item_pedido, args=(idx,))
+
+def _preparar_pedido(is_retiro):
+    # Callback del botón: el pedido se muestra en el mismo rerun, sin un rerun extra
+    ss    = st.session_state
+    datos = {
+        "Dirección":   ss["np_direccion"],
+        "Localidad":   ss["np_localidad"],
+        "Horario":     ss["np_horario"],
+        "Moneda":      ss["np_moneda"],
+        "Importe":     ss["np_importe"],
+        "Costo envío": ss["np_costo_envio"],
+        "Aclaración":  ss["np_aclaracion"],
+        "Cliente":     ss["np_nombre"],
+        "Celular":     ss["np_celular"],
+    }
+    ss["contenido_txt"] = pedidos.texto_pedido(ss["pedido_items"], datos, is_retiro)
+    if is_retiro:
+        datos["Dirección"] = datos["Localidad"] = ""
+    ss["pedido_datos"]     = datos
+    ss["pedido_confirmar"] = True
+    ss.pop("pedido_guardado", None)
+
+def _guardar_pedido():
+    # Callback: el botón ya se dibuja deshabilitado en el mismo rerun, así un
+    # segundo click no vuelve a guardar el mismo pedido
+    ss = st.session_state
+    if ss.get("pedido_guardado") is None and ss["pedido_items"]:
+        ss["pedido_guardado"] = pedidos.guardar_pedido(ss["pedido_items"], ss.get("pedido_datos", {}))
+
+def _volver_pedido():
+    st.session_state["pedido_confirmar"] = False
+
 def run_pedidos():
     if "pedido_items" not in st.session_state:
         st.session_state["pedido_items"] = []
@@ -272,29 +368,26 @@ def run_pedidos():
         st.session_state["pedido_confirmar"] = False
     if "contenido_txt" not in st.session_state:
         st.session_state["contenido_txt"] = ""
+    # Defaults por session_state y no por value=: estos widgets están en
+    # CONSERVAR y Streamlit avisa si un widget con default también se asigna.
+    st.session_state.setdefault("np_envio", True)
+    st.session_state.setdefault("np_retiro", False)
 
     st.subheader("Nuevo Pedido")
 
     c1, c2, c3 = st.columns(3)
-    is_envio  = c1.checkbox("Envío", True, key="np_envio")
-    is_retiro = c2.checkbox("Retiro", False, key="np_retiro")
+    is_envio  = c1.checkbox("Envío", key="np_envio")
+    is_retiro = c2.checkbox("Retiro", key="np_retiro")
     manual    = c3.checkbox("Carga Manual", key="np_manual")
     if is_envio and is_retiro:
         st.warning("Seleccione solo Envío o Retiro.")
         return
 
-    df_cat = utils.load_catalogue()
+    tabla_cat = utils.tabla_resumen()
 
     if not manual:
-        busq = st.text_input("Marca o modelo", key="item_busqueda").strip().upper()
-        df_fil = df_cat.copy()
-        if busq:
-            df_fil = df_fil[
-                df_fil["Marca"].str.upper().str.contains(busq) |
-                df_fil["Modelo"].str.upper().str.contains(busq)
-            ]
-    else:
-        df_fil = df_cat.copy()
+        busq = st.text_input("Marca o modelo", key="item_busqueda").strip()
+        df_fil, ordenado = buscar_en_catalogo(tabla_cat, busq)
 
     cols = st.columns([2,2,2,1,2,1])
     if manual:
@@ -305,218 +398,218 @@ def run_pedidos():
         color     = cols[4].text_input("Color", key="item_color_manual")
         costo_usd = cols[5].number_input("Costo USD", 0.0, format="%.2f", key="item_costo_usd_manual")
     else:
-        marcas    = sorted(df_fil["Marca"].dropna().unique())
+        marcas    = opciones(df_fil["Marca"], ordenado)
         marca     = cols[0].selectbox("Marca", marcas, key="item_marca")
-        modelos   = sorted(df_fil[df_fil["Marca"]==marca]["Modelo"].dropna().unique())
+        modelos   = opciones(df_fil[df_fil["Marca"]==marca]["Modelo"], ordenado)
         modelo    = cols[1].selectbox("Modelo", modelos, key="item_modelo")
-        row       = df_cat.query("Marca==@marca and Modelo==@modelo").iloc[0]
+        matches   = tabla_cat.filas(marca, modelo)
+        row       = matches.iloc[0] if not matches.empty else pd.Series(dtype=object)
         provs     = [p for p in ("Ale","Eze","Di") if pd.notna(row.get(p))]
         proveedor = cols[2].selectbox("Proveedor", provs, key="item_proveedor")
         cantidad  = cols[3].number_input("Cantidad", 1, 1, key="item_cantidad")
         color     = cols[4].text_input("Color", key="item_color")
-        costo_usd = cols[5].number_input("Costo USD", float(row[proveedor]), format="%.2f", key="item_costo_usd")
+        costo_def = float(row[proveedor]) if proveedor else 0.0
+        costo_usd = cols[5].number_input("Costo USD", costo_def, format="%.2f", key="item_costo_usd")
+        if matches.empty:
+            st.info("Sin resultados para la búsqueda. Probá otra o usá 'Carga Manual'.")
 
     if st.button("➕ Agregar ítem", key="add_item_btn"):
-        st.session_state["pedido_items"].append({
-            "Proveedor": proveedor,
-            "Marca":      marca,
-            "Modelo":     modelo,
-            "Cantidad":   cantidad,
-            "Color":      color,
-            "Costo USD":  costo_usd
-        })
-        st.success(f"{cantidad}× {marca} {modelo} agregado.")
-
-    # Mostrar ítems
-    if st.session_state["pedido_items"]:
-        st.markdown("**Ítems en este pedido:**")
-        for idx, itm in enumerate(st.session_state["pedido_items"]):
-            cA, cB = st.columns([8,1])
-            cA.write(f"{idx+1}. {itm['Cantidad']}× {itm['Marca']} {itm['Modelo']} — Color {itm['Color']} — USD {itm['Costo USD']:.2f}")
-            if cB.button("❌", key=f"del_{idx}"):
-                st.session_state["pedido_items"].pop(idx)
-                st.experimental_rerun()
+        if not marca or not modelo:
+            st.warning("Elegí marca y modelo antes de agregar el ítem.")
+        else:
+            st.session_state["pedido_items"].append({
+                "Proveedor": proveedor,
+                "Marca":      marca,
+                "Modelo":     modelo,
+                "Cantidad":   cantidad,
+                "Color":      color,
+                "Costo USD":  costo_usd
+            })
+            st.success(f"{cantidad}× {marca} {modelo} agregado.")
+
+    items_pedido()
 
     # Datos del pedido
     row = st.columns(9)
-    direccion   = row[0].text_input("Dirección", key="np_direccion")
-    localidad   = row[1].text_input("Localidad", key="np_localidad")
-    horario     = row[2].text_input("Horario", key="np_horario")
-    costo_envio = row[3].number_input("Costo envío", 0.0, format="%.2f", key="np_costo_envio")
-    moneda      = row[4].selectbox("Moneda", ["USD","ARS"], key="np_moneda")
-    importe     = row[5].number_input("Importe", 0.0, format="%.2f", key="np_importe")
-    aclarac     = row[6].text_input("Aclaración", key="np_aclaracion")
-    cliente     = row[7].text_input("Cliente", key="np_nombre")
-    celular     = row[8].text_input("Celular", key="np_celular")
+    row[0].text_input("Dirección", key="np_direccion")
+    row[1].text_input("Localidad", key="np_localidad")
+    row[2].text_input("Horario", key="np_horario")
+    row[3].number_input("Costo envío", 0.0, format="%.2f", key="np_costo_envio")
+    row[4].selectbox("Moneda", ["USD","ARS"], key="np_moneda")
+    row[5].number_input("Importe", 0.0, format="%.2f", key="np_importe")
+    row[6].text_input("Aclaración", key="np_aclaracion")
+    row[7].text_input("Cliente", key="np_nombre")
+    row[8].text_input("Celular", key="np_celular")
+    if st.session_state["np_moneda"] == "ARS" and st.session_state["np_importe"] > 0:
+        cot = blue_actual()
+        if cot:
+            usd = st.session_state["np_importe"] / cot.valor
+            st.caption(f"Importe ≈ USD {usd:,.0f} al blue $ {cot.valor:,.2f}")
 
     # Preview / Copiar
     if not st.session_state["pedido_confirmar"]:
-        if st.button("📝 Mostrar Pedido para Copiar", key="btn_preview"):
-            txt  = ("Retiro:\n\n" if is_retiro else "Envío:\n\n")
-            for itm in st.session_state["pedido_items"]:
-                txt += f"{itm['Cantidad']}× {itm['Marca'].upper()} {itm['Modelo'].upper()} {itm['Color']}\n"
-            if not is_retiro:
-                txt += f"\nDirección: {direccion}\nLocalidad: {localidad}\n"
-            txt += f"Horario: {horario}\n\n"
-            pay  = (f"$ {int(importe):,}".replace(",",".") if moneda=="ARS" else f"USD {int(importe)}")
-            if costo_envio > 0:
-                pay += (f" + Envío $ {int(costo_envio):,}".replace(",",".") if moneda=="ARS" else f" + Envío $ {int(costo_envio)}")
-            txt += f"PAGA: {pay}\n\n"
-            if aclarac:
-                txt += aclarac + "\n"
-            txt += f"Recibe: {cliente} – {celular}\n"
-
-            st.session_state["contenido_txt"]    = txt
-            st.session_state["pedido_confirmar"] = True
-            st.experimental_rerun()
+        st.button("📝 Mostrar Pedido para Copiar", key="btn_preview",
+                  on_click=_preparar_pedido, args=(is_retiro,))
 
     if st.session_state["pedido_confirmar"]:
         st.markdown("### Pedido listo para copiar")
         st.text_area("", value=st.session_state["contenido_txt"], height=350, key="txt_final")
-        if st.button("🔄 Volver", key="btn_back"):
-            st.session_state["pedido_confirmar"] = False
-            st.experimental_rerun()
-
-# ===================== LISTADOS (Ajuste de precios: SOLO precio) =====================
-# --- Regex y helpers del módulo de ajuste (versión minimalista que solo reemplaza precios) ---
-
-# Token numérico tolerante: 1.234 | 1,234 | 1200,50 | 1200.50 | 1 200
-_L_NUM = r"""
-    (?:
-        [0-9]{1,3}(?:[.,\s][0-9]{3})+(?:[.,][0-9]+)?   # miles con opcional decimales
-        |
-        [0-9]+(?:[.,][0-9]+)?                          # enteros/decimales simples
-    )
-"""
-
-# Monedas soportadas (incluye variantes pegadas): USD, US$, US$D, U$S, U$D, USS, $, 💲
-# Soporta: USD720, 720USD, US$ 720, U$D1390, $720, 💲 720, etc. y también *USD 720*
-PRICE_TOKEN_RE = re.compile(
-    rf"""
-    (?P<full>
-        \*?\s*
-        (?:
-            (?:(?P<cur1>USD|US\$D|US\$|U\$S|U\$D|USS|\$|💲))\s*(?P<num1>{_L_NUM})
-            |
-            (?P<num2>{_L_NUM})\s*(?P<cur2>USD|US\$D|US\$|U\$S|U\$D|USS|\$|💲)
+        guardado = st.session_state.get("pedido_guardado")
+        st.button("💾 Guardar pedido", key="btn_guardar", on_click=_guardar_pedido,
+                  disabled=guardado is not None or not st.session_state["pedido_items"])
+        if guardado is not None:
+            st.success(f"Pedido {guardado} guardado.")
+        elif not st.session_state["pedido_items"]:
+            st.warning("Agregá al menos un ítem para guardar el pedido.")
+        st.button("🔄 Volver", key="btn_back", on_click=_volver_pedido)
+
+    with st.expander("📦 Pedidos en lote (CSV/XLSX o grilla)"):
+        pedidos_en_lote()
+
+    with st.expander("📁 Pedidos guardados"):
+        if st.button("Exportar a Pedidos.xlsx", key="btn_exportar_pedidos"):
+            if pedidos.exportar_en_segundo_plano():
+                st.info("Exportando en segundo plano… volvé a abrir esta sección en unos segundos.")
+            else:
+                st.info("Ya hay una exportación en curso.")
+        if config.PEDIDOS_FILE.exists():
+            with open(config.PEDIDOS_FILE, "rb") as f:
+                st.download_button("⬇️ Descargar Pedidos.xlsx", data=f, file_name=config.PEDIDOS_FILE.name,
+                                   key="btn_descargar_pedidos")
+
+    with st.expander("📊 Reportes de pedidos"):
+        reportes_pedidos()
+
+# ===================== PEDIDOS EN LOTE =====================
+LOTE_PREVIEW = 20  # pedidos que se muestran en pantalla (el resto va en el ZIP)
+
+def _guardar_lote():
+    lote, _ = st.session_state.pop("lote_resultado")
+    ids = pedidos.guardar_pedidos(pedidos.items_y_datos(lote))
+    st.session_state["lote_guardados"] = len(ids)
+
+@st.fragment
+def pedidos_en_lote():
+    """Muchos pedidos desde una tabla: editar la grilla o generar vuelve a correr solo este bloque."""
+    st.caption("Una fila por ítem. Las filas con el mismo **Pedido** (o, si está vacío, mismo cliente, "
+               "celular, dirección y horario) forman un pedido; sin dirección es Retiro. "
+               "Si falta el **Costo USD** se toma del catálogo (del proveedor indicado o el más barato).")
+    origen = st.radio("Origen", ["Grilla", "Archivo"], horizontal=True, key="lote_origen")
+    if origen == "Grilla":
+        tabla = st.data_editor(
+            pedidos.lote_vacio(), num_rows="dynamic", use_container_width=True, key="lote_grilla",
+            column_config={"Moneda": st.column_config.SelectboxColumn(options=["USD", "ARS"])},
         )
-        \s*\*?
-    )
-    """,
-    re.IGNORECASE | re.VERBOSE
-)
-
-# Número pelado al FINAL de la línea (fallback si no hay símbolo)
-BARE_NUMBER_AT_END_RE = re.compile(
-    rf'(?<![A-Za-z])({_L_NUM})\s*$',
-    re.IGNORECASE | re.VERBOSE
-)
+    else:
+        archivo = st.file_uploader("Tabla de pedidos", type=["csv", "xlsx"], key="lote_archivo")
+        tabla   = pedidos.leer_lote(archivo, archivo.name) if archivo else None
 
-def _parse_number_general(num_str: str) -> float:
-    """Convierte strings numéricos comunes en float, contemplando miles/decimales."""
-    s = num_str.strip().replace(' ', '')
-    has_comma = ',' in s
-    has_dot   = '.' in s
-    if has_comma and has_dot:
-        # El último separador encontrado decide decimal
-        if s.rfind(',') > s.rfind('.'):
-            s = s.replace('.', '')
-            s = s.replace(',', '.')
-        else:
-            s = s.replace(',', '')
-    elif has_comma and not has_dot:
-        parts = s.split(',')
-        if len(parts) >= 2 and all(len(p) == 3 for p in parts[1:]) and 1 <= len(parts[0]) <= 3:
-            s = ''.join(parts)           # 1,234 -> 1234
+    c1, c2 = st.columns(2)
+    c2.download_button("⬇️ Plantilla CSV", data=pedidos.plantilla_csv(), file_name="plantilla_pedidos.csv",
+                       mime="text/csv", on_click="ignore", key="lote_plantilla")
+    if c1.button("⚙️ Generar pedidos", key="lote_generar"):
+        if tabla is None:
+            st.warning("Subí una tabla o cargá filas en la grilla.")
         else:
-            s = s.replace(',', '.')      # 1200,50 -> 1200.50
-    elif has_dot and not has_comma:
-        parts = s.split('.')
-        if len(parts) >= 2 and all(len(p) == 3 for p in parts[1:]) and 1 <= len(parts[0]) <= 3:
-            s = ''.join(parts)           # 1.234 -> 1234
-    return float(s)
-
-def _round_up_to_base(x: float, base: int) -> int:
-    import math
-    if base <= 0:
-        base = 1
-    return int(math.ceil(x / base) * base)
-
-def _apply_rules_only_price(val: float, pct: float, min_inc_usd: float, base_mult: int) -> int:
-    inc_pct   = val * (pct / 100.0)
-    inc_final = max(inc_pct, float(min_inc_usd))
-    val_adj   = val + inc_final
-    return _round_up_to_base(val_adj, base=base_mult)
-
-def _fmt_usd_block(value_int: int) -> str:
-    """Formatea como  *USD X.XXX*  (punto de miles, sin decimales)."""
-    formatted = f"{value_int:,}".replace(",", ".")
-    return f" *USD {formatted}*"
-
-def _replace_symbol_prices(line: str, pct: float, min_inc_usd: float, base_mult: int) -> tuple[str, bool]:
-    """Reemplaza TODOS los tokens con símbolo/moneda por *USD X.XXX* sin tocar el resto del texto."""
-    changed = False
-
-    def _repl(m: re.Match) -> str:
-        nonlocal changed
-        num = m.group('num1') or m.group('num2')
+            with perf.seccion("pedidos_lote"):
+                lote   = pedidos.resolver_costos(pedidos.normalizar_lote(tabla), utils.costos_por_modelo())
+                textos = pedidos.textos_lote(lote)
+            st.session_state["lote_resultado"] = (lote, textos)
+
+    if st.session_state.get("lote_guardados"):
+        st.success(f"{st.session_state.pop('lote_guardados')} pedido(s) guardados.")
+    if "lote_resultado" not in st.session_state:
+        return
+    lote, textos = st.session_state["lote_resultado"]
+    if textos.empty:
+        st.info("La tabla no tiene ítems (filas con marca o modelo).")
+        return
+    observados = lote["Observación"] != ""
+    st.markdown(f"**{len(textos)} pedido(s), {len(lote)} ítem(s)**")
+    if observados.any():
+        st.warning(f"{int(observados.sum())} ítem(s) con observaciones: corregilos en la tabla o se "
+                   "guardan así (sin costo, o con cantidad 0).")
+        st.dataframe(lote.loc[observados, ["Marca", "Modelo", "Proveedor", "Cantidad", "Observación"]],
+                     use_container_width=True, hide_index=True)
+    for ped, cliente, texto in zip(textos["Pedido"].head(LOTE_PREVIEW), textos["Cliente"], textos["Texto"]):
+        with st.expander(f"Pedido {ped} – {cliente}"):
+            st.code(texto, language="text")
+    if len(textos) > LOTE_PREVIEW:
+        st.caption(f"Se muestran {LOTE_PREVIEW}; el resto está en el ZIP.")
+    c1, c2 = st.columns(2)
+    c1.download_button("⬇️ Descargar todos (ZIP)", data=lambda: pedidos.paquete(lote, textos),
+                       file_name=f"pedidos_{date.today():%Y%m%d}.zip", mime="application/zip",
+                       on_click="ignore", key="lote_zip")
+    c2.button("💾 Guardar todos", key="lote_guardar", on_click=_guardar_lote)
+
+# ===================== REPORTES DE PEDIDOS =====================
+REPORTE_DIMENSIONES = {"Proveedor": "proveedor", "Marca": "marca", "Modelo": "modelo", "Localidad": "localidad"}
+
+def _reporte_xlsx(desde, hasta):
+    buf = io.BytesIO()
+    reportes.exportar_periodo(desde, hasta, buf)
+    return buf.getvalue()
+
+@st.fragment
+def reportes_pedidos():
+    """Resúmenes ya agregados (reportes.py): cambiar período o dimensión no recorre el historial."""
+    c1, c2, c3 = st.columns(3)
+    periodo   = c1.radio("Período", ["Día", "Semana"], horizontal=True, key="rep_periodo")
+    dia       = c2.date_input("Fecha", value=date.today(), key="rep_fecha", format="DD/MM/YYYY")
+    dimension = c3.selectbox("Por", list(REPORTE_DIMENSIONES), key="rep_dimension")
+    periodo   = "semana" if periodo == "Semana" else "dia"
+
+    with perf.seccion("reportes"):
+        total   = reportes.para_mostrar(reportes.resumen(dia, periodo, "total"))
+        detalle = reportes.para_mostrar(reportes.resumen(dia, periodo, REPORTE_DIMENSIONES[dimension]))
+    if total.empty:
+        st.info("No hay pedidos guardados en ese período.")
+    else:
+        if periodo == "semana":
+            st.caption(f"Semana del {reportes.inicio_de(dia, periodo):%d/%m/%Y}")
+        for col, fila in zip(st.columns(len(total)), total.to_dict("records")):
+            col.metric(f"Facturado {fila['Moneda']} (con envío)", pedidos.pago(fila["Moneda"], fila["Total"], 0),
+                       help=f"{fila['Pedidos']} pedido(s), {fila['Unidades']} unidad(es); "
+                            f"envíos {fila['Costo envío']:,.0f}")
+        st.dataframe(detalle.rename(columns={"Clave": dimension}), use_container_width=True, hide_index=True)
+
+    rango = st.date_input("Rango a exportar", value=(date.today() - timedelta(days=30), date.today()),
+                          key="rep_rango", format="DD/MM/YYYY")
+    if len(rango) == 2:
+        desde, hasta = rango
+        st.download_button("⬇️ Descargar resumen (Excel)", data=lambda: _reporte_xlsx(desde, hasta),
+                           file_name=f"reporte_pedidos_{desde:%Y%m%d}_{hasta:%Y%m%d}.xlsx",
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                           on_click="ignore", key="rep_excel")
+
+# ===================== LISTADOS (Ajuste de precios: SOLO precio) =====================
+LISTADOS_TMP_DIR     = config.CACHE_DIR / "listados"
+LISTADOS_PREVIEW     = 50           # líneas ajustadas que se muestran en modo archivo
+LISTADOS_TMP_MAX_AGE = 24 * 3600    # segundos antes de borrar salidas viejas
+
+def _listados_borrar_salida():
+    """Borra el archivo de salida de esta sesión (si hay) y los huérfanos viejos."""
+    previo = st.session_state.pop('listados_file', None)
+    if previo:
         try:
-            val = _parse_number_general(num)
-        except ValueError:
-            return m.group('full')  # no tocar si no parsea
-        changed = True
-        new_int = _apply_rules_only_price(val, pct, min_inc_usd, base_mult)
-        return _fmt_usd_block(new_int)
-
-    out = PRICE_TOKEN_RE.sub(_repl, line)
-    # Asegurar un solo espacio antes de *USD y compactar espacios
-    out = re.sub(r'\s*\*USD', ' *USD', out)
-    out = re.sub(r'\s{2,}', ' ', out).rstrip()
-    return out, changed
-
-def _replace_bare_trailing(line: str, pct: float, min_inc_usd: float, base_mult: int,
-                           bare_min_value: float) -> tuple[str, bool]:
-    """Si no había símbolo: reemplaza número pelado FINAL como precio (si supera umbral)."""
-    m = BARE_NUMBER_AT_END_RE.search(line)
-    if not m:
-        return line, False
-    num_str = m.group(1)
-    try:
-        val = _parse_number_general(num_str)
-    except ValueError:
-        return line, False
-    if val < float(bare_min_value):
-        return line, False
-    new_int = _apply_rules_only_price(val, pct, min_inc_usd, base_mult)
-    out = line[:m.start()] + _fmt_usd_block(new_int)
-    out = re.sub(r'\s*\*USD', ' *USD', out)
-    out = re.sub(r'\s{2,}', ' ', out).rstrip()
-    return out, True
-
-def _adjust_line_only_price(line: str, pct: float, min_inc_usd: float, base_mult: int,
-                            bare_min_value: float) -> tuple[str, bool]:
-    """
-    SOLO toca precios. No limpia emojis, no reordena texto.
-    1) Reemplaza TODOS los tokens con moneda (USD, US$, US$D, U$S, U$D, $, 💲) pegados o no.
-    2) Si no encontró, intenta con número pelado al final (si supera el umbral).
-    """
-    out, changed = _replace_symbol_prices(line, pct, min_inc_usd, base_mult)
-    if changed:
-        return out, True
-    return _replace_bare_trailing(out, pct, min_inc_usd, base_mult, bare_min_value)
-
-def _process_text_block_only_price(text: str, pct: float, min_inc_usd: float, base_mult: int,
-                                   only_changed: bool, bare_min_value: float) -> tuple[str, int]:
-    out_lines, changed_count = [], 0
-    for ln in text.splitlines():
-        new_ln, changed = _adjust_line_only_price(ln, pct, min_inc_usd, base_mult, bare_min_value)
-        if changed:
-            changed_count += 1
-            out_lines.append(new_ln)
-        else:
-            if not only_changed:
-                out_lines.append(ln)
-    return "\n".join(out_lines), changed_count
+            os.remove(previo["path"])
+        except OSError:
+            pass
+    if LISTADOS_TMP_DIR.exists():
+        limite = time.time() - LISTADOS_TMP_MAX_AGE
+        for f in LISTADOS_TMP_DIR.glob("*.txt"):
+            try:
+                if f.stat().st_mtime < limite:
+                    f.unlink()
+            except OSError:
+                pass
+
+def _listados_limpiar():
+    # Callback: el formulario se vuelve a dibujar ya vacío, sin un rerun extra
+    st.session_state['listados_output'] = ""
+    st.session_state['listados_count']  = 0
+    _listados_borrar_salida()
+    st.session_state['listados_textarea_nonce'] += 1  # borra textarea
 
 def run_listados():
     st.subheader("Listados (ajuste de precios – solo precio)")
@@ -531,6 +624,11 @@ def run_listados():
     if 'listados_textarea_nonce' not in st.session_state:
         st.session_state['listados_textarea_nonce'] = 0
     TEXTAREA_KEY = f"listados_text__{st.session_state['listados_textarea_nonce']}"
+    UPLOAD_KEY   = f"listados_file__{st.session_state['listados_textarea_nonce']}"
+
+    modo = st.radio("Entrada", ["Pegar texto", "Subir archivo"], horizontal=True, key="listados_modo",
+                    help="Para listas muy grandes: el archivo se procesa en streaming y se descarga sin mostrarlo entero.")
+    modo_archivo = modo == "Subir archivo"
 
     with st.form("form_listados"):
         c1, c2, c3, c4 = st.columns(4)
@@ -546,53 +644,89 @@ def run_listados():
 
         only_changed = st.checkbox("Mostrar solo líneas con cambios", value=False)
 
-        st.text_area(
-            "Pegá aquí la lista original",
-            key=TEXTAREA_KEY,
-            height=280,
-            placeholder=(
-                "Ejemplos:\n"
-                "IPHONE 13 128GB MIDNIGHT - STARLIGHT 490\n"
-                "US$ 1.250\n"
-                "US$D720\n"
-                "U$D1390\n"
-                "USD720\n"
-                "💲 535\n"
-                "$690\n"
-                "Precio al final sin símbolo 480\n"
+        if modo_archivo:
+            st.file_uploader("Subí la lista original (.txt)", type=["txt", "csv"], key=UPLOAD_KEY)
+        else:
+            st.text_area(
+                "Pegá aquí la lista original",
+                key=TEXTAREA_KEY,
+                height=280,
+                placeholder=(
+                    "Ejemplos:\n"
+                    "IPHONE 13 128GB MIDNIGHT - STARLIGHT 490\n"
+                    "US$ 1.250\n"
+                    "US$D720\n"
+                    "U$D1390\n"
+                    "USD720\n"
+                    "💲 535\n"
+                    "$690\n"
+                    "Precio al final sin símbolo 480\n"
+                )
             )
-        )
         colb = st.columns([1,1,2])
         procesar = colb[0].form_submit_button("Procesar ✅")
-        limpiar  = colb[1].form_submit_button("🧹 Limpiar")
+        colb[1].form_submit_button("🧹 Limpiar", on_click=_listados_limpiar)
 
     if 'listados_output' not in st.session_state:
         st.session_state['listados_output'] = ""
         st.session_state['listados_count']  = 0
 
-    if limpiar:
-        st.session_state['listados_output'] = ""
-        st.session_state['listados_count']  = 0
-        st.session_state['listados_textarea_nonce'] += 1  # borra textarea
-        raise RerunException(RerunData())
-
-    if procesar:
+    if procesar and modo_archivo:
+        archivo = st.session_state.get(UPLOAD_KEY)
+        if archivo is None:
+            st.warning("Subí un archivo para procesarlo.")
+        else:
+            _listados_borrar_salida()
+            LISTADOS_TMP_DIR.mkdir(parents=True, exist_ok=True)
+            out_path = LISTADOS_TMP_DIR / f"{uuid.uuid4().hex}.txt"
+            archivo.seek(0)
+            src = io.TextIOWrapper(archivo, encoding="utf-8-sig", errors="replace")
+            with perf.seccion("listados"), open(out_path, "w", encoding="utf-8", newline="") as dst:
+                cant, preview = process_file(
+                    src, dst, pct,
+                    min_inc_usd=min_inc_usd,
+                    base_mult=base_mult,
+                    only_changed=only_changed,
+                    bare_min_value=bare_min_value,
+                    preview_lines=LISTADOS_PREVIEW,
+                )
+            src.detach()
+            st.session_state['listados_file'] = {
+                "path":    str(out_path),
+                "name":    f"{os.path.splitext(archivo.name)[0]}_ajustada.txt",
+                "count":   cant,
+                "preview": preview,
+            }
+
+    if procesar and not modo_archivo:
         texto_in = st.session_state.get(TEXTAREA_KEY, "")
         if not texto_in.strip():
             st.warning("Pegá la lista en el recuadro para procesarla.")
         else:
-            resultado, cant = _process_text_block_only_price(
-                texto_in, pct,
-                min_inc_usd=min_inc_usd,
-                base_mult=base_mult,
-                only_changed=only_changed,
-                bare_min_value=bare_min_value
-            )
+            with perf.seccion("listados"):
+                resultado, cant, stats = process_text_block_memo(
+                    texto_in, pct,
+                    min_inc_usd=min_inc_usd,
+                    base_mult=base_mult,
+                    only_changed=only_changed,
+                    bare_min_value=bare_min_value
+                )
             st.session_state['listados_output'] = resultado
             st.session_state['listados_count']  = cant
+            st.session_state['listados_cache']  = stats
 
-    if st.session_state['listados_output']:
+    resultado_listados(modo_archivo)
+
+@st.fragment
+def resultado_listados(modo_archivo):
+    """Panel de resultado: copiar o descargar no vuelve a correr la solapa."""
+    if not modo_archivo and st.session_state['listados_output']:
         st.success(f"¡Listo! Se ajustaron {st.session_state['listados_count']} línea(s). Copiá o descargá.")
+        stats = st.session_state.get('listados_cache')
+        if stats and stats["lineas"]:
+            st.caption(f"Caché: {stats['aciertos'] / stats['lineas']:.0%} de las líneas ya estaban procesadas"
+                       f" · {stats['recalculadas']} solo recalculadas con los parámetros nuevos"
+                       f" · {stats['lineas'] - stats['aciertos'] - stats['recalculadas']} leídas de cero")
         st.code(st.session_state['listados_output'], language="text")
         copy_to_clipboard_button(st.session_state['listados_output'], label="📋 Copiar resultado")
         st.download_button(
@@ -600,15 +734,187 @@ def run_listados():
             data=st.session_state['listados_output'].encode("utf-8"),
             file_name="lista_ajustada.txt",
             mime="text/plain",
+            on_click="ignore",
             use_container_width=True,
         )
 
+    salida = st.session_state.get('listados_file')
+    if modo_archivo and salida and os.path.exists(salida["path"]):
+        st.success(f"¡Listo! Se ajustaron {salida['count']} línea(s). Descargá el archivo completo.")
+        if salida["preview"]:
+            st.caption(f"Vista previa: primeras {len(salida['preview'])} línea(s) ajustadas")
+            st.code("\n".join(salida["preview"]), language="text")
+        with open(salida["path"], "rb") as f:
+            st.download_button(
+                "⬇️ Descargar lista ajustada",
+                data=f,
+                file_name=salida["name"],
+                mime="text/plain",
+                on_click="ignore",
+                use_container_width=True,
+            )
+
+# ===================== CARGA DE LISTAS A COSTOS =====================
+def _hoja_ingesta_xlsx(prov: str, diff) -> bytes:
+    """Hoja del proveedor con el diff aplicado, como .xlsx (se arma recién al descargar)."""
+    buf = io.BytesIO()
+    ingesta.aplicar(utils.load_workbook_frames()["sheets"][prov], diff).to_excel(
+        buf, sheet_name=prov, index=False)
+    return buf.getvalue()
+
+def run_ingesta():
+    """Lista de un proveedor -> diff contra su hoja de costos, listo para escribir."""
+    with st.form("form_ingesta"):
+        c1, c2 = st.columns([1, 1])
+        prov   = c1.selectbox("Proveedor", catalogo.PROVEEDORES, key="ingesta_prov")
+        umbral = c2.number_input("Umbral núm. pelado (USD)", min_value=0.0, max_value=10000.0,
+                                 value=ingesta.UMBRAL_PELADO, step=5.0, key="ingesta_umbral")
+        texto   = st.text_area("Pegá la lista del proveedor", height=200, key="ingesta_texto")
+        archivo = st.file_uploader("…o subí la lista (.txt)", type=["txt", "csv"], key="ingesta_file")
+        analizar = st.form_submit_button("Analizar 🔍")
+
+    if analizar:
+        if archivo is not None:
+            texto = archivo.getvalue().decode("utf-8-sig", errors="replace")
+        if not texto.strip():
+            st.warning("Pegá o subí una lista para analizarla.")
+        else:
+            with perf.seccion("ingesta"):
+                hoja  = utils.load_workbook_frames()["sheets"][prov]
+                filas = ingesta.parsear_lista(texto, utils.indice_modelos(), umbral)
+                st.session_state["ingesta_resultado"] = {
+                    "prov": prov,
+                    "diff": ingesta.diff_costos(filas, hoja),
+                }
+
+    res = st.session_state.get("ingesta_resultado")
+    if not res:
+        return
+    prov, diff = res["prov"], res["diff"]
+    cuenta = diff["Estado"].value_counts()
+    cols = st.columns(4)
+    for col, estado in zip(cols, ["Nuevo", "Cambia", "Igual", "Sin match"]):
+        col.metric(estado, int(cuenta.get(estado, 0)))
+    st.dataframe(diff, use_container_width=True, hide_index=True)
+
+    d1, d2 = st.columns(2)
+    d1.download_button("⬇️ Diff (CSV)", data=lambda: diff.to_csv(index=False).encode("utf-8"),
+                       file_name=f"diff_{prov}.csv", mime="text/csv", use_container_width=True,
+                       on_click="ignore", key="ingesta_diff_csv")
+    d2.download_button(f"⬇️ Hoja {prov} actualizada", data=lambda: _hoja_ingesta_xlsx(prov, diff),
+                       file_name=f"{prov}.xlsx",
+                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                       use_container_width=True, on_click="ignore", key="ingesta_hoja_xlsx")
+    st.caption(f"La hoja descargada no toca el Resumen; «Escribir» actualiza {prov} y la "
+               f"columna {prov} del Resumen juntas.")
+
+    cambios = int(cuenta.get("Nuevo", 0) + cuenta.get("Cambia", 0))
+    confirmar = st.checkbox(f"Confirmo reemplazar la hoja {prov} en Proveedores.xlsx "
+                            f"({cambios} cambio(s))", key="ingesta_confirmar")
+    if st.button("💾 Escribir en Proveedores.xlsx", disabled=not (confirmar and cambios),
+                 key="ingesta_escribir"):
+        try:
+            ingesta.escribir_diff(prov, diff)
+        except OSError as e:
+            st.error(f"No se pudo escribir el Excel: {e}")
+        else:
+            st.session_state.pop("ingesta_resultado", None)
+            st.success(f"Hojas {prov} y {catalogo.HOJA_RESUMEN} actualizadas. "
+                       "El catálogo se recarga solo en unos segundos.")
+
+# ===================== RENDIMIENTO (opcional) =====================
+def _perf_en_secrets() -> bool:
+    try:
+        return bool(st.secrets.get("perf", False))
+    except Exception:  # noqa: BLE001 - sin secrets.toml Streamlit lanza su propio error
+        return False
+
+def panel_perf():
+    """Último rerun de esta sesión y percentiles de los reruns de este proceso (todas las sesiones)."""
+    historial = perf.historial()
+    propios   = [r for r in historial if r["sesion"] == st.session_state["perf_sesion"]]
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        if propios:
+            ult = propios[-1]
+            rss = f" · RSS {ult['rss_mb']:.0f} MB ({ult['rss_delta_mb']:+.1f})" if ult["rss_mb"] else ""
+            st.caption(f"Último rerun: {ult['total_ms']:.1f} ms{rss}")
+            st.dataframe(pd.DataFrame(sorted(ult["secciones"].items(), key=lambda kv: -kv[1]),
+                                      columns=["Sección", "ms"]),
+                         use_container_width=True, hide_index=True)
+            if ult["cache"]:
+                st.dataframe(pd.DataFrame([(k, h, m) for k, (h, m) in ult["cache"].items()],
+                                          columns=["Caché", "Aciertos", "Fallos"]),
+                             use_container_width=True, hide_index=True)
+        res = perf.resumen(historial)
+        st.caption(f"Percentiles (ms) de los últimos {len(historial)} reruns del proceso")
+        st.dataframe(pd.DataFrame([{"Sección": k, **{c: v[c] for c in ("n", "p50", "p95", "p99")}}
+                                   for k, v in res.items()]).round(1),
+                     use_container_width=True, hide_index=True)
+        st.caption(f"Log: {config.PERF_LOG}")
+
 # ===================== INTERFAZ PRINCIPAL =====================
-st.title("DRB Electro")
-tab1, tab2, tab3 = st.tabs(["Presupuesto", "Nuevo Pedido", "Listados"])
-with tab1:
-    run_presupuesto()
-with tab2:
-    run_pedidos()
-with tab3:
+def estado_catalogo():
+    # El Excel se vigila en segundo plano: los reruns usan siempre la última versión ya procesada
+    with perf.seccion("catalogo"):
+        utils.iniciar_vigilancia()
+        info = utils.catalogue_info()
+    estado = " · hay una versión nueva cargándose…" if info["pendiente"] else ""
+    st.caption(f"Catálogo del {info['modificado']:%d/%m/%Y %H:%M} · "
+               f"cargado {info['cargado']:%H:%M:%S} en {info['segundos']:.2f} s{estado}")
+    if info["error"]:
+        st.warning(f"No se pudo cargar la versión nueva del catálogo ({info['error']}). "
+                   "Se sigue usando la anterior.")
+
+def run_solapa_listados():
     run_listados()
+    with st.expander("📥 Cargar lista de proveedor a costos"):
+        run_ingesta()
+
+# Sección -> (función, nombre en perf, usa el catálogo). Solo se ejecuta la
+# sección elegida, y el catálogo se carga recién cuando una sección lo usa:
+# Listados solo lo necesita para la ingesta (al analizar o con un diff abierto),
+# y ahí run_ingesta lo carga por su cuenta.
+SECCIONES = {
+    "Presupuesto":  (run_presupuesto,     "tab_presupuesto", True),
+    "Nuevo Pedido": (run_pedidos,         "tab_pedidos",     True),
+    "Listados":     (run_solapa_listados, "tab_listados",    False),
+}
+
+# Streamlit borra el valor de los widgets que no se dibujan en un rerun; estos
+# (lo que el usuario tipeó o eligió) se conservan al cambiar de sección.
+CONSERVAR = (
+    "presupuesto_margen", "presupuesto_items_buscador",
+    "item_busqueda", "item_color",
+    "item_marca", "item_modelo", "item_proveedor", "item_cantidad", "item_costo_usd",
+    "item_marca_manual", "item_modelo_manual", "item_proveedor_manual",
+    "item_cantidad_manual", "item_color_manual", "item_costo_usd_manual",
+    "np_envio", "np_retiro", "np_manual",
+    "np_direccion", "np_localidad", "np_horario", "np_moneda",
+    "np_costo_envio", "np_importe", "np_aclaracion", "np_nombre", "np_celular",
+    "listados_modo", "ingesta_prov", "ingesta_texto",
+)
+
+def _conservar_widgets():
+    textarea = f"listados_text__{st.session_state.get('listados_textarea_nonce', 0)}"
+    for k in list(st.session_state.keys()):
+        if k in CONSERVAR or k == textarea:
+            st.session_state[k] = st.session_state[k]
+
+def main():
+    st.title("DRB Electro")
+    _conservar_widgets()
+    nombre = st.radio("Sección", list(SECCIONES), horizontal=True, key="seccion",
+                      label_visibility="collapsed")
+    run, clave_perf, usa_catalogo = SECCIONES[nombre]
+    if usa_catalogo:
+        estado_catalogo()
+    with perf.seccion(clave_perf):
+        run()
+
+if not perf.activo() and _perf_en_secrets():
+    perf.activar()
+st.session_state.setdefault("perf_sesion", uuid.uuid4().hex[:8])
+with perf.rerun(st.session_state["perf_sesion"]):
+    main()
+if perf.activo():
+    panel_perf()
@@ -0,0 +1,272 @@
+# bench/bench_carga.py
+"""
+Prueba de carga: N vendedores usando la app a la vez en un mismo proceso.
+
+Cada vendedor es una sesión headless de AppTest en su propio hilo, como en el
+servidor de Streamlit (un hilo por sesión, catálogo compartido en memoria).
+Cada sesión hace un recorrido realista:
+  contraseña → buscar y agregar ítems al presupuesto (con typos, que van por
+  sugerencias) → Nuevo Pedido (buscar, agregar, datos, vista previa) →
+  Listados (pegar una lista y procesarla) → vuelta a Presupuesto,
+y se mide cada rerun de punta a punta (AppTest.run) y el RSS del proceso.
+Corre offline; no guarda pedidos ni toca el Excel.
+
+AppTest usa globales de Streamlit (Runtime._instance, opciones de config) y
+no admite dos runs a la vez, así que los reruns pasan de a uno: la latencia
+reportada es espera en la cola + rerun, como en un servidor de un núcleo (el
+GIL ya serializa el trabajo Python del script). "solo rerun" es sin la espera.
+
+Uso:
+    python bench/bench_carga.py                       # 1, 10, 25 y 50 sesiones
+    python bench/bench_carga.py --sesiones 5 20 --ciclos 3 --pausa 0   # sin pausas: saturación
+    python bench/bench_carga.py --secciones           # + tiempos por sección (perf.py)
+    python bench/bench_carga.py --json carga.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+import perf  # noqa: E402
+import utils  # noqa: E402
+from bench_listados import synthetic_list  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner  # noqa: E402
+
+APP      = str(ROOT / "PRUBEbuscador.py")
+PASSWORD = "1224"  # PRUBEbuscador.PASSWORD
+
+# AppTest compila el script en cada run con un ScriptCache nuevo; el servidor
+# real compila una vez por proceso. Compartirlo saca ese costo (que no existe
+# en producción) de la medición y evita compilar en paralelo desde varios
+# hilos, que en CPython 3.11 puede romper ast.parse.
+_SCRIPT_CACHE = ScriptCache()
+app_test.ScriptCache = local_script_runner.ScriptCache = lambda: _SCRIPT_CACHE
+# Los avisos de deprecación y de labels vacíos de cada rerun tapan el reporte
+# (AppTest vuelve a fijar el nivel de log en cada run: se apagan los loggers)
+for _ruidoso in ("streamlit.deprecation_util", "streamlit.elements.lib.policies",
+                 "streamlit.runtime.scriptrunner_utils.script_run_context"):
+    logging.getLogger(_ruidoso).disabled = True
+
+_RUN_LOCK = threading.Lock()
+
+
+# ===================== RECORRIDO DE UNA SESIÓN =====================
+def consultas(n: int = 40, seed: int = 7) -> list:
+    """Búsquedas tipo vendedor sacadas del catálogo: "iphone 13", "s25 ultr" (typo)..."""
+    rnd = random.Random(seed)
+    modelos = utils.load_catalogue()["Modelo"].dropna().astype(str).unique().tolist()
+    out = []
+    for modelo in rnd.sample(modelos, min(n, len(modelos))):
+        q = " ".join(modelo.lower().split()[:2])
+        if len(q) > 5 and rnd.random() < 0.3:
+            i = rnd.randrange(1, len(q) - 1)
+            q = q[:i] + q[i + 1:]
+        out.append(q)
+    return out
+
+
+def _hay(widgets, key: str) -> bool:
+    return any(w.key == key for w in widgets)
+
+
+class Sesion:
+    def __init__(self, n: int, args, busquedas: list):
+        self.rnd       = random.Random(n)
+        self.args      = args
+        self.busquedas = busquedas
+        self.lista     = synthetic_list(args.lineas, seed=n)
+        self.tiempos   = []  # [(paso, ms de espera + rerun)]
+        self.servicio  = []  # ms del rerun solo
+        self.at        = AppTest.from_file(APP, default_timeout=120)
+
+    def _run(self, paso: str) -> None:
+        if self.args.pausa:
+            time.sleep(self.rnd.uniform(0, 2 * self.args.pausa))  # el vendedor piensa/tipea
+        t0 = time.perf_counter()
+        with _RUN_LOCK:
+            t1 = time.perf_counter()
+            self.at.run()
+        t2 = time.perf_counter()
+        self.tiempos.append((paso, (t2 - t0) * 1000))
+        self.servicio.append((t2 - t1) * 1000)
+        if self.at.exception:
+            raise RuntimeError(f"{paso}: {self.at.exception[0].value}")
+
+    def _seccion(self, nombre: str) -> None:
+        self.at.radio(key="seccion").set_value(nombre)
+        self._run("seccion")
+
+    def presupuesto(self) -> None:
+        at = self.at
+        for q in self.rnd.sample(self.busquedas, 2):
+            at.text_input(key="presupuesto_items_buscador").input(q)
+            self._run("buscar")
+            if _hay(at.button, "presupuesto_items_add"):
+                at.button(key="presupuesto_items_add").click()
+                self._run("agregar")
+
+    def pedido(self) -> None:
+        at = self.at
+        self._seccion("Nuevo Pedido")
+        at.text_input(key="item_busqueda").input(self.rnd.choice(self.busquedas))
+        self._run("pedido_buscar")
+        at.button(key="add_item_btn").click()
+        self._run("pedido_agregar")
+        at.text_input(key="np_nombre").input(f"Cliente {self.rnd.randrange(1000)}")
+        self._run("pedido_datos")
+        at.button(key="btn_preview").click()
+        self._run("pedido_preview")
+        at.button(key="btn_back").click()
+        self._run("pedido_volver")
+
+    def listados(self) -> None:
+        at = self.at
+        self._seccion("Listados")
+        area = next(t for t in at.text_area if t.key.startswith("listados_text__"))
+        area.input(self.lista)  # dentro del form: se manda con el submit
+        next(b for b in at.button if b.label.startswith("Procesar")).click()
+        self._run("listados")
+        self._seccion("Presupuesto")
+
+    def recorrer(self) -> None:
+        self._run("abrir")
+        self.at.text_input(key="pwd").input(PASSWORD)
+        self._run("login")
+        for _ in range(self.args.ciclos):
+            self.presupuesto()
+            self.pedido()
+            self.listados()
+
+
+# ===================== MEDICIÓN =====================
+class _PicoRSS(threading.Thread):
+    """Muestrea el RSS del proceso mientras corren las sesiones."""
+
+    def __init__(self, intervalo: float = 0.05):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico      = perf.rss_mb() or 0.0
+        self._fin      = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, perf.rss_mb() or 0.0)
+
+    def parar(self) -> float:
+        self._fin.set()
+        self.join()
+        return self.pico
+
+
+def _percentiles(valores: list) -> dict:
+    return {"n": len(valores), **{f"p{p}": perf.percentil(valores, p) for p in (50, 95, 99)},
+            "max": max(valores) if valores else None}
+
+
+def correr(n: int, args, busquedas: list) -> dict:
+    """Corre n sesiones a la vez; latencias por paso y memoria del proceso."""
+    gc.collect()
+    rss0 = perf.rss_mb()
+    sesiones = [Sesion(i, args, busquedas) for i in range(n)]
+    errores  = []
+
+    def _hilo(s):
+        try:
+            s.recorrer()
+        except Exception as exc:  # noqa: BLE001 - se reporta y sigue la carga
+            errores.append(f"{type(exc).__name__}: {exc}")
+
+    pico = _PicoRSS()
+    pico.start()
+    t0 = time.perf_counter()
+    hilos = [threading.Thread(target=_hilo, args=(s,), name=f"vendedor-{i}") for i, s in enumerate(sesiones)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    segundos = time.perf_counter() - t0
+    gc.collect()
+    rss = perf.rss_mb()  # con todas las sesiones vivas (como vendedores conectados)
+    pico_mb = pico.parar()
+
+    tiempos = [t for s in sesiones for t in s.tiempos]
+    por_paso = {}
+    for paso, ms in tiempos:
+        por_paso.setdefault(paso, []).append(ms)
+    return {
+        "sesiones":  n,
+        "segundos":  round(segundos, 2),
+        "errores":   errores,
+        "total":     _percentiles([ms for _, ms in tiempos]),
+        "rerun":     _percentiles([ms for s in sesiones for ms in s.servicio]),
+        "pasos":     {paso: _percentiles(v) for paso, v in por_paso.items()},
+        "rss_mb":    None if rss is None else round(rss, 1),
+        "pico_mb":   round(pico_mb, 1),
+        "mb_sesion": None if rss is None or rss0 is None else round((rss - rss0) / n, 2),
+    }
+
+
+def _fila(nombre: str, r: dict) -> str:
+    return (f"{nombre:16} {r['n']:6} {r['p50']:9.1f} {r['p95']:9.1f} {r['p99']:9.1f} {r['max']:9.1f}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sesiones", type=int, nargs="+", default=[1, 10, 25, 50],
+                    help="cantidades de sesiones simultáneas a probar")
+    ap.add_argument("--ciclos", type=int, default=2, help="vueltas del recorrido por sesión")
+    ap.add_argument("--pausa", type=float, default=1.0,
+                    help="pausa media entre acciones en s (0 = sin pausa, carga máxima)")
+    ap.add_argument("--lineas", type=int, default=40, help="líneas de la lista pegada en Listados")
+    ap.add_argument("--secciones", action="store_true",
+                    help="prende perf.py y reporta también el tiempo de cada sección del script")
+    ap.add_argument("--json", type=Path, help="guarda los resultados en este archivo")
+    args = ap.parse_args(argv)
+
+    busquedas = consultas()
+    log = Path(tempfile.mkstemp(prefix="carga_", suffix=".jsonl")[1])
+    if args.secciones:
+        perf.activar(True, log=log)
+    # Calentamiento fuera de la medición: catálogo, índices y compilación del script
+    Sesion(10_000, argparse.Namespace(**{**vars(args), "ciclos": 1, "pausa": 0}), busquedas).recorrer()
+
+    resultados = []
+    for n in args.sesiones:
+        log.write_text("")
+        res = correr(n, args, busquedas)
+        if args.secciones:
+            res["secciones"] = perf.resumen(perf.leer_log(log))
+        resultados.append(res)
+
+        print(f"\n== {n} sesión(es) · {res['segundos']} s · RSS {res['rss_mb']} MB "
+              f"(pico {res['pico_mb']} MB, {res['mb_sesion']} MB/sesión) · errores: {len(res['errores'])}")
+        print(f"{'paso':16} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        print(_fila("TODOS", res["total"]))
+        print(_fila("solo rerun", res["rerun"]))
+        for paso, r in res["pasos"].items():
+            print(_fila(paso, r))
+        for nombre, r in sorted(res.get("secciones", {}).items(), key=lambda kv: -(kv[1]["p95"] or 0)):
+            print(f"  [script] {nombre:18} {r['n']:6} {r['p50']:9.1f} {r['p95']:9.1f} {r['p99']:9.1f}")
+        for err in res["errores"][:5]:
+            print(f"  ! {err}")
+    log.unlink(missing_ok=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if any(r["errores"] for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
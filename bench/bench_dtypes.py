@@ -0,0 +1,119 @@
+# bench/bench_dtypes.py
+"""
+Memoria y velocidad de filtros del catálogo: tipos originales vs compactos.
+
+Compara los frames como salen del Excel/snapshot (texto + float64) contra
+catalogo.compactar() (categóricas con diccionario compartido entre hojas,
+costos en float32 cuando es exacto). La memoria cuenta cada diccionario compartido una
+sola vez, que es lo que de verdad ocupa en el proceso.
+
+Uso:
+    python bench/bench_dtypes.py                # catálogo tal cual
+    python bench/bench_dtypes.py --escala 50    # filas repetidas x50 (catálogo grande)
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+import catalogo  # noqa: E402
+import utils  # noqa: E402
+
+
+def memoria(frames: dict) -> int:
+    """Bytes de todos los frames; un CategoricalDtype compartido se cuenta una vez."""
+    total, vistos = 0, set()
+    for df in frames.values():
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                total += serie.cat.codes.nbytes
+                cats = serie.cat.categories
+                if id(cats) not in vistos:
+                    vistos.add(id(cats))
+                    total += cats.memory_usage(deep=True)
+            else:
+                total += serie.memory_usage(deep=True, index=False)
+    return total
+
+
+def _escalar(frames: dict, veces: int) -> dict:
+    return {n: pd.concat([df] * veces, ignore_index=True) for n, df in frames.items()}
+
+
+def _mejor(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def filtros(frames: dict, claves: list, provs: list) -> dict:
+    """Los filtros "==" que hace la app, sobre una muestra de modelos."""
+    costos  = frames[catalogo.TABLA_COSTOS]
+    resumen = frames[catalogo.HOJA_RESUMEN]
+
+    def marca_modelo():
+        for m, mo in claves:
+            costos[(costos["Marca"] == m) & (costos["Modelo"] == mo)]
+            resumen[(resumen["Marca"] == m) & (resumen["Modelo"] == mo)]
+
+    def marca():
+        for m, _ in claves:
+            resumen[resumen["Marca"] == m]["Modelo"].unique()
+
+    def proveedor():
+        for p in provs:
+            costos[costos["Proveedor"] == p]
+
+    return {"Marca+Modelo": marca_modelo, "Marca -> modelos": marca, "Proveedor": proveedor}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--escala", type=int, default=1, help="repite las filas N veces")
+    ap.add_argument("--repeat", type=int, default=20, help="repeticiones (se toma la mejor)")
+    ap.add_argument("--muestra", type=int, default=50, help="modelos buscados por repetición")
+    args = ap.parse_args(argv)
+
+    sheets, costos = utils._load_or_compile()
+    sheets = _escalar(sheets, args.escala)
+    costos = pd.concat([costos] * args.escala, ignore_index=True)
+    t0 = time.perf_counter()
+    c_sheets, c_costos = catalogo.compactar(sheets, costos)
+    t_compactar = time.perf_counter() - t0
+
+    antes = {**sheets, catalogo.TABLA_COSTOS: costos}
+    ahora = {**c_sheets, catalogo.TABLA_COSTOS: c_costos}
+    rnd = random.Random(1)
+    pares = costos[["Marca", "Modelo"]].dropna().drop_duplicates().itertuples(index=False)
+    claves = rnd.sample(list(pares), min(args.muestra, len(costos)))
+    provs = list(catalogo.PROVEEDORES)
+
+    filas = sum(len(df) for df in antes.values())
+    print(f"{filas} filas en {len(antes)} tablas (escala x{args.escala}); "
+          f"compactar: {t_compactar * 1000:.1f} ms")
+    m0, m1 = memoria(antes), memoria(ahora)
+    print(f"\n{'memoria':18} {'antes':>12} {'ahora':>12} {'ahorro':>8}")
+    print(f"{'total':18} {m0 / 2**10:10.1f} KB {m1 / 2**10:10.1f} KB {1 - m1 / m0:8.0%}")
+    for nombre in antes:
+        a, b = memoria({nombre: antes[nombre]}), memoria({nombre: ahora[nombre]})
+        print(f"{nombre:18} {a / 2**10:10.1f} KB {b / 2**10:10.1f} KB {1 - b / a:8.0%}")
+
+    print(f"\n{'filtro':18} {'antes ms':>12} {'ahora ms':>12} {'x':>8}")
+    f_antes, f_ahora = filtros(antes, claves, provs), filtros(ahora, claves, provs)
+    for nombre in f_antes:
+        a, b = _mejor(f_antes[nombre], args.repeat), _mejor(f_ahora[nombre], args.repeat)
+        print(f"{nombre:18} {a * 1000:12.2f} {b * 1000:12.2f} {a / b:8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
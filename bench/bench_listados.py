@@ -0,0 +1,244 @@
+# bench/bench_listados.py
+"""
+Benchmark del motor de Listados (regex + parseo + ajuste), sin Streamlit.
+
+Genera listas sintéticas de proveedores con todas las variantes de moneda
+(USD, US$, US$D, U$S, U$D, USS, $, 💲, número pelado al final, separadores
+de miles) y mide cada helper por separado y el bloque completo. El modo
+memo se mide sobre una lista sin líneas repetidas: en frío no hay ningún
+acierto de caché, y pegarla de nuevo o cambiar el % son casos aparte.
+
+Uso:
+    python bench/bench_listados.py                  # corre y compara con el baseline
+    python bench/bench_listados.py --save-baseline  # guarda los tiempos como baseline
+    python bench/bench_listados.py --lines 20000 --tolerance 0.25
+
+Sale con código 1 si alguna medición es más lenta que el baseline por más de
+la tolerancia (por defecto 20%). Los tiempos se comparan relativos a una
+función de referencia medida en la misma corrida, así una máquina cargada no
+cuenta como regresión; si el baseline es de otro entorno (Python, plataforma,
+CPU) solo se avisa.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import listados  # noqa: E402
+from listados import (  # noqa: E402
+    BARE_NUMBER_AT_END_RE,
+    PRICE_TOKEN_RE,
+    _parse_number_general,
+    _process_text_block_only_price,
+    _replace_bare_trailing,
+    _replace_symbol_prices,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline_listados.json")
+
+PARAMS = dict(pct=10.0, min_inc_usd=30.0, base_mult=5)
+BARE_MIN = 100.0
+
+_MODELOS = [
+    "IPHONE 13 128GB MIDNIGHT", "IPHONE 15 PRO MAX 256GB", "SAMSUNG S25 ULTRA 12/512GB",
+    "REDMI NOTE 13 8/256GB", "MOTO G84 12/256GB 5G", "POCO X7 PRO 12/512GB", "📱 IPAD AIR M2 128GB",
+    "AIRPODS PRO 2", "🔥 S24 FE 8/256GB", "XIAOMI 14T 12/512GB",
+]
+_NUMEROS = ["490", "1.250", "1,250", "1 250", "1200,50", "1200.50", "2.345,90", "720", "85"]
+_FORMATOS = [
+    "{m} USD {n}", "{m} USD{n}", "{m} {n}USD", "{m} US$ {n}", "{m} US$D{n}", "{m} U$S {n}",
+    "{m} U$D{n}", "{m} USS {n}", "{m} ${n}", "{m} 💲 {n}", "{m} *USD {n}*", "{m} - {n}",
+    "{m} {n}", "{m}", "━━━ {m} ━━━", "",
+]
+
+
+# Sin U/S/D/O/I: la etiqueta no puede formar "USD", "USS", ni parecer un número
+_LETRAS = "ABCEFGHJKLMNPQRTVWXYZ"
+
+
+def _etiqueta(i: int) -> str:
+    letras = ""
+    while True:
+        i, r = divmod(i, len(_LETRAS))
+        letras = _LETRAS[r] + letras
+        if not i:
+            return f"REF-{letras}"
+
+
+def synthetic_list(lines: int, seed: int = 1234, distintas: bool = False) -> str:
+    """
+    Lista reproducible con todas las variantes de precio (y líneas sin precio).
+    Con distintas=True cada línea lleva una etiqueta propia y no hay líneas
+    vacías: ninguna se repite.
+    """
+    rnd = random.Random(seed)
+    formatos = [f for f in _FORMATOS if f] if distintas else _FORMATOS
+    filas = []
+    for i in range(lines):
+        modelo = rnd.choice(_MODELOS)
+        if distintas:
+            modelo = f"{modelo} {_etiqueta(i)}"
+        filas.append(rnd.choice(formatos).format(m=modelo, n=rnd.choice(_NUMEROS)))
+    return "\n".join(filas)
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _cpu() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for ln in f:
+                if ln.startswith("model name"):
+                    return ln.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def entorno() -> dict:
+    """Dónde se midió: un baseline solo es comparable en el mismo entorno."""
+    return {
+        "python":         platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform":       platform.platform(),
+        "machine":        platform.machine(),
+        "cpu":            _cpu(),
+        "cpus":           os.cpu_count(),
+    }
+
+
+def _referencia(rows: list):
+    # Trabajo parecido (regex + strings) que no depende de listados: escala la máquina
+    return [re.sub(r"\d+", "#", ln).upper().split() for ln in rows]
+
+
+def _memo(text: str):
+    return listados.process_text_block_memo(text, only_changed=False, bare_min_value=BARE_MIN, **PARAMS)
+
+
+def run(lines: int, repeat: int) -> dict:
+    text      = synthetic_list(lines)
+    text_rows = text.splitlines()
+    unicas    = synthetic_list(lines, distintas=True)
+    nums      = [m.group("num1") or m.group("num2")
+                 for ln in text_rows for m in PRICE_TOKEN_RE.finditer(ln)]
+    listados.process_text_block_batch("USD 1", only_changed=False, bare_min_value=BARE_MIN,
+                                      **PARAMS)  # importa numpy fuera de la medición
+
+    cases = {
+        "PRICE_TOKEN_RE.finditer":       lambda: [list(PRICE_TOKEN_RE.finditer(ln)) for ln in text_rows],
+        "BARE_NUMBER_AT_END_RE.search":  lambda: [BARE_NUMBER_AT_END_RE.search(ln) for ln in text_rows],
+        "_parse_number_general":         lambda: [_parse_number_general(n) for n in nums],
+        "_replace_symbol_prices":        lambda: [_replace_symbol_prices(ln, **PARAMS) for ln in text_rows],
+        "_replace_bare_trailing":        lambda: [_replace_bare_trailing(ln, bare_min_value=BARE_MIN, **PARAMS)
+                                                  for ln in text_rows],
+        "_process_text_block_only_price": lambda: _process_text_block_only_price(
+            text, only_changed=False, bare_min_value=BARE_MIN, **PARAMS),
+        "process_text_block_batch":      lambda: listados.process_text_block_batch(
+            text, only_changed=False, bare_min_value=BARE_MIN, **PARAMS),
+        "process_text_block_batch distintas": lambda: listados.process_text_block_batch(
+            unicas, only_changed=False, bare_min_value=BARE_MIN, **PARAMS),
+        # Modo memo sobre líneas todas distintas: lista nueva (caché vacía),
+        # la misma lista con otros parámetros (solo las posiciones en caché) y
+        # la misma lista pegada otra vez (todo en caché)
+        "process_text_block_memo frío":  lambda: (listados.limpiar_cache(), _memo(unicas)),
+        "process_text_block_memo otro %": lambda: (listados._LINEAS.clear(), _memo(unicas)),
+        "process_text_block_memo igual": lambda: _memo(unicas),
+    }
+    results = {}
+    for name, fn in cases.items():
+        # La referencia se mide pegada a cada caso: si la máquina se carga a
+        # mitad de la corrida, afecta a los dos por igual
+        ref  = _best_of(lambda: _referencia(text_rows), repeat)
+        secs = _best_of(fn, repeat)
+        results[name] = {"seconds": secs, "lines_per_sec": lines / secs if secs else float("inf"),
+                         "relativo": secs / ref}
+    return {
+        "lines":   lines,
+        "repeat":  repeat,
+        "entorno": entorno(),
+        "results": results,
+    }
+
+
+def ratio(current: dict, baseline: dict, name: str) -> float | None:
+    """Actual / baseline de una medición, relativo a la referencia si el baseline la tiene."""
+    base = baseline.get("results", {}).get(name)
+    if not base:
+        return None
+    res = current["results"][name]
+    if "relativo" in base:
+        return res["relativo"] / base["relativo"]
+    return res["seconds"] / base["seconds"]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Lista de (nombre, baseline_s, actual_s, ratio) que empeoraron más que la
+    tolerancia. Vacía (con un aviso) si el baseline es de otro entorno.
+    """
+    if baseline.get("lines") != current["lines"]:
+        print(f"Aviso: baseline medido con {baseline.get('lines')} líneas, ahora {current['lines']}.")
+    base_env = baseline.get("entorno") or {}
+    distintos = [k for k, v in current["entorno"].items() if base_env.get(k) != v]
+    if distintos:
+        print("Aviso: baseline de otro entorno (" + ", ".join(
+            f"{k}: {base_env.get(k)!r} -> {current['entorno'][k]!r}" for k in distintos)
+            + "); no se chequean regresiones. Regeneralo con --save-baseline en esta máquina.")
+        return []
+    regressions = []
+    for name, res in current["results"].items():
+        r = ratio(current, baseline, name)
+        if r is not None and r > 1 + tolerance:
+            regressions.append((name, baseline["results"][name]["seconds"], res["seconds"], r))
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--lines", type=int, default=5000, help="líneas de la lista sintética")
+    ap.add_argument("--repeat", type=int, default=5, help="repeticiones (se toma la mejor)")
+    ap.add_argument("--tolerance", type=float, default=0.20, help="regresión tolerada (0.20 = 20%%)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true")
+    args = ap.parse_args(argv)
+
+    current = run(args.lines, args.repeat)
+    base    = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+
+    print(f"{'función':36} {'ms':>10} {'líneas/s':>12} {'vs base':>9}")
+    for name, res in current["results"].items():
+        r   = ratio(current, base, name) if base else None
+        vs  = f"{r:8.2f}x" if r is not None else "        -"
+        print(f"{name:36} {res['seconds'] * 1000:10.2f} {res['lines_per_sec']:12,.0f} {vs}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline guardado en {args.baseline}")
+        return 0
+    if base is None:
+        print("No hay baseline; corré con --save-baseline para crearlo.")
+        return 0
+
+    regressions = compare(current, base, args.tolerance)
+    for name, old, new, r in regressions:
+        print(f"REGRESIÓN {name}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms ({r:.2f}x relativo)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# bench/bench_memoria.py
+"""
+Memoria y costo de copia del catálogo compartido.
+
+Compara lo que se pagaba en cada rerun antes (st.cache_data entrega una copia
+deserializada del DataFrame y después se hacía .copy() encima) contra las
+vistas sin copia de ahora (utils.load_catalogue / utils.tabla_*), y mide la
+memoria que retiene cada sesión abriendo sesiones headless con AppTest.
+
+Uso:
+    python bench/bench_memoria.py                 # costo por rerun + 5 sesiones
+    python bench/bench_memoria.py --sesiones 20 --repeat 50
+    python bench/bench_memoria.py --sesiones 0    # solo costo por rerun
+"""
+import argparse
+import gc
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+import utils  # noqa: E402
+
+
+def _medir(fn, repeat: int) -> tuple[float, int]:
+    """(mejor tiempo en s, pico de memoria asignada en bytes) de una llamada."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def rerun_antes():
+    # st.cache_data: pickle por cada acceso; después .copy() en la solapa
+    frames = utils.load_workbook_frames()
+    for df in (frames["sheets"][utils.HOJA_RESUMEN], frames["sheets"]["10%"]):
+        pickle.loads(pickle.dumps(df)).copy()
+
+
+def rerun_ahora():
+    utils.load_catalogue()
+    utils.tabla_precios("10%").buscar("")
+    utils.tabla_resumen().buscar("")
+
+
+def por_sesion(sesiones: int) -> tuple[int, int]:
+    """(bytes retenidos por la primera sesión, promedio de las siguientes)."""
+    from streamlit.testing.v1 import AppTest
+
+    apps = []
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    marcas = []
+    for _ in range(sesiones):
+        at = AppTest.from_file(str(ROOT / "PRUBEbuscador.py"), default_timeout=120)
+        at.session_state["authenticated"] = True
+        at.run()
+        apps.append(at)  # la sesión sigue viva, como un vendedor conectado
+        gc.collect()
+        marcas.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+    primera = marcas[0] - base
+    resto   = (marcas[-1] - marcas[0]) / (sesiones - 1) if sesiones > 1 else 0
+    return primera, int(resto)
+
+
+def _mb(n: float) -> str:
+    return f"{n / 2**20:8.2f} MB"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--repeat", type=int, default=20, help="repeticiones (se toma la mejor)")
+    ap.add_argument("--sesiones", type=int, default=5, help="sesiones AppTest (0 = no medir)")
+    args = ap.parse_args(argv)
+
+    utils.load_workbook_frames()  # carga inicial fuera de la medición
+    rerun_ahora()
+
+    print(f"{'por rerun':12} {'ms':>9} {'pico asignado':>14}")
+    for nombre, fn in (("antes", rerun_antes), ("ahora", rerun_ahora)):
+        secs, peak = _medir(fn, args.repeat)
+        print(f"{nombre:12} {secs * 1000:9.3f} {_mb(peak):>14}")
+
+    if args.sesiones > 0:
+        primera, resto = por_sesion(args.sesiones)
+        print(f"\nsesiones: {args.sesiones}")
+        print(f"primera sesión (incluye catálogo e índices): {_mb(primera)}")
+        print(f"cada sesión adicional:                       {_mb(resto)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
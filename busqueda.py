@@ -0,0 +1,177 @@
+# busqueda.py
+"""
+Índice de búsqueda para el buscador de Marca/Modelo (sin Streamlit).
+
+Se construye una vez por versión del catálogo: normaliza cada fila
+(mayúsculas, sin acentos), arma un índice de n-gramas (1 a 3 caracteres)
+y responde consultas con intersección de conjuntos + verificación literal.
+No usa regex, así que entradas como "(" o "+" no rompen nada.
+
+También arma tablas hash (marca, modelo) -> filas, para que traer el
+precio o los costos de un modelo sea O(1) en vez de un filtro por máscara.
+
+Para errores de tipeo ("iphon 13 pro max", "redmi note13") hay además una
+búsqueda difusa por similitud de trigramas, también precalculada.
+"""
+import heapq
+import re
+import unicodedata
+from collections import Counter
+
+_NGRAM = 3
+_SPLIT_RE = re.compile(r"\s+")
+
+
+def normalize(text) -> str:
+    """Mayúsculas y sin acentos: 'Módulo ñ' -> 'MODULO N'."""
+    if text is None or text != text:  # None / NaN
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.upper().strip()
+
+
+def _trigrams(text: str) -> set:
+    """Trigramas del texto compacto (sin espacios), con borde al inicio y al final."""
+    compact = "^" + text.replace(" ", "") + "$"
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+def _score(shared: int, q: int, r: int) -> float:
+    """Promedio entre cobertura de la consulta y coeficiente de Dice."""
+    return (shared / q + 2 * shared / (q + r)) / 2
+
+
+def similitud(query: str, text: str) -> float:
+    """Score de SearchIndex.fuzzy entre una consulta y un texto suelto."""
+    qg, tg = _trigrams(normalize(query)), _trigrams(normalize(text))
+    return _score(len(qg & tg), len(qg), len(tg)) if qg and tg else 0.0
+
+
+def _grams(word: str):
+    n = min(len(word), _NGRAM)
+    return {word[i:i + n] for i in range(len(word) - n + 1)}
+
+
+def lookup_key(marca, modelo) -> tuple[str, str]:
+    return normalize(marca), normalize(modelo)
+
+
+def build_lookup(df) -> dict:
+    """{(marca, modelo) normalizados: [posiciones iloc]} en el orden del DataFrame."""
+    lookup = {}
+    for pos, key in enumerate(zip(df["Marca"].tolist(), df["Modelo"].tolist())):
+        lookup.setdefault(lookup_key(*key), []).append(pos)
+    return lookup
+
+
+class SearchIndex:
+    """Índice literal por n-gramas sobre columnas de texto de un DataFrame."""
+
+    def __init__(self, *columns):
+        # Cada fila se guarda como "COL1 COL2 ..." normalizado; una palabra de
+        # la consulta nunca tiene espacios, así que no puede cruzar columnas.
+        self.texts = [" ".join(normalize(v) for v in values) for values in zip(*columns)]
+        self._postings = {}
+        for pos, text in enumerate(self.texts):
+            for word in set(_SPLIT_RE.split(text)):
+                for size in range(1, _NGRAM + 1):
+                    for i in range(len(word) - size + 1):
+                        self._postings.setdefault(word[i:i + size], set()).add(pos)
+
+        # Trigramas por fila para la búsqueda difusa
+        self._tri_size = []
+        self._tri_postings = {}
+        for pos, text in enumerate(self.texts):
+            grams = _trigrams(text)
+            self._tri_size.append(len(grams))
+            for gram in grams:
+                self._tri_postings.setdefault(gram, []).append(pos)
+
+    @classmethod
+    def from_frame(cls, df, columns=("Marca", "Modelo")):
+        return cls(*(df[c].tolist() for c in columns))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query: str) -> list[int]:
+        """
+        Posiciones (iloc) de las filas que contienen TODAS las palabras de la
+        consulta como texto literal, en el orden original del catálogo.
+        """
+        words = [w for w in _SPLIT_RE.split(normalize(query)) if w]
+        if not words:
+            return list(range(len(self.texts)))
+
+        postings = []
+        for word in words:
+            for gram in _grams(word):
+                posting = self._postings.get(gram)
+                if not posting:
+                    return []
+                postings.append(posting)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        texts = self.texts
+        return sorted(pos for pos in candidates
+                      if all(w in texts[pos] for w in words))
+
+    def fuzzy(self, query: str, limit: int = 10, min_score: float = 0.3) -> list[tuple[int, float]]:
+        """
+        Top `limit` filas por similitud de trigramas con la consulta:
+        [(posición, score)] ordenado de mayor a menor, score en [0, 1].
+
+        El score promedia cuánto de la consulta aparece en la fila (cobertura)
+        con el coeficiente de Dice, así "iphon 13" prefiere "IPHONE 13 128GB"
+        antes que un modelo más largo que también lo contenga.
+        """
+        grams = _trigrams(normalize(query))
+        if len(grams) <= 2:
+            return []
+        shared = Counter()
+        for gram in grams:
+            for pos in self._tri_postings.get(gram, ()):
+                shared[pos] += 1
+
+        q = len(grams)
+        sizes = self._tri_size
+        scored = ((pos, _score(n, q, sizes[pos])) for pos, n in shared.items())
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[1], -item[0]))
+        return [(pos, score) for pos, score in best if score >= min_score]
+
+
+class TablaMemoria:
+    """
+    Tabla del catálogo en memoria: DataFrame + índice de búsqueda + lookup
+    (marca, modelo). Misma interfaz que catalogo_db.TablaSQLite.
+    """
+
+    def __init__(self, df, indice=None, lookup=None):
+        self.df      = df
+        self.indice  = indice
+        self.lookup  = lookup if lookup is not None else build_lookup(df)
+
+    @property
+    def columns(self):
+        return self.df.columns
+
+    def buscar(self, busq: str):
+        """
+        (filas, sugerencias): filas que coinciden literalmente con la búsqueda;
+        si no hay, las más parecidas en orden de similitud, con sugerencias
+        [(texto, score)] no vacío.
+        """
+        if not busq or self.indice is None:
+            return self.df.copy(deep=False), []  # vista: no expone el frame compartido
+        pos = self.indice.search(busq)
+        if pos:
+            return self.df.iloc[pos], []
+        sugeridos = self.indice.fuzzy(busq)
+        return (self.df.iloc[[p for p, _ in sugeridos]],
+                [(self.indice.texts[p], score) for p, score in sugeridos])
+
+    def filas(self, marca, modelo):
+        """Todas las filas de (marca, modelo), en el orden de la tabla."""
+        return self.df.iloc[self.lookup.get(lookup_key(marca, modelo), [])]
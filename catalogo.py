@@ -0,0 +1,218 @@
+# catalogo.py
+"""
+Lectura del catálogo de proveedores sin Streamlit.
+
+Además del parseo del Excel, permite "compilar" Proveedores.xlsx a un
+snapshot columnar (Arrow IPC, una tabla por hoja) que se carga con memory
+mapping y evita openpyxl en el arranque en frío.
+
+Uso:  python catalogo.py [ruta.xlsx]
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# Hojas del Excel que usa la app (se leen todas juntas en una sola pasada)
+PROVEEDORES    = ["Eze", "Di", "Ale"]
+HOJA_RESUMEN   = "Resumen"
+HOJAS_MARGEN   = ["10%", "5%", "Bajo Precio"]
+HOJAS_CATALOGO = [HOJA_RESUMEN, *PROVEEDORES, *HOJAS_MARGEN]
+
+# Tabla derivada que también se guarda en el snapshot
+TABLA_COSTOS = "__costos__"
+
+# Columnas numéricas por hoja (se fuerzan a float64 al compilar)
+_NUMERIC_COLS = {
+    HOJA_RESUMEN:  PROVEEDORES,
+    "Ale":         ["Precio"],
+    "Eze":         ["Precio"],
+    "Di":          ["Precio"],
+    "10%":         ["Ganancia"],
+    "5%":          ["Ganancia"],
+    "Bajo Precio": ["Precio Mínimo"],
+}
+
+
+def build_costos(sheets: dict) -> pd.DataFrame:
+    """Une las hojas de proveedores en un solo DataFrame Marca/Modelo/Proveedor/Costo USD."""
+    costos_list = []
+    for prov in PROVEEDORES:
+        dfp = sheets[prov]
+        price_col = next(c for c in dfp.columns if "precio" in c.lower())
+        dfp = dfp.rename(columns={price_col: "Costo USD"})
+        dfp["Costo USD"] = pd.to_numeric(dfp["Costo USD"], errors="coerce").fillna(0)
+        dfp["Proveedor"] = prov
+        costos_list.append(dfp[["Marca", "Modelo", "Proveedor", "Costo USD"]])
+    return pd.concat(costos_list, ignore_index=True)
+
+
+def read_workbook(path: Path = config.CATALOGO_PATH) -> dict:
+    """Parsea todas las hojas del catálogo con openpyxl (un solo read_excel)."""
+    sheets = pd.read_excel(path, sheet_name=HOJAS_CATALOGO)
+    return {name: df.rename(columns=str.strip) for name, df in sheets.items()}
+
+
+# ===================== SNAPSHOT COLUMNAR =====================
+def snapshot_dir(path: Path = config.CATALOGO_PATH) -> Path:
+    return config.CACHE_DIR / f"{Path(path).stem}.snapshot"
+
+
+def source_key(path: Path = config.CATALOGO_PATH) -> str:
+    """Identifica la versión del Excel (mtime_ns:tamaño)."""
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _normalize(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tipos de una hoja, iguales con o sin snapshot: numéricas en float64 y
+    columnas de tipos mezclados (Modelo = [13, "IPHONE 14"]) como texto,
+    que Arrow no puede guardar de otra forma.
+    """
+    df = df.copy()
+    numericas = [c for c in _NUMERIC_COLS.get(name, []) if c in df.columns]
+    for col in numericas:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in df.columns:
+        if col not in numericas and df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def compile_snapshot(path: Path = config.CATALOGO_PATH, sheets: dict | None = None) -> Path:
+    """
+    Convierte el Excel en un snapshot Arrow (una tabla por hoja + costos unidos).
+    Se escribe en un directorio temporal y se renombra al final, así un lector
+    nunca ve un snapshot a medio escribir.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    source = source_key(path)
+    if sheets is None:
+        sheets = read_workbook(path)
+    tables = {name: _normalize(name, df) for name, df in sheets.items()}
+    tables[TABLA_COSTOS] = build_costos(tables)
+
+    dest = snapshot_dir(path)
+    tmp  = dest.with_name(f"{dest.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        for i, (name, df) in enumerate(tables.items()):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                   b"sheet": name.encode("utf-8")})
+            with pa.OSFile(str(tmp / f"{i:02d}.arrow"), "wb") as sink:
+                with ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        (tmp / "SOURCE").write_text(source, encoding="utf-8")
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    old = dest.with_name(f"{dest.name}.old{os.getpid()}")
+    if dest.exists():
+        dest.rename(old)
+    tmp.rename(dest)
+    shutil.rmtree(old, ignore_errors=True)
+    return dest
+
+
+def snapshot_is_fresh(path: Path = config.CATALOGO_PATH) -> bool:
+    """El snapshot sirve solo si fue compilado desde esta misma versión del Excel."""
+    try:
+        compiled = (snapshot_dir(path) / "SOURCE").read_text(encoding="utf-8")
+        return compiled == source_key(path)
+    except FileNotFoundError:
+        return False
+
+
+def load_snapshot(path: Path = config.CATALOGO_PATH) -> dict | None:
+    """
+    Carga el snapshot con memory mapping si está al día con el Excel.
+    Devuelve {hoja: DataFrame} (incluye TABLA_COSTOS) o None si no sirve.
+    """
+    if not snapshot_is_fresh(path):
+        return None
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+    except ImportError:
+        return None
+
+    tables = {}
+    try:
+        for file in sorted(snapshot_dir(path).glob("*.arrow")):
+            with pa.memory_map(str(file), "r") as source:
+                table = ipc.open_file(source).read_all()
+            name = table.schema.metadata[b"sheet"].decode("utf-8")
+            tables[name] = table.to_pandas()
+    except (OSError, KeyError, pa.ArrowInvalid):
+        return None
+    if not all(name in tables for name in (*HOJAS_CATALOGO, TABLA_COSTOS)):
+        return None
+    return tables
+
+
+# ===================== TIPOS COMPACTOS =====================
+# Columnas de texto repetido: se guardan como categóricas con un diccionario
+# único para todas las hojas (y para costos), así "==" compara códigos enteros
+# y dos hojas se unen/concatenan sin volver a texto.
+DIMENSIONES = ("Marca", "Modelo", "Proveedor", "Color")
+
+
+def _dimension(col: str) -> str | None:
+    if col in DIMENSIONES:
+        return col
+    return "Color" if "color" in col.lower() else None  # "Color", "Colores", "COLOR"...
+
+
+def _precio_compacto(serie: pd.Series) -> pd.Series:
+    """float32 si representa exacto todos los valores (p. ej. dólares enteros), si no float64."""
+    serie = pd.to_numeric(serie, errors="coerce").astype("float64")
+    f32 = serie.astype("float32")
+    exacto = np.array_equal(f32.to_numpy(dtype="float64"), serie.to_numpy(), equal_nan=True)
+    return f32 if exacto else serie
+
+
+def compactar(sheets: dict, costos_df: pd.DataFrame) -> tuple[dict, pd.DataFrame]:
+    """
+    Devuelve copias de las hojas y de costos con Marca/Modelo/Proveedor/Color
+    categóricos (un CategoricalDtype compartido por dimensión). Solo costos,
+    que es de solo lectura, pasa a float32 cuando no se pierde precisión: las
+    hojas se editan y se vuelven a escribir al Excel (ingesta.aplicar) y un
+    precio nuevo en float32 se guardaría redondeado (485.37 -> 485.369995).
+    Se hace una vez por versión.
+    """
+    frames = {**sheets, TABLA_COSTOS: costos_df}
+    valores = {}
+    for df in frames.values():
+        for col in df.columns:
+            dim = _dimension(col)
+            if dim and df[col].dtype != "category":
+                valores.setdefault(dim, []).append(df[col].dropna().astype(object))
+    tipos = {dim: pd.CategoricalDtype(pd.unique(pd.concat(partes, ignore_index=True)))
+             for dim, partes in valores.items()}
+
+    out = {}
+    for name, df in frames.items():
+        cambios = {col: df[col].astype(tipos[dim]) for col in df.columns
+                   if (dim := _dimension(col)) in tipos}
+        if name == TABLA_COSTOS:
+            cambios["Costo USD"] = _precio_compacto(df["Costo USD"])
+        out[name] = df.assign(**cambios)
+    costos = out.pop(TABLA_COSTOS)
+    return out, costos
+
+
+if __name__ == "__main__":
+    xlsx = Path(sys.argv[1]) if len(sys.argv) > 1 else config.CATALOGO_PATH
+    out  = compile_snapshot(xlsx)
+    print(f"Snapshot compilado: {out}")
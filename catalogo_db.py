@@ -0,0 +1,294 @@
+# catalogo_db.py
+"""
+Backend opcional del catálogo en SQLite (se activa con
+DRB_CATALOGO_BACKEND=sqlite).
+
+Importa Proveedores.xlsx (hojas originales, costos unidos y tablas de
+margen, ver margenes.py) a una base local en config.CACHE_DIR, con índices sobre
+(Marca, Modelo) y Proveedor y una tabla FTS5 (tokenizer trigram) para el
+buscador. Todos los workers comparten el mismo archivo, así que la memoria
+de cada proceso no crece con el catálogo: las consultas traen solo las filas
+que necesita cada rerun.
+
+Las tablas se exponen con la misma interfaz que busqueda.TablaMemoria
+(buscar / filas / columns), y las consultas van parametrizadas sobre un
+pool de conexiones (sqlite3 reutiliza los statements preparados por conexión).
+
+Uso:  python catalogo_db.py [ruta.xlsx]   # importa / reconstruye la base
+"""
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+import catalogo
+import config
+import margenes
+from busqueda import lookup_key, normalize, similitud
+
+DB_PATH = config.CACHE_DIR / "catalogo.sqlite"
+
+TABLA_COSTOS  = "costos"
+TABLA_RESUMEN = "resumen"
+TABLA_PRECIOS = {"10%": "precios_10", "5%": "precios_5", "Bajo Precio": "precios_bajo"}
+FTS_PRECIOS   = "fts_precios"
+FTS_RESUMEN   = "fts_resumen"
+
+POOL_SIZE  = 4
+_KEY_COLS  = ("k_marca", "k_modelo")
+_SPLIT_RE  = re.compile(r"\s+")
+
+
+def _slug(nombre: str) -> str:
+    return "hoja_" + re.sub(r"[^0-9a-z]+", "_", normalize(nombre).lower()).strip("_")
+
+
+def _con_claves(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    claves = [lookup_key(ma, mo) for ma, mo in zip(df["Marca"].tolist(), df["Modelo"].tolist())]
+    df["k_marca"]  = [k[0] for k in claves]
+    df["k_modelo"] = [k[1] for k in claves]
+    return df
+
+
+def _source(xlsx: Path) -> str:
+    # Versión del Excel y de dónde salen los márgenes: cambiar DRB_MARGENES reimporta
+    return f"{catalogo.source_key(xlsx)}:{margenes.FUENTE}"
+
+
+def _crear_fts(conn, fts: str, tabla: str, df: pd.DataFrame) -> None:
+    conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5(texto, tokenize='trigram')")
+    textos = (f"{normalize(ma)} {normalize(mo)}" for ma, mo in zip(df["Marca"], df["Modelo"]))
+    conn.executemany(f"INSERT INTO {fts} (rowid, texto) VALUES (?, ?)",
+                     ((i + 1, t) for i, t in enumerate(textos)))
+
+
+def importar(xlsx: Path = config.CATALOGO_PATH, db: Path = DB_PATH) -> Path:
+    """
+    Reconstruye la base completa desde el Excel. Se arma en un archivo
+    temporal y se reemplaza atómicamente: los lectores ven la base vieja o
+    la nueva, nunca una a medias.
+    """
+    source = _source(xlsx)
+    sheets = catalogo.read_workbook(xlsx)
+    tablas = {_slug(n): df for n, df in sheets.items()}
+    tablas[TABLA_COSTOS]  = catalogo.build_costos(sheets)
+    tablas[TABLA_RESUMEN] = sheets[catalogo.HOJA_RESUMEN]
+    for margen, df in margenes.build_margin_tables(sheets).items():
+        tablas[TABLA_PRECIOS[margen]] = df
+
+    db = Path(db)
+    db.parent.mkdir(parents=True, exist_ok=True)
+    tmp = db.with_name(f"{db.name}.tmp{os.getpid()}")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(tmp))
+    try:
+        for nombre, df in tablas.items():
+            df = _con_claves(df)
+            df.index = pd.RangeIndex(1, len(df) + 1, name="rowid")
+            df.to_sql(nombre, conn, index=True)
+            conn.execute(f'CREATE INDEX ix_{nombre}_mm ON {nombre} ("Marca", "Modelo")')
+            conn.execute(f"CREATE INDEX ix_{nombre}_k ON {nombre} (k_marca, k_modelo)")
+            if "Proveedor" in df.columns:
+                conn.execute(f'CREATE INDEX ix_{nombre}_prov ON {nombre} ("Proveedor")')
+        # Todas las tablas de margen comparten filas: un solo índice FTS para las tres
+        _crear_fts(conn, FTS_PRECIOS, TABLA_PRECIOS["10%"], tablas[TABLA_PRECIOS["10%"]])
+        _crear_fts(conn, FTS_RESUMEN, TABLA_RESUMEN, tablas[TABLA_RESUMEN])
+        conn.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('source', ?)", (source,))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, db)
+    return db
+
+
+def version_db(db: Path = DB_PATH) -> str | None:
+    try:
+        conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        row = conn.execute("SELECT valor FROM meta WHERE clave='source'").fetchone()
+        return row[0] if row else None
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+
+
+# ===================== POOL DE CONEXIONES =====================
+class Pool:
+    """Pool chico de conexiones de solo lectura, compartido por los threads del proceso."""
+
+    def __init__(self, path: Path, size: int = POOL_SIZE):
+        self.path    = Path(path)
+        self._idle   = queue.LifoQueue(maxsize=size)
+        self.cerrado = False
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True,
+                               check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA query_only=1")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            if self.cerrado:
+                conn.close()  # el pool rotó mientras estaba en uso
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            if self.cerrado:
+                self._vaciar()  # por si volvió justo mientras se cerraba
+
+    def _vaciar(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def close(self) -> None:
+        """
+        Cierra las conexiones libres; las que están en uso se cierran al
+        devolverse. Un rerun que todavía tiene una tabla de la versión vieja
+        puede seguir consultando: cada conexión se abre y se cierra al salir.
+        """
+        self.cerrado = True
+        self._vaciar()
+
+
+_STATE = {"source": None, "pool": None}
+_LOCK  = threading.Lock()
+
+
+def pool(xlsx: Path = config.CATALOGO_PATH, db: Path = DB_PATH) -> Pool:
+    """
+    Pool sobre la base al día con el Excel. Si el Excel cambió, reimporta
+    (o toma la base que ya reimportó otro proceso) y rota el pool.
+    """
+    source = _source(xlsx)
+    with _LOCK:
+        if _STATE["source"] != source:
+            if version_db(db) != source:
+                importar(xlsx, db)
+            if _STATE["pool"] is not None:
+                _STATE["pool"].close()
+            _STATE.update(source=source, pool=Pool(db))
+        return _STATE["pool"]
+
+
+# ===================== TABLAS =====================
+def _like(word: str) -> str:
+    return "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _rows_to_df(cur) -> pd.DataFrame:
+    cols = [d[0] for d in cur.description]
+    df = pd.DataFrame.from_records(cur.fetchall(), columns=cols)
+    return df.drop(columns=[c for c in ("rowid", *_KEY_COLS) if c in df.columns])
+
+
+class TablaSQLite:
+    """Tabla del catálogo en SQLite con la interfaz de busqueda.TablaMemoria."""
+
+    SUGERENCIAS = 10
+
+    def __init__(self, tabla: str, fts: str | None = None, pool_: Pool | None = None):
+        self.tabla = tabla
+        self.fts   = fts
+        self._pool = pool_
+        with self.pool().connection() as conn:
+            cur = conn.execute(f"SELECT * FROM {tabla} LIMIT 0")
+            self._columns = [d[0] for d in cur.description
+                             if d[0] not in ("rowid", *_KEY_COLS)]
+
+    def pool(self) -> Pool:
+        """El pool de la versión con que se creó la tabla o, si no se pasó, el al día con el Excel."""
+        return self._pool if self._pool is not None else pool()
+
+    @property
+    def columns(self):
+        return pd.Index(self._columns)
+
+    def buscar(self, busq: str):
+        words = [w for w in _SPLIT_RE.split(normalize(busq)) if w]
+        with self.pool().connection() as conn:
+            if not words or self.fts is None:
+                cur = conn.execute(f'SELECT "Marca", "Modelo" FROM {self.tabla} ORDER BY rowid')
+                return _rows_to_df(cur), []
+            cond = " AND ".join("f.texto LIKE ? ESCAPE '\\'" for _ in words)
+            cur = conn.execute(
+                f'SELECT t."Marca", t."Modelo" FROM {self.tabla} t '
+                f"JOIN {self.fts} f ON f.rowid = t.rowid WHERE {cond} ORDER BY t.rowid",
+                [_like(w) for w in words],
+            )
+            df = _rows_to_df(cur)
+            if not df.empty:
+                return df, []
+            return self._sugerencias(conn, busq)
+
+    def _sugerencias(self, conn, busq: str):
+        """Candidatos por trigramas en común (bm25) re-ordenados con busqueda.similitud."""
+        compact = normalize(busq).replace(" ", "")
+        grams = {compact[i:i + 3] for i in range(len(compact) - 2)}
+        if len(grams) < 2:
+            return pd.DataFrame(columns=["Marca", "Modelo"]), []
+        match = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+        cur = conn.execute(
+            f"SELECT rowid, texto FROM {self.fts} WHERE {self.fts} MATCH ? ORDER BY rank LIMIT 50",
+            (match,),
+        )
+        scored = sorted(((similitud(busq, texto), -rowid, rowid, texto) for rowid, texto in cur),
+                        reverse=True)
+        top = [(rowid, texto, score) for score, _, rowid, texto in scored[:self.SUGERENCIAS]
+               if score >= 0.3]
+        if not top:
+            return pd.DataFrame(columns=["Marca", "Modelo"]), []
+        marks = ",".join("?" for _ in top)
+        cur = conn.execute(f'SELECT rowid, "Marca", "Modelo" FROM {self.tabla} WHERE rowid IN ({marks})',
+                           [r for r, _, _ in top])
+        by_id = {r[0]: r[1:] for r in cur}
+        df = pd.DataFrame([by_id[r] for r, _, _ in top if r in by_id], columns=["Marca", "Modelo"])
+        return df, [(texto, score) for _, texto, score in top]
+
+    def filas(self, marca, modelo) -> pd.DataFrame:
+        with self.pool().connection() as conn:
+            cur = conn.execute(
+                f"SELECT * FROM {self.tabla} WHERE k_marca = ? AND k_modelo = ? ORDER BY rowid",
+                lookup_key(marca, modelo),
+            )
+            return _rows_to_df(cur)
+
+
+def tabla_precios(margen: str, pool_: Pool | None = None) -> TablaSQLite:
+    return TablaSQLite(TABLA_PRECIOS[margen], FTS_PRECIOS, pool_)
+
+
+def tabla_costos(pool_: Pool | None = None) -> TablaSQLite:
+    return TablaSQLite(TABLA_COSTOS, pool_=pool_)
+
+
+def tabla_resumen(pool_: Pool | None = None) -> TablaSQLite:
+    return TablaSQLite(TABLA_RESUMEN, FTS_RESUMEN, pool_)
+
+
+if __name__ == "__main__":
+    xlsx = Path(sys.argv[1]) if len(sys.argv) > 1 else config.CATALOGO_PATH
+    print(f"Catálogo importado en {importar(xlsx)}")
@@ -11,6 +11,18 @@ PEDIDOS_DIR.mkdir(exist_ok=True)
 # Nombre del archivo de pedidos (para cuando quieras grabar en el futuro)
 PEDIDOS_FILE = PEDIDOS_DIR / "Pedidos.xlsx"
 
+# Journal append-only de pedidos (SQLite); Pedidos.xlsx se exporta desde acá
+PEDIDOS_DB = PEDIDOS_DIR / "pedidos.sqlite"
+
+# Carpeta para archivos derivados del catálogo (snapshot compilado, etc.)
+CACHE_DIR = PEDIDOS_DIR / "cache"
+
+# Log de rendimiento (JSON lines, uno por rerun) cuando DRB_PERF=1; ver perf.py
+PERF_LOG = PEDIDOS_DIR / "perf.jsonl"
+
+# Cotización del dólar blue (JSON {"venta": ...}) que lee cotizacion.FuenteArchivo
+COTIZACION_FILE = PEDIDOS_DIR / "dolar_blue.json"
+
 # Encabezados que usa run_pedidos()
 HEADERS_PEDIDOS = [
     "Estado",
@@ -0,0 +1,191 @@
+# cotizacion.py
+"""
+Cotización del dólar blue compartida por todas las sesiones (sin Streamlit).
+
+Un Cotizador guarda el último valor en memoria del proceso: leerlo es
+instantáneo. Cuando pasa el TTL, la próxima lectura devuelve el valor que
+ya tiene y dispara la actualización en un hilo aparte (nunca bloquea un
+rerun, ni siquiera la primera vez: hasta que llega devuelve None). Si la
+fuente falla, se sigue usando el último valor bueno.
+
+La fuente es enchufable: cualquier callable sin argumentos que devuelva el
+valor (float). Vienen dos:
+  - FuenteArchivo: un JSON {"venta": 1234.5, ...} o un número suelto en un
+    archivo local (config.COTIZACION_FILE por defecto),
+  - FuenteHTTP: un endpoint JSON (DRB_COTIZACION_URL), p. ej. un servicio
+    local o un stand-in en pruebas.
+
+Uso:  python cotizacion.py [valor]   # muestra la cotización o la guarda en el archivo
+"""
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+TTL_SEGUNDOS = 300
+CAMPO        = "venta"
+
+
+@dataclass(frozen=True)
+class Cotizacion:
+    valor:   float
+    fecha:   datetime  # cuándo se obtuvo
+    origen:  str
+
+
+# ===================== FUENTES =====================
+def _valor_de(data, campo: str) -> float:
+    if isinstance(data, dict):
+        data = data[campo]
+    valor = float(data)
+    if valor <= 0:
+        raise ValueError(f"Cotización inválida: {valor}")
+    return valor
+
+
+class FuenteArchivo:
+    """JSON {"venta": ...} o un número suelto en un archivo local."""
+
+    def __init__(self, path: Path = config.COTIZACION_FILE, campo: str = CAMPO):
+        self.path  = Path(path)
+        self.campo = campo
+
+    def __call__(self) -> float:
+        text = self.path.read_text(encoding="utf-8").strip()
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = text.replace(",", ".")
+        return _valor_de(data, self.campo)
+
+    def __str__(self):
+        return f"archivo {self.path.name}"
+
+
+class FuenteHTTP:
+    """Endpoint JSON con el campo `campo` (por defecto "venta")."""
+
+    def __init__(self, url: str, campo: str = CAMPO, timeout: float = 3.0):
+        self.url     = url
+        self.campo   = campo
+        self.timeout = timeout
+
+    def __call__(self) -> float:
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as resp:
+            return _valor_de(json.load(resp), self.campo)
+
+    def __str__(self):
+        return self.url
+
+
+# ===================== CACHÉ =====================
+class Cotizador:
+    """Último valor en memoria + refresco en segundo plano cuando vence el TTL."""
+
+    def __init__(self, fuente, ttl: float = TTL_SEGUNDOS):
+        self.fuente = fuente
+        self.ttl    = ttl
+        self.error  = None
+        self._actual     = None
+        self._vence      = 0.0
+        self._lock       = threading.Lock()
+        self._refrescando = False
+
+    def _refrescar(self) -> None:
+        try:
+            valor = self.fuente()
+        except Exception as exc:  # noqa: BLE001 - red, archivo, JSON...: se conserva el último valor
+            self.error = f"{type(exc).__name__}: {exc}"
+            valor = None
+        with self._lock:
+            if valor is not None:
+                self._actual = Cotizacion(valor, datetime.now(), str(self.fuente))
+                self.error = None
+            # Si falló, se reintenta recién en el próximo TTL (no en cada rerun)
+            self._vence = time.monotonic() + self.ttl
+            self._refrescando = False
+
+    def actual(self) -> Cotizacion | None:
+        """
+        Cotización en caché, o None si todavía no llegó la primera (o nunca se
+        pudo obtener). Nunca bloquea: la consulta a la fuente, también la
+        primera, corre en un hilo aparte.
+        """
+        with self._lock:
+            lanzar = time.monotonic() >= self._vence and not self._refrescando
+            if lanzar:
+                self._refrescando = True
+        if lanzar:
+            threading.Thread(target=self._refrescar, name="cotizacion", daemon=True).start()
+        return self._actual
+
+    @property
+    def refrescando(self) -> bool:
+        return self._refrescando
+
+    def forzar(self) -> Cotizacion | None:
+        """Consulta la fuente ahora mismo (botón "actualizar")."""
+        with self._lock:
+            self._refrescando = True
+        self._refrescar()
+        return self._actual
+
+
+def fuente_configurada():
+    url = os.environ.get("DRB_COTIZACION_URL", "").strip()
+    return FuenteHTTP(url) if url else FuenteArchivo()
+
+
+_COTIZADOR = {"obj": None}
+_COTIZADOR_LOCK = threading.Lock()
+
+
+def cotizador() -> Cotizador:
+    """Cotizador del proceso (compartido por todas las sesiones)."""
+    with _COTIZADOR_LOCK:
+        if _COTIZADOR["obj"] is None:
+            ttl = float(os.environ.get("DRB_COTIZACION_TTL", TTL_SEGUNDOS))
+            _COTIZADOR["obj"] = Cotizador(fuente_configurada(), ttl)
+        return _COTIZADOR["obj"]
+
+
+def guardar(valor: float, path: Path = config.COTIZACION_FILE) -> None:
+    """Escribe la cotización en el archivo local (lo que lee FuenteArchivo)."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({CAMPO: float(valor), "fecha": datetime.now().isoformat(timespec="seconds")}),
+                   encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ===================== CONVERSIÓN =====================
+def usd_a_ars(usd, blue: float):
+    """Montos USD (escalar, lista, Series o array) a pesos redondeados, en una sola operación."""
+    import numpy as np
+
+    ars = np.rint(np.asarray(usd, dtype=float) * blue)
+    return ars if ars.ndim else float(ars)
+
+
+def tabla_en_ars(df, blue: float, columnas=("Final USD",)):
+    """Copia liviana de `df` con una columna "... ARS" por cada columna USD."""
+    out = df.copy(deep=False)
+    for col in columnas:
+        out[col.replace("USD", "ARS")] = usd_a_ars(df[col].to_numpy(), blue)
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        guardar(float(sys.argv[1].replace(",", ".")))
+        print(f"Cotización guardada en {config.COTIZACION_FILE}")
+    cot = cotizador().forzar()
+    print(f"Blue: {cot.valor:,.2f} ({cot.origen}, {cot.fecha:%d/%m %H:%M})" if cot
+          else f"Sin cotización: {cotizador().error}")
@@ -0,0 +1,338 @@
+# ingesta.py
+"""
+Carga de listas de proveedores a las hojas de costos (sin Streamlit).
+
+Toma el texto de WhatsApp de un proveedor, detecta el precio de cada línea
+con los mismos regex de la solapa Listados y arma filas (Marca, Modelo,
+Variante, Costo USD). Los modelos se reconocen contra el catálogo con un
+índice de tokens precalculado: cada línea consulta solo las filas que
+comparten algún token, sin comparar contra todo el catálogo.
+
+El resultado es un diff contra la hoja del proveedor (Nuevo / Cambia / Igual
+/ Sin match) que se puede aplicar a la hoja y escribir en Proveedores.xlsx,
+junto con la columna del proveedor en la hoja Resumen.
+
+Uso:  python ingesta.py Eze lista.txt [--umbral 100] [--csv diff.csv] [--escribir]
+"""
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+import config
+from busqueda import build_lookup, lookup_key, normalize
+from listados import _L_NUM, BARE_NUMBER_AT_END_RE, PRICE_TOKEN_RE, _parse_number_general
+
+UMBRAL_PELADO = 100.0  # sin símbolo, un número final menor no es precio ("IPHONE 13")
+
+COLUMNAS_DIFF = ["Estado", "Marca", "Modelo", "Variante", "Costo USD", "Costo anterior", "Línea"]
+
+_CAPACIDAD_RE = re.compile(r"(\d+)\s*(GB|TB)\b")
+_RAM_ROM_RE   = re.compile(r"(\d+)\s*/\s*(\d+)(?:GB)?\b")
+_TOKEN_RE     = re.compile(r"\d+/\d+|[0-9A-Z]+(?:[+.][0-9A-Z]+)*\+?")
+_SEPARADORES  = set("-–|,/")
+# Moneda adelante ("USD 720", "💲 235"): se prefiere a "256 💲", que también matchea PRICE_TOKEN_RE
+_PREFIJO_RE   = re.compile(rf"(?:USD|US\$D|US\$|U\$S|U\$D|USS|\$|💲)\s*(?P<num>{_L_NUM})",
+                           re.IGNORECASE | re.VERBOSE)
+# Tokens del Modelo que los proveedores suelen omitir: no hacen falta para matchear
+OPCIONALES = frozenset({"5G", "4G", "LTE"})
+
+
+def _canonico(text) -> str:
+    """Texto normalizado con capacidades unificadas: '12 / 256 GB' -> '12/256', '128 GB' -> '128GB'."""
+    text = _CAPACIDAD_RE.sub(r"\1\2", normalize(text))
+    return _RAM_ROM_RE.sub(r"\1/\2", text)
+
+
+def tokens(text) -> list:
+    return _TOKEN_RE.findall(_canonico(text))
+
+
+def _tokens_con_span(text) -> tuple[str, list]:
+    canon = _canonico(text)
+    return canon, [(m.group(), m.start(), m.end()) for m in _TOKEN_RE.finditer(canon)]
+
+
+# ===================== PRECIOS DE CADA LÍNEA =====================
+def extraer_precio(line: str, umbral: float = UMBRAL_PELADO):
+    """
+    (costo, descripción sin el precio) o None si la línea no tiene precio.
+    Con varios precios en la línea se toma el último con la moneda adelante.
+    """
+    m = None
+    for m in _PREFIJO_RE.finditer(line):
+        pass
+    if m is None:
+        m = PRICE_TOKEN_RE.search(line)
+    pelado = m is None
+    if m is not None:
+        num = m.group("num") if m.re is _PREFIJO_RE else m.group("num1") or m.group("num2")
+    else:
+        m = BARE_NUMBER_AT_END_RE.search(line)
+        if not m:
+            return None
+        num = m.group(1)
+    try:
+        costo = _parse_number_general(num)
+    except ValueError:
+        return None
+    if pelado and costo < umbral:
+        return None
+    return costo, (line[:m.start()] + " " + line[m.end():]).strip()
+
+
+# ===================== ÍNDICE DE MODELOS =====================
+class IndiceModelos:
+    """
+    Índice token -> filas del catálogo. Una línea matchea una fila si contiene
+    todos los tokens del Modelo (salvo OPCIONALES); entre varias, gana la más
+    específica y, a igualdad, la que no necesitó omitir nada.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.marcas  = df["Marca"].tolist()
+        self.modelos = df["Modelo"].tolist()
+        self._tokens = [frozenset(tokens(m)) for m in self.modelos]
+        self._marca  = [frozenset(tokens(m)) for m in self.marcas]
+        self._requeridos = [len(t - OPCIONALES) for t in self._tokens]
+        self._postings = {}
+        for pos, toks in enumerate(self._tokens):
+            for tok in toks - OPCIONALES:
+                self._postings.setdefault(tok, []).append(pos)
+        # Tokens que aparecen en algún Modelo: si sobran en la línea, es otro modelo
+        self._vocabulario = frozenset().union(*self._tokens)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        df = df[df["Marca"].notna() & df["Modelo"].notna()]
+        return cls(df.drop_duplicates(["Marca", "Modelo"]))
+
+    def match(self, descripcion: str):
+        """(posición, variante) o None; la variante es lo que sobra (color, detalle)."""
+        canon, spans = _tokens_con_span(descripcion)
+        presentes = {tok for tok, _, _ in spans}
+        cuenta = Counter()
+        for tok in presentes:
+            cuenta.update(self._postings.get(tok, ()))
+        completos = [pos for pos, n in cuenta.items() if n == self._requeridos[pos]]
+        if not completos:
+            return None
+        mejor = max(completos, key=lambda p: (self._requeridos[p],
+                                              self._tokens[p] <= presentes,
+                                              bool(self._marca[p] & presentes), -p))
+        usados = self._tokens[mejor] | self._marca[mejor]
+        sobrantes = [sp for sp in spans if sp[0] not in usados]
+        if any(tok in self._vocabulario for tok, _, _ in sobrantes):
+            return None  # p. ej. "IPHONE 13 PRO" contra "IPHONE 13": no es el mismo
+        return mejor, _variante(canon, spans, sobrantes)
+
+
+def _variante(canon: str, spans: list, sobrantes: list) -> str:
+    """Tokens sobrantes en orden; separados por "/" si en la línea había un separador o el modelo en medio."""
+    if not sobrantes:
+        return ""
+    partes = [sobrantes[0][0]]
+    for (_, _, fin), (tok, ini, _) in zip(sobrantes, sobrantes[1:]):
+        hueco = canon[fin:ini]
+        corta = any(ch in _SEPARADORES for ch in hueco) or any(fin <= a < ini for _, a, _ in spans)
+        partes.append(("/" if corta else " ") + tok)
+    return "".join(partes)
+
+
+def parsear_lista(text: str, indice: IndiceModelos, umbral: float = UMBRAL_PELADO) -> pd.DataFrame:
+    """
+    Filas (Marca, Modelo, Variante, Costo USD, Línea) de las líneas con precio.
+    Marca/Modelo quedan vacíos (None) si la línea no matchea el catálogo.
+    """
+    filas = []
+    for line in text.splitlines():
+        line = line.strip()
+        hit = extraer_precio(line, umbral) if line else None
+        if hit is None:
+            continue
+        costo, desc = hit
+        m = indice.match(desc)
+        if m is None:
+            filas.append((None, None, "", costo, line))
+            continue
+        pos, variante = m
+        filas.append((indice.marcas[pos], indice.modelos[pos], variante, costo, line))
+    return pd.DataFrame(filas, columns=["Marca", "Modelo", "Variante", "Costo USD", "Línea"])
+
+
+# ===================== DIFF CONTRA LA HOJA =====================
+def _precio_col(columnas) -> str:
+    return next(c for c in columnas if "precio" in c.lower())
+
+
+def _color_col(columnas):
+    return next((c for c in columnas if "color" in c.lower()), None)
+
+
+def diff_costos(filas: pd.DataFrame, hoja: pd.DataFrame) -> pd.DataFrame:
+    """
+    Diff de la lista contra la hoja del proveedor, una fila por modelo
+    (si aparece varias veces se toma el costo más bajo y se juntan variantes):
+    Nuevo (no estaba en la hoja), Cambia, Igual y Sin match.
+    """
+    precios = pd.to_numeric(hoja[_precio_col(hoja.columns)], errors="coerce").tolist()
+    en_hoja = build_lookup(hoja)
+
+    matched = filas[filas["Modelo"].notna()]
+    out = []
+    for (marca, modelo), grupo in matched.groupby(["Marca", "Modelo"], sort=False, observed=True):
+        barata = grupo.loc[grupo["Costo USD"].idxmin()]
+        costo = float(barata["Costo USD"])
+        variantes = "/".join(dict.fromkeys(v for v in grupo["Variante"] if v))
+        pos = en_hoja.get(lookup_key(marca, modelo))
+        anterior = precios[pos[0]] if pos else None
+        if anterior is None:
+            estado = "Nuevo"
+        elif pd.isna(anterior) or abs(anterior - costo) > 1e-9:
+            estado = "Cambia"
+        else:
+            estado = "Igual"
+        out.append((estado, marca, modelo, variantes, costo, anterior, barata["Línea"]))
+    for _, r in filas[filas["Modelo"].isna()].iterrows():
+        out.append(("Sin match", None, None, "", r["Costo USD"], None, r["Línea"]))
+    return pd.DataFrame(out, columns=COLUMNAS_DIFF)
+
+
+def aplicar(hoja: pd.DataFrame, diff: pd.DataFrame) -> pd.DataFrame:
+    """Hoja del proveedor con los costos que cambian actualizados y los nuevos agregados al final."""
+    hoja = hoja.copy()
+    precio_col = _precio_col(hoja.columns)
+    color_col  = _color_col(hoja.columns)
+    # float64 siempre: un costo nuevo no puede perder decimales al escribirse
+    hoja[precio_col] = pd.to_numeric(hoja[precio_col], errors="coerce").astype("float64")
+    en_hoja    = build_lookup(hoja)
+
+    cambia = diff[diff["Estado"] == "Cambia"]
+    for marca, modelo, costo in zip(cambia["Marca"], cambia["Modelo"], cambia["Costo USD"]):
+        for pos in en_hoja.get(lookup_key(marca, modelo), []):
+            hoja.iloc[pos, hoja.columns.get_loc(precio_col)] = costo
+
+    nuevos = diff[diff["Estado"] == "Nuevo"]
+    if not nuevos.empty:
+        agregar = pd.DataFrame({"Marca": nuevos["Marca"], "Modelo": nuevos["Modelo"],
+                                precio_col: nuevos["Costo USD"]})
+        if "Moneda" in hoja.columns:
+            agregar["Moneda"] = "USD"
+        if color_col:
+            agregar[color_col] = nuevos["Variante"]
+        hoja = pd.concat([hoja, agregar[[c for c in hoja.columns if c in agregar.columns]]],
+                         ignore_index=True)
+    return hoja
+
+
+def _celda_costo(costo: float):
+    # Como lo cargan a mano: entero si no tiene decimales
+    costo = float(costo)
+    return int(costo) if costo.is_integer() else costo
+
+
+def _filas_hoja(ws, col_marca: int, col_modelo: int) -> dict:
+    """{(marca, modelo) normalizados: [filas de la hoja]} salteando las filas vacías."""
+    filas = {}
+    for fila in ws.iter_rows(min_row=2):
+        marca, modelo = fila[col_marca - 1].value, fila[col_modelo - 1].value
+        if marca is not None and modelo is not None:
+            filas.setdefault(lookup_key(marca, modelo), []).append(fila[0].row)
+    return filas
+
+
+def _columnas(ws) -> dict:
+    """Encabezado (fila 1) -> número de columna."""
+    return {c.value: c.column for c in ws[1] if c.value is not None}
+
+
+def escribir_diff(proveedor: str, diff: pd.DataFrame, path: Path = config.CATALOGO_PATH) -> None:
+    """
+    Aplica el diff sobre Proveedores.xlsx en el lugar: en la hoja del
+    proveedor cambia el costo de los modelos que Cambian y agrega los Nuevos
+    al final (con el formato de la última fila); en Resumen actualiza la
+    columna del proveedor. Anchos, formatos y el resto de las celdas quedan
+    como estaban.
+
+    Todo va en un solo guardado a un temporal que reemplaza al Excel: el
+    vigilante del catálogo nunca ve el archivo a medio escribir.
+    """
+    from copy import copy
+
+    from openpyxl import load_workbook
+
+    from catalogo import HOJA_RESUMEN
+
+    path = Path(path)
+    wb = load_workbook(path)
+    cambios = diff[diff["Estado"].isin(["Nuevo", "Cambia"])]
+    costos  = {lookup_key(ma, mo): _celda_costo(c)
+               for ma, mo, c in zip(cambios["Marca"], cambios["Modelo"], cambios["Costo USD"])}
+
+    ws = wb[proveedor]
+    cols = _columnas(ws)
+    precio_col = cols[_precio_col(cols)]
+    color_col  = _color_col(cols)
+    en_hoja = _filas_hoja(ws, cols["Marca"], cols["Modelo"])
+    for clave, filas in en_hoja.items():
+        if clave in costos:
+            for fila in filas:
+                ws.cell(fila, precio_col).value = costos[clave]
+
+    nuevos = diff[diff["Estado"] == "Nuevo"]
+    ultima = max((f for filas in en_hoja.values() for f in filas), default=1)
+    for marca, modelo, costo, variante in zip(nuevos["Marca"], nuevos["Modelo"],
+                                              nuevos["Costo USD"], nuevos["Variante"]):
+        if lookup_key(marca, modelo) in en_hoja:
+            continue
+        valores = {"Marca": marca, "Modelo": modelo, "Moneda": "USD", color_col: variante or None}
+        ultima += 1
+        for nombre, col in cols.items():
+            celda = ws.cell(ultima, col)
+            if ultima > 2:
+                celda._style = copy(ws.cell(ultima - 1, col)._style)
+            celda.value = _celda_costo(costo) if col == precio_col else valores.get(nombre)
+
+    ws = wb[HOJA_RESUMEN]
+    cols = _columnas(ws)
+    for clave, filas in _filas_hoja(ws, cols["Marca"], cols["Modelo"]).items():
+        if clave in costos:
+            for fila in filas:
+                ws.cell(fila, cols[proveedor]).value = costos[clave]
+
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.tmp.xlsx")
+    wb.save(tmp)
+    os.replace(tmp, path)
+
+
+def main(argv=None) -> int:
+    import catalogo
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("proveedor", choices=catalogo.PROVEEDORES)
+    ap.add_argument("lista", type=Path, help="texto del proveedor ('-' = stdin)")
+    ap.add_argument("--umbral", type=float, default=UMBRAL_PELADO, help="umbral de número pelado")
+    ap.add_argument("--csv", type=Path, help="guardar el diff en CSV")
+    ap.add_argument("--escribir", action="store_true", help="aplicar el diff a Proveedores.xlsx")
+    args = ap.parse_args(argv)
+
+    text   = sys.stdin.read() if str(args.lista) == "-" else args.lista.read_text(encoding="utf-8")
+    sheets = catalogo.read_workbook()
+    indice = IndiceModelos.from_frame(sheets[catalogo.HOJA_RESUMEN])
+    diff   = diff_costos(parsear_lista(text, indice, args.umbral), sheets[args.proveedor])
+
+    print(diff["Estado"].value_counts().to_string())
+    if args.csv:
+        diff.to_csv(args.csv, index=False)
+    if args.escribir:
+        escribir_diff(args.proveedor, diff)
+        print(f"Hojas {args.proveedor} y {catalogo.HOJA_RESUMEN} actualizadas en {config.CATALOGO_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,513 @@
+# listados.py
+"""
+Ajuste de precios de listas de proveedores (solapa "Listados"), sin Streamlit.
+
+Solo toca precios: detecta tokens con moneda (USD, US$, US$D, U$S, U$D, $, 💲)
+o un número pelado al final de la línea y los reemplaza por  *USD X.XXX* .
+Solo depende de la librería estándar (numpy se importa recién en el modo batch).
+
+Uso por línea de comandos (stdin -> stdout):
+    python listados.py --pct 10 --minimo 30 --multiplo 5 < lista.txt > ajustada.txt
+"""
+import argparse
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+# --- Regex y helpers del módulo de ajuste (versión minimalista que solo reemplaza precios) ---
+
+# Token numérico tolerante: 1.234 | 1,234 | 1200,50 | 1200.50 | 1 200
+_L_NUM = r"""
+    (?:
+        [0-9]{1,3}(?:[.,\s][0-9]{3})+(?:[.,][0-9]+)?   # miles con opcional decimales
+        |
+        [0-9]+(?:[.,][0-9]+)?                          # enteros/decimales simples
+    )
+"""
+
+# Monedas soportadas (incluye variantes pegadas): USD, US$, US$D, U$S, U$D, USS, $, 💲
+# Soporta: USD720, 720USD, US$ 720, U$D1390, $720, 💲 720, etc. y también *USD 720*
+PRICE_TOKEN_RE = re.compile(
+    rf"""
+    (?P<full>
+        \*?\s*
+        (?:
+            (?:(?P<cur1>USD|US\$D|US\$|U\$S|U\$D|USS|\$|💲))\s*(?P<num1>{_L_NUM})
+            |
+            (?P<num2>{_L_NUM})\s*(?P<cur2>USD|US\$D|US\$|U\$S|U\$D|USS|\$|💲)
+        )
+        \s*\*?
+    )
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+# Número pelado al FINAL de la línea (fallback si no hay símbolo)
+BARE_NUMBER_AT_END_RE = re.compile(
+    rf'(?<![A-Za-z])({_L_NUM})\s*$',
+    re.IGNORECASE | re.VERBOSE
+)
+
+def _parse_number_general(num_str: str) -> float:
+    """Convierte strings numéricos comunes en float, contemplando miles/decimales."""
+    s = num_str.strip().replace(' ', '')
+    has_comma = ',' in s
+    has_dot   = '.' in s
+    if has_comma and has_dot:
+        # El último separador encontrado decide decimal
+        if s.rfind(',') > s.rfind('.'):
+            s = s.replace('.', '')
+            s = s.replace(',', '.')
+        else:
+            s = s.replace(',', '')
+    elif has_comma and not has_dot:
+        parts = s.split(',')
+        if len(parts) >= 2 and all(len(p) == 3 for p in parts[1:]) and 1 <= len(parts[0]) <= 3:
+            s = ''.join(parts)           # 1,234 -> 1234
+        else:
+            s = s.replace(',', '.')      # 1200,50 -> 1200.50
+    elif has_dot and not has_comma:
+        parts = s.split('.')
+        if len(parts) >= 2 and all(len(p) == 3 for p in parts[1:]) and 1 <= len(parts[0]) <= 3:
+            s = ''.join(parts)           # 1.234 -> 1234
+    return float(s)
+
+def _round_up_to_base(x: float, base: int) -> int:
+    import math
+    if base <= 0:
+        base = 1
+    return int(math.ceil(x / base) * base)
+
+def _apply_rules_only_price(val: float, pct: float, min_inc_usd: float, base_mult: int) -> int:
+    inc_pct   = val * (pct / 100.0)
+    inc_final = max(inc_pct, float(min_inc_usd))
+    val_adj   = val + inc_final
+    return _round_up_to_base(val_adj, base=base_mult)
+
+def _fmt_usd_block(value_int: int) -> str:
+    """Formatea como  *USD X.XXX*  (punto de miles, sin decimales)."""
+    formatted = f"{value_int:,}".replace(",", ".")
+    return f" *USD {formatted}*"
+
+def _replace_symbol_prices(line: str, pct: float, min_inc_usd: float, base_mult: int) -> tuple[str, bool]:
+    """Reemplaza TODOS los tokens con símbolo/moneda por *USD X.XXX* sin tocar el resto del texto."""
+    changed = False
+
+    def _repl(m: re.Match) -> str:
+        nonlocal changed
+        num = m.group('num1') or m.group('num2')
+        try:
+            val = _parse_number_general(num)
+        except ValueError:
+            return m.group('full')  # no tocar si no parsea
+        changed = True
+        new_int = _apply_rules_only_price(val, pct, min_inc_usd, base_mult)
+        return _fmt_usd_block(new_int)
+
+    out = PRICE_TOKEN_RE.sub(_repl, line)
+    # Asegurar un solo espacio antes de *USD y compactar espacios
+    out = re.sub(r'\s*\*USD', ' *USD', out)
+    out = re.sub(r'\s{2,}', ' ', out).rstrip()
+    return out, changed
+
+def _replace_bare_trailing(line: str, pct: float, min_inc_usd: float, base_mult: int,
+                           bare_min_value: float) -> tuple[str, bool]:
+    """Si no había símbolo: reemplaza número pelado FINAL como precio (si supera umbral)."""
+    m = BARE_NUMBER_AT_END_RE.search(line)
+    if not m:
+        return line, False
+    num_str = m.group(1)
+    try:
+        val = _parse_number_general(num_str)
+    except ValueError:
+        return line, False
+    if val < float(bare_min_value):
+        return line, False
+    new_int = _apply_rules_only_price(val, pct, min_inc_usd, base_mult)
+    out = line[:m.start()] + _fmt_usd_block(new_int)
+    out = re.sub(r'\s*\*USD', ' *USD', out)
+    out = re.sub(r'\s{2,}', ' ', out).rstrip()
+    return out, True
+
+def _adjust_line_only_price(line: str, pct: float, min_inc_usd: float, base_mult: int,
+                            bare_min_value: float) -> tuple[str, bool]:
+    """
+    SOLO toca precios. No limpia emojis, no reordena texto.
+    1) Reemplaza TODOS los tokens con moneda (USD, US$, US$D, U$S, U$D, $, 💲) pegados o no.
+    2) Si no encontró, intenta con número pelado al final (si supera el umbral).
+    """
+    out, changed = _replace_symbol_prices(line, pct, min_inc_usd, base_mult)
+    if changed:
+        return out, True
+    return _replace_bare_trailing(out, pct, min_inc_usd, base_mult, bare_min_value)
+
+def _process_text_block_only_price(text: str, pct: float, min_inc_usd: float, base_mult: int,
+                                   only_changed: bool, bare_min_value: float) -> tuple[str, int]:
+    out_lines, changed_count = [], 0
+    for ln in text.splitlines():
+        new_ln, changed = _adjust_line_only_price(ln, pct, min_inc_usd, base_mult, bare_min_value)
+        if changed:
+            changed_count += 1
+            out_lines.append(new_ln)
+        else:
+            if not only_changed:
+                out_lines.append(ln)
+    return "\n".join(out_lines), changed_count
+
+# ===================== MODO BATCH (vectorizado) =====================
+# Mismo resultado byte a byte que _process_text_block_only_price, pero en vez
+# de ir línea por línea: une las líneas con un separador que ningún regex
+# puede cruzar (\x00 no es \s ni dígito), extrae todos los tokens en una sola
+# pasada, parsea cada número distinto una vez y aplica las reglas con numpy.
+
+_SEP = "\x00"
+
+# Igual que BARE_NUMBER_AT_END_RE, pero el "fin de línea" es el separador
+_BARE_AT_SEP_RE = re.compile(
+    rf'(?<![A-Za-z])({_L_NUM})\s*(?=\x00|\Z)',
+    re.IGNORECASE | re.VERBOSE
+)
+_USD_SPACE_RE   = re.compile(r'\s*\*USD')
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+_TRAILING_RE    = re.compile(r'\s+(?=\x00|\Z)')
+
+
+def _compact(joined: str) -> str:
+    """Las mismas 3 limpiezas que el modo por línea, aplicadas a todas las líneas juntas."""
+    out = _USD_SPACE_RE.sub(' *USD', joined)
+    out = _MULTI_SPACE_RE.sub(' ', out)
+    return _TRAILING_RE.sub('', out)
+
+
+def _parse_unique(nums: list) -> dict:
+    """Parsea cada string numérico distinto una sola vez (NaN si no parsea)."""
+    parsed = {}
+    for num in set(nums):
+        try:
+            parsed[num] = _parse_number_general(num)
+        except ValueError:
+            parsed[num] = float("nan")
+    return parsed
+
+
+def _apply_rules_vec(vals, pct: float, min_inc_usd: float, base_mult: int) -> list:
+    """_apply_rules_only_price sobre un array entero (mismas operaciones float, mismo orden)."""
+    import numpy as np
+
+    base = base_mult if base_mult > 0 else 1
+    inc_final = np.maximum(vals * (pct / 100.0), float(min_inc_usd))
+    steps = np.ceil((vals + inc_final) / base)
+    return [int(int(q) * base) for q in steps.tolist()]
+
+
+def _splice(joined: str, spans: list, replacements: list) -> str:
+    pieces, last = [], 0
+    for (start, end), rep in zip(spans, replacements):
+        pieces.append(joined[last:start])
+        pieces.append(rep)
+        last = end
+    pieces.append(joined[last:])
+    return "".join(pieces)
+
+
+def _adjust_lines_one_by_one(lines: list, pct: float, min_inc_usd: float, base_mult: int,
+                             bare_min_value: float) -> tuple[list, list]:
+    out_lines, changed = [], []
+    for ln in lines:
+        new_ln, ch = _adjust_line_only_price(ln, pct, min_inc_usd, base_mult, bare_min_value)
+        out_lines.append(new_ln if ch else ln)
+        changed.append(ch)
+    return out_lines, changed
+
+
+def _adjust_lines_batch(lines: list, pct: float, min_inc_usd: float, base_mult: int,
+                        bare_min_value: float) -> tuple[list, list]:
+    """
+    Ajusta una lista de líneas de una vez. Devuelve (líneas, cambió): cada
+    línea es la ajustada si cambió o la original si no.
+    """
+    import numpy as np
+
+    if not lines or any(_SEP in ln for ln in lines):
+        return _adjust_lines_one_by_one(lines, pct, min_inc_usd, base_mult, bare_min_value)
+    starts = np.cumsum([0] + [len(ln) + 1 for ln in lines[:-1]])
+    joined = _SEP.join(lines)
+
+    # 1) Tokens con moneda: una sola pasada sobre todo el bloque
+    matches = list(PRICE_TOKEN_RE.finditer(joined))
+    nums    = [m.group('num1') or m.group('num2') for m in matches]
+    parsed  = _parse_unique(nums)
+    vals    = np.array([parsed[n] for n in nums], dtype=float)
+    if not np.isfinite(vals[~np.isnan(vals)]).all():
+        # math.ceil(inf) falla en el modo por línea: que falle igual
+        return _adjust_lines_one_by_one(lines, pct, min_inc_usd, base_mult, bare_min_value)
+    ok       = ~np.isnan(vals)
+    new_ints = iter(_apply_rules_vec(vals[ok], pct, min_inc_usd, base_mult))
+    reps     = [_fmt_usd_block(next(new_ints)) if good else m.group('full')
+                for m, good in zip(matches, ok.tolist())]
+    changed  = np.zeros(len(lines), dtype=bool)
+    if matches:
+        token_line = np.searchsorted(starts, [m.start() for m in matches], side="right") - 1
+        changed[token_line[ok]] = True
+    out_lines = _compact(_splice(joined, [m.span() for m in matches], reps)).split(_SEP)
+
+    # 2) Número pelado al final, solo en las líneas sin tokens reemplazados
+    pending = np.flatnonzero(~changed).tolist()
+    if pending:
+        sub_lines  = [out_lines[i] for i in pending]
+        sub_joined = _SEP.join(sub_lines)
+        sub_starts = np.cumsum([0] + [len(ln) + 1 for ln in sub_lines[:-1]])
+        bare       = list(_BARE_AT_SEP_RE.finditer(sub_joined))
+        bare_nums  = [m.group(1) for m in bare]
+        parsed     = _parse_unique(bare_nums)
+        bare_vals  = np.array([parsed[n] for n in bare_nums], dtype=float)
+        with np.errstate(invalid="ignore"):
+            take = ~np.isnan(bare_vals) & ~(bare_vals < float(bare_min_value))
+        if np.isinf(bare_vals[take]).any():
+            return _adjust_lines_one_by_one(lines, pct, min_inc_usd, base_mult, bare_min_value)
+        bare_ints = iter(_apply_rules_vec(bare_vals[take], pct, min_inc_usd, base_mult))
+        bare_line = np.searchsorted(sub_starts, [m.start() for m in bare], side="right") - 1
+        fixed_idx, fixed = [], []
+        for m, li, good in zip(bare, bare_line.tolist(), take.tolist()):
+            if not good:
+                continue
+            line_start = int(sub_starts[li])
+            fixed_idx.append(pending[li])
+            fixed.append(sub_lines[li][:m.start() - line_start] + _fmt_usd_block(next(bare_ints)))
+        if fixed:
+            for i, ln in zip(fixed_idx, _compact(_SEP.join(fixed)).split(_SEP)):
+                out_lines[i] = ln
+            changed[fixed_idx] = True
+
+    changed_list = changed.tolist()
+    return [out if c else ln for out, ln, c in zip(out_lines, lines, changed_list)], changed_list
+
+
+def process_text_block_batch(text: str, pct: float, min_inc_usd: float, base_mult: int,
+                             only_changed: bool, bare_min_value: float) -> tuple[str, int]:
+    """Versión batch de _process_text_block_only_price (misma firma, misma salida)."""
+    lines, changed = _adjust_lines_batch(text.splitlines(), pct, min_inc_usd, base_mult,
+                                         bare_min_value)
+    if only_changed:
+        lines = [ln for ln, c in zip(lines, changed) if c]
+    return "\n".join(lines), sum(changed)
+
+
+
+# ===================== MODO MEMO (caché por línea) =====================
+# Para el texto pegado: el vendedor suele procesar la misma lista varias veces
+# cambiando los parámetros, o una lista casi igual a la de ayer. Dos cachés
+# del proceso (compartidas por todas las sesiones):
+#   - dónde están los precios de cada línea y cuánto valen (no depende de
+#     los parámetros): cambiar el % solo rehace la cuenta y el formato,
+#   - la línea ya ajustada para (línea, pct, mínimo, múltiplo, umbral).
+# Misma salida byte a byte que _process_text_block_only_price.
+
+LINEAS_CACHE     = 20_000  # entradas de cada caché (se descarta la menos usada)
+_HUECO           = "\x01"  # marca dónde va el número formateado (no es \s ni dígito)
+_SIN_PRECIO      = ((), (), False)
+
+
+class _LRU:
+    """Diccionario acotado: al llenarse descarta la entrada usada hace más tiempo."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._datos  = OrderedDict()
+        self._lock   = threading.Lock()
+
+    def get(self, clave, default=None):
+        with self._lock:
+            try:
+                self._datos.move_to_end(clave)
+            except KeyError:
+                return default
+            return self._datos[clave]
+
+    def put(self, clave, valor) -> None:
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            if len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+_LINEAS     = _LRU(LINEAS_CACHE)
+_POSICIONES = _LRU(LINEAS_CACHE)
+
+
+def _posiciones(line: str) -> tuple:
+    """
+    Precios de la línea, sin aplicar reglas: (partes, valores, pelado). La
+    línea ajustada es partes[0] + num(valores[0]) + partes[1] + ...; `pelado`
+    indica que el único valor es un número sin símbolo al final (sujeto al umbral).
+    """
+    valores = []
+
+    def _repl(m: re.Match) -> str:
+        try:
+            valores.append(_parse_number_general(m.group('num1') or m.group('num2')))
+        except ValueError:
+            return m.group('full')
+        return f" *USD {_HUECO}*"
+
+    out = PRICE_TOKEN_RE.sub(_repl, line)
+    out = _MULTI_SPACE_RE.sub(' ', _USD_SPACE_RE.sub(' *USD', out)).rstrip()
+    if valores:
+        return tuple(out.split(_HUECO)), tuple(valores), False
+
+    m = BARE_NUMBER_AT_END_RE.search(out)
+    if not m:
+        return _SIN_PRECIO
+    try:
+        val = _parse_number_general(m.group(1))
+    except ValueError:
+        return _SIN_PRECIO
+    out = out[:m.start()] + f" *USD {_HUECO}*"
+    out = _MULTI_SPACE_RE.sub(' ', _USD_SPACE_RE.sub(' *USD', out)).rstrip()
+    return tuple(out.split(_HUECO)), (val,), True
+
+
+def _aplicar(plan: tuple, pct: float, min_inc_usd: float, base_mult: int,
+             bare_min_value: float) -> str | None:
+    """Línea ajustada a partir de _posiciones(), o None si no hay precio que tocar."""
+    partes, valores, pelado = plan
+    if not valores or (pelado and valores[0] < float(bare_min_value)):
+        return None
+    piezas = [partes[0]]
+    for val, resto in zip(valores, partes[1:]):
+        piezas.append(f"{_apply_rules_only_price(val, pct, min_inc_usd, base_mult):,}".replace(",", "."))
+        piezas.append(resto)
+    return "".join(piezas)
+
+
+def adjust_lines_memo(lines: list, pct: float, min_inc_usd: float, base_mult: int,
+                      bare_min_value: float) -> tuple[list, list, dict]:
+    """
+    Como _adjust_lines_batch pero con las cachés del proceso. Devuelve
+    (líneas, cambió, stats) con stats = {"lineas", "aciertos", "recalculadas"}:
+    aciertos salen enteras de la caché, recalculadas solo rehacen la cuenta.
+    """
+    params = (pct, min_inc_usd, base_mult, bare_min_value)
+    out_lines, changed = [], []
+    aciertos = recalculadas = 0
+    for ln in lines:
+        res = _LINEAS.get((ln, *params))
+        if res is None:
+            if _HUECO in ln:
+                new_ln, ch = _adjust_line_only_price(ln, *params)
+                res = new_ln if ch else None, ch
+            else:
+                plan = _POSICIONES.get(ln)
+                if plan is None:
+                    plan = _posiciones(ln)
+                    _POSICIONES.put(ln, plan)
+                else:
+                    recalculadas += 1
+                new_ln = _aplicar(plan, *params)
+                res = new_ln, new_ln is not None
+            _LINEAS.put((ln, *params), res)
+        else:
+            aciertos += 1
+        out_lines.append(res[0] if res[1] else ln)
+        changed.append(res[1])
+    return out_lines, changed, {"lineas": len(lines), "aciertos": aciertos, "recalculadas": recalculadas}
+
+
+def process_text_block_memo(text: str, pct: float, min_inc_usd: float, base_mult: int,
+                            only_changed: bool, bare_min_value: float) -> tuple[str, int, dict]:
+    """Versión con caché de _process_text_block_only_price; además devuelve las stats."""
+    lines, changed, stats = adjust_lines_memo(text.splitlines(), pct, min_inc_usd, base_mult,
+                                              bare_min_value)
+    if only_changed:
+        lines = [ln for ln, c in zip(lines, changed) if c]
+    return "\n".join(lines), sum(changed), stats
+
+
+def limpiar_cache() -> None:
+    _LINEAS.clear()
+    _POSICIONES.clear()
+
+
+# ===================== MODO ARCHIVO (streaming) =====================
+STREAM_CHUNK_LINES = 5000
+
+
+def iter_adjusted_lines(lines, pct: float, min_inc_usd: float, base_mult: int,
+                        bare_min_value: float, chunk_lines: int = STREAM_CHUNK_LINES):
+    """
+    Generador: procesa un iterable de líneas (sin salto final) en bloques de
+    `chunk_lines` con el motor batch y produce (línea, cambió) de a una.
+    Nunca tiene más de un bloque en memoria.
+    """
+    chunk = []
+    for ln in lines:
+        chunk.append(ln)
+        if len(chunk) >= chunk_lines:
+            yield from zip(*_adjust_lines_batch(chunk, pct, min_inc_usd, base_mult, bare_min_value))
+            chunk = []
+    if chunk:
+        yield from zip(*_adjust_lines_batch(chunk, pct, min_inc_usd, base_mult, bare_min_value))
+
+
+def _iter_file_lines(src):
+    for ln in src:
+        yield ln[:-1] if ln.endswith("\n") else ln
+
+
+def process_file(src, dst, pct: float, min_inc_usd: float, base_mult: int,
+                 only_changed: bool, bare_min_value: float,
+                 preview_lines: int = 50) -> tuple[int, list]:
+    """
+    Lee `src` (archivo de texto) y escribe el resultado en `dst` a medida que
+    procesa, con el mismo formato que el modo texto (líneas unidas por "\\n").
+    Devuelve (líneas ajustadas, primeras `preview_lines` líneas ajustadas).
+    """
+    changed_count, preview, first = 0, [], True
+    for ln, changed in iter_adjusted_lines(_iter_file_lines(src), pct, min_inc_usd,
+                                           base_mult, bare_min_value):
+        if changed:
+            changed_count += 1
+            if len(preview) < preview_lines:
+                preview.append(ln)
+        elif only_changed:
+            continue
+        if not first:
+            dst.write("\n")
+        dst.write(ln)
+        first = False
+    return changed_count, preview
+
+
+# ===================== CLI =====================
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Ajusta los precios de una lista de proveedor (stdin -> stdout).")
+    ap.add_argument("--pct", type=float, default=10.0, help="porcentaje de aumento")
+    ap.add_argument("--minimo", type=float, default=30.0, help="mínimo de aumento por ítem (USD)")
+    ap.add_argument("--multiplo", type=int, default=5, help="múltiplo de redondeo")
+    ap.add_argument("--umbral", type=float, default=100.0,
+                    help="número pelado al final menor a esto no se toma como precio")
+    ap.add_argument("--solo-cambios", action="store_true", help="emitir solo las líneas ajustadas")
+    args = ap.parse_args(argv)
+
+    src = open(sys.stdin.fileno(), encoding="utf-8-sig", errors="replace", closefd=False)
+    dst = open(sys.stdout.fileno(), "w", encoding="utf-8", newline="", closefd=False,
+               buffering=1 << 16)
+    with src, dst:
+        cant, _ = process_file(src, dst, args.pct, min_inc_usd=args.minimo, base_mult=args.multiplo,
+                               only_changed=args.solo_cambios, bare_min_value=args.umbral,
+                               preview_lines=0)
+    print(f"{cant} línea(s) ajustada(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
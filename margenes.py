@@ -0,0 +1,164 @@
+# margenes.py
+"""
+Tablas de precios de venta por margen (10%, 5%, Bajo Precio), todas con las
+mismas filas en el mismo orden: cambiar de margen es elegir otra tabla.
+
+Se calculan desde las hojas de costos de los proveedores en una sola pasada
+vectorizada: para cada (Marca, Modelo) toma el proveedor más barato y aplica
+la misma regla que "Calcular y Agregar" (ganancia mínima 30 USD, redondeo
+a 5). Reemplaza a las hojas "10%", "5%" y "Bajo Precio" que se regeneraban
+a mano; con DRB_MARGENES=hojas se usan esas hojas (respaldo transitorio,
+por si hay que cotizar igual que antes).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from busqueda import lookup_key
+from catalogo import PROVEEDORES
+from listados import _parse_number_general
+from precios import GANANCIA_MINIMA_USD, MULTIPLO_REDONDEO
+
+# "calculado" (desde los costos) o "hojas" (las hojas de margen del Excel)
+FUENTE = os.environ.get("DRB_MARGENES", "calculado").strip().lower()
+
+# Margen (%) de cada tabla; None = sin margen (precio mínimo = mejor costo)
+MARGENES = {
+    "10%":         10.0,
+    "5%":          5.0,
+    "Bajo Precio": None,
+}
+
+
+def _costos_con_color(sheets: dict) -> pd.DataFrame:
+    """Filas Marca/Modelo/Proveedor/Costo USD/Color de todas las hojas de proveedores."""
+    partes = []
+    for prov in PROVEEDORES:
+        dfp = sheets[prov]
+        price_col = next(c for c in dfp.columns if "precio" in c.lower())
+        color_col = next((c for c in dfp.columns if "color" in c.lower()), None)
+        partes.append(pd.DataFrame({
+            "Marca":     dfp["Marca"],
+            "Modelo":    dfp["Modelo"],
+            "Proveedor": prov,
+            "Costo USD": pd.to_numeric(dfp[price_col], errors="coerce"),
+            "Color":     dfp[color_col] if color_col else None,
+        }))
+    costos = pd.concat(partes, ignore_index=True)
+    return costos[costos["Marca"].notna() & costos["Modelo"].notna() & (costos["Costo USD"] > 0)]
+
+
+def _unir(valores) -> str:
+    vistos = dict.fromkeys(str(v).strip() for v in valores if pd.notna(v) and str(v).strip())
+    return " / ".join(vistos)
+
+
+def mejor_costo(sheets: dict) -> pd.DataFrame:
+    """
+    Una fila por (Marca, Modelo): costo del proveedor más barato, proveedores
+    empatados en ese costo ("Eze - Di") y sus colores.
+    """
+    costos = _costos_con_color(sheets)
+    claves = ["Marca", "Modelo"]
+    minimo = costos.groupby(claves, sort=False, observed=True)["Costo USD"].transform("min")
+    mejores = costos[costos["Costo USD"] == minimo]
+    agg = mejores.groupby(claves, sort=False, observed=True).agg(
+        **{
+            "Costo USD": ("Costo USD", "first"),
+            "Proveedor": ("Proveedor", lambda s: " - ".join(dict.fromkeys(s))),
+            "Colores":   ("Color", _unir),
+        }
+    )
+    return agg.reset_index()
+
+
+def precio_con_margen(costo: np.ndarray, pct: float) -> np.ndarray:
+    """precios.precio_manual (sin descuento) sobre un array de costos."""
+    gan   = np.maximum(costo * pct / 100, GANANCIA_MINIMA_USD)
+    bruto = costo + gan
+    return np.round(bruto / MULTIPLO_REDONDEO) * MULTIPLO_REDONDEO
+
+
+def calcular(sheets: dict) -> dict:
+    """Tablas de margen calculadas desde los costos (ver build_margin_tables)."""
+    base  = mejor_costo(sheets)
+    costo = base["Costo USD"].to_numpy(dtype=float)
+    tablas = {}
+    for nombre, pct in MARGENES.items():
+        final = costo if pct is None else precio_con_margen(costo, pct)
+        col   = "Precio Mínimo" if pct is None else f"Precio USD +{pct:g}%"
+        tablas[nombre] = pd.DataFrame({
+            "Marca":     base["Marca"],
+            "Modelo":    base["Modelo"],
+            col:         [f"USD {v:.0f}" for v in final],
+            "Colores":   base["Colores"],
+            "Proveedor": base["Proveedor"],
+            "Ganancia":  final - costo,
+            "Costo USD": costo,
+            "Final USD": final,
+        })
+    return tablas
+
+
+def _numero(texto) -> float:
+    try:
+        return _parse_number_general(texto)
+    except ValueError:
+        return np.nan
+
+
+def _precio_usd(col: pd.Series) -> pd.Series:
+    """ "USD 1.250" (o un número) -> 1250.0, miles/decimales como en Listados; NaN si no hay."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype("float64")
+    num = col.astype("string").str.extract(r"(\d[\d,.]*)", expand=False)
+    return pd.Series([np.nan if pd.isna(v) else _numero(v) for v in num],
+                     index=col.index, dtype="float64")
+
+
+def _claves(df: pd.DataFrame) -> pd.MultiIndex:
+    return pd.MultiIndex.from_tuples(
+        [lookup_key(ma, mo) for ma, mo in zip(df["Marca"], df["Modelo"])])
+
+
+def desde_hojas(sheets: dict) -> dict:
+    """
+    Tablas de margen desde las hojas "10%", "5%" y "Bajo Precio" del Excel.
+    Las filas son las de la hoja 10% (sin las vacías); las otras se alinean por
+    (Marca, Modelo). Un modelo sin precio en alguna hoja queda en la tabla
+    con el precio vacío y "Final USD" NaN (la solapa lo muestra sin precio).
+    """
+    base = sheets["10%"]
+    base = base[base["Marca"].notna() & base["Modelo"].notna()].reset_index(drop=True)
+    claves = _claves(base)
+    tablas = {}
+    for nombre, pct in MARGENES.items():
+        hoja = sheets[nombre]
+        hoja = hoja.set_axis(_claves(hoja))
+        hoja = hoja[~hoja.index.duplicated()].reindex(claves).set_axis(base.index)
+        col = "Precio Mínimo" if pct is None else f"Precio USD +{pct:g}%"
+        final = _precio_usd(hoja[col])
+        ganancia = (pd.to_numeric(hoja["Ganancia"], errors="coerce").astype("float64")
+                    if "Ganancia" in hoja.columns else pd.Series(0.0, index=base.index))
+        tablas[nombre] = pd.DataFrame({
+            "Marca":     base["Marca"],
+            "Modelo":    base["Modelo"],
+            col:         final.map(lambda v: None if pd.isna(v) else f"USD {v:.0f}"),
+            "Colores":   hoja["Colores"] if "Colores" in hoja.columns else base["Colores"],
+            "Proveedor": hoja["Proveedor"],
+            "Ganancia":  ganancia,
+            "Costo USD": final - ganancia,
+            "Final USD": final,
+        })
+    return tablas
+
+
+def build_margin_tables(sheets: dict) -> dict:
+    """
+    {nombre: DataFrame} con las mismas columnas que las hojas de margen
+    (Marca, Modelo, "Precio USD +10%", Colores, Proveedor, Ganancia) más
+    "Costo USD" y "Final USD" numéricos. Todas las tablas tienen las mismas
+    filas en el mismo orden. Según FUENTE, calculadas o desde las hojas.
+    """
+    return desde_hojas(sheets) if FUENTE == "hojas" else calcular(sheets)
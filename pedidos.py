@@ -0,0 +1,394 @@
+# pedidos.py
+"""
+Registro de pedidos (sin Streamlit): journal append-only en SQLite (modo WAL)
+con las columnas de config.HEADERS_PEDIDOS.
+
+Guardar un pedido es un INSERT por ítem dentro de una transacción: no
+depende del tamaño del historial y es seguro con varias sesiones/procesos
+escribiendo a la vez. Pedidos.xlsx se genera aparte ("compactación") con
+openpyxl en modo write-only, leyendo el journal en streaming. Los resúmenes
+por día/semana (reportes.py) se suman en la misma transacción.
+
+También arma el texto "listo para copiar" de cada pedido, de a uno (el
+formulario) o en lote desde una tabla con las columnas de HEADERS_PEDIDOS:
+los costos se completan contra el catálogo con un solo join y todos los
+textos salen de la misma plantilla.
+
+Uso:  python pedidos.py exportar [ruta.xlsx]
+      python pedidos.py lote tabla.csv|xlsx [salida.zip]
+"""
+import io
+import os
+import re
+import sqlite3
+import sys
+import threading
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from busqueda import normalize
+
+# Columnas propias del pedido (se repiten en cada ítem del mismo pedido)
+CAMPOS_ITEM   = ["Proveedor", "Marca", "Modelo", "Costo USD", "Color", "Cantidad"]
+CAMPOS_PEDIDO = [h for h in config.HEADERS_PEDIDOS if h not in CAMPOS_ITEM]
+ESTADO_INICIAL = "Pendiente"
+
+_NUMERIC = {"Costo USD": "REAL", "Cantidad": "INTEGER", "Importe": "REAL", "Costo envío": "REAL"}
+
+
+def _q(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+_COLS_SQL = ", ".join(f"{_q(h)} {_NUMERIC.get(h, 'TEXT')}" for h in config.HEADERS_PEDIDOS)
+_INSERT_SQL = (
+    f"INSERT INTO pedidos (pedido_id, creado, {', '.join(_q(h) for h in config.HEADERS_PEDIDOS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in config.HEADERS_PEDIDOS)})"
+)
+
+
+def connect(path: Path = config.PEDIDOS_DB) -> sqlite3.Connection:
+    """Conexión al journal (crea la tabla si hace falta)."""
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pedidos ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " pedido_id TEXT NOT NULL,"
+        " creado TEXT NOT NULL,"
+        f" {_COLS_SQL})"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_pedidos_pedido ON pedidos (pedido_id)")
+    return conn
+
+
+def _nuevo_id(creado: datetime) -> str:
+    return f"{creado:%Y%m%d-%H%M%S}-{os.urandom(3).hex()}"
+
+
+def guardar_pedido(items: list, datos: dict, path: Path = config.PEDIDOS_DB) -> str:
+    """
+    Agrega un pedido al journal: una fila por ítem (Proveedor, Marca, ...)
+    con los datos del pedido (Dirección, Importe, Cliente, ...) repetidos.
+    Devuelve el pedido_id.
+    """
+    return guardar_pedidos([(items, datos)], path)[0]
+
+
+def guardar_pedidos(lote: list, path: Path = config.PEDIDOS_DB) -> list:
+    """Varios pedidos [(items, datos), ...] en una sola transacción; devuelve sus pedido_id."""
+    if any(not items for items, _ in lote):
+        raise ValueError("El pedido no tiene ítems.")
+    creado = datetime.now()
+    ids, filas = [], []
+    for items, datos in lote:
+        pedido_id = _nuevo_id(creado)
+        datos     = {"Estado": ESTADO_INICIAL, **datos}
+        ids.append(pedido_id)
+        filas.extend(
+            (pedido_id, creado.isoformat(timespec="seconds"),
+             *({**datos, **itm}.get(h) for h in config.HEADERS_PEDIDOS))
+            for itm in items
+        )
+    import reportes  # importa pedidos: se carga recién acá
+
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(_INSERT_SQL, filas)
+            try:
+                reportes.acumular(conn)  # resúmenes en la misma transacción
+            except (sqlite3.Error, ValueError, OverflowError):
+                pass  # el pedido se guarda igual; la próxima consulta se pone al día
+    finally:
+        conn.close()
+    return ids
+
+
+def iter_filas(path: Path = config.PEDIDOS_DB, desde: str | None = None, hasta: str | None = None):
+    """Filas del journal en orden de carga: (pedido_id, creado, *HEADERS_PEDIDOS)."""
+    sql = f"SELECT pedido_id, creado, {', '.join(_q(h) for h in config.HEADERS_PEDIDOS)} FROM pedidos"
+    cond, args = [], []
+    if desde:
+        cond.append("creado >= ?")
+        args.append(desde)
+    if hasta:
+        cond.append("creado < ?")
+        args.append(hasta)
+    if cond:
+        sql += " WHERE " + " AND ".join(cond)
+    sql += " ORDER BY id"
+    conn = connect(path)
+    try:
+        yield from conn.execute(sql, args)
+    finally:
+        conn.close()
+
+
+def exportar_excel(dest: Path = config.PEDIDOS_FILE, path: Path = config.PEDIDOS_DB) -> int:
+    """
+    Compacta el journal a un .xlsx con openpyxl write-only (memoria constante).
+    Se escribe a un temporal y se reemplaza al final. Devuelve filas exportadas.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Pedidos")
+    ws.append(["Pedido", "Fecha", *config.HEADERS_PEDIDOS])
+    n = 0
+    for fila in iter_filas(path):
+        ws.append(list(fila))
+        n += 1
+    tmp = Path(dest).with_name(f".{Path(dest).stem}.{os.getpid()}.tmp.xlsx")
+    wb.save(tmp)
+    os.replace(tmp, dest)
+    return n
+
+
+_EXPORT_LOCK = threading.Lock()
+
+
+def exportar_en_segundo_plano(dest: Path = config.PEDIDOS_FILE) -> bool:
+    """Lanza la exportación en un hilo; False si ya hay una en curso."""
+    if not _EXPORT_LOCK.acquire(blocking=False):
+        return False
+
+    def _run():
+        try:
+            exportar_excel(dest)
+        finally:
+            _EXPORT_LOCK.release()
+
+    threading.Thread(target=_run, name="exportar-pedidos", daemon=True).start()
+    return True
+
+
+# ===================== TEXTO DEL PEDIDO =====================
+# Una sola plantilla para el formulario y para el lote (mismo texto exacto)
+_PLANTILLA = (
+    "{tipo}:\n\n{items}{domicilio}Horario: {Horario}\n\n"
+    "PAGA: {pago}\n\n{aclaracion}Recibe: {Cliente} – {Celular}\n"
+).format_map
+_PLANTILLA_ITEM      = "{Cantidad}× {marca} {modelo} {Color}\n".format_map
+_PLANTILLA_DOMICILIO = "\nDirección: {Dirección}\nLocalidad: {Localidad}\n".format_map
+
+
+def _pesos(valor) -> str:
+    return f"$ {int(valor):,}".replace(",", ".")
+
+
+def pago(moneda: str, importe, costo_envio) -> str:
+    """ "$ 540.000 + Envío $ 5.000" (ARS) o "USD 450 + Envío $ 10" (USD)."""
+    txt = _pesos(importe) if moneda == "ARS" else f"USD {int(importe)}"
+    if costo_envio > 0:
+        txt += f" + Envío {_pesos(costo_envio)}" if moneda == "ARS" else f" + Envío $ {int(costo_envio)}"
+    return txt
+
+
+def _texto(items: str, datos: dict, retiro: bool) -> str:
+    aclaracion = datos.get("Aclaración") or ""
+    return _PLANTILLA({
+        **datos,
+        "tipo":       "Retiro" if retiro else "Envío",
+        "items":      items,
+        "domicilio":  "" if retiro else _PLANTILLA_DOMICILIO(datos),
+        "pago":       pago(datos["Moneda"], datos["Importe"], datos["Costo envío"]),
+        "aclaracion": aclaracion + "\n" if aclaracion else "",
+    })
+
+
+def texto_pedido(items: list, datos: dict, retiro: bool) -> str:
+    """Texto "listo para copiar" de un pedido (ítems del formulario + datos del pedido)."""
+    lineas = "".join(
+        _PLANTILLA_ITEM({**itm, "marca": itm["Marca"].upper(), "modelo": itm["Modelo"].upper()})
+        for itm in items
+    )
+    return _texto(lineas, datos, retiro)
+
+
+# ===================== PEDIDOS EN LOTE =====================
+# Una fila por ítem; las filas con el mismo "Pedido" (o, si viene vacío, el
+# mismo cliente/celular/dirección/horario) son un pedido. Sin Dirección = Retiro.
+COLUMNAS_LOTE = ["Pedido", *(h for h in config.HEADERS_PEDIDOS if h != "Estado")]
+_NUMERICAS    = ["Costo USD", "Importe", "Costo envío"]
+CANTIDAD_MAX  = 2 ** 53  # más que esto (o inf/NaN escrito) no es una cantidad: entra como 0
+_AGRUPAR      = ["Cliente", "Celular", "Dirección", "Horario"]
+
+
+def lote_vacio() -> pd.DataFrame:
+    """Tabla vacía con las columnas y tipos del lote (grilla editable / plantilla)."""
+    return pd.DataFrame({c: pd.Series(dtype=float if c in _NUMERICAS else
+                                      "Int64" if c == "Cantidad" else object)
+                         for c in COLUMNAS_LOTE})
+
+
+def leer_lote(archivo, nombre: str) -> pd.DataFrame:
+    """CSV (separador , o ; detectado) o XLSX subido, como texto crudo."""
+    if nombre.lower().endswith((".xlsx", ".xlsm")):
+        return pd.read_excel(archivo, dtype=str)
+    return pd.read_csv(archivo, sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+
+
+def _numero(serie: pd.Series) -> pd.Series:
+    # "1.250,50" / "1250.5" / "USD 450" -> float (las celdas numéricas de XLSX pasan igual)
+    txt = serie.astype("string").str.replace(r"[^\d,.\-]", "", regex=True)
+    coma = txt.str.contains(",", regex=False, na=False)
+    miles = txt.str.fullmatch(r"\d{1,3}(?:\.\d{3})+", na=False)  # "1.250" = mil doscientos cincuenta
+    txt = txt.mask(coma | miles, txt.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(txt, errors="coerce").astype(float)
+
+
+def normalizar_lote(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columnas de COLUMNAS_LOTE con tipos fijos; descarta filas sin marca ni
+    modelo. Una Cantidad vacía es 1; una que no es un número finito queda en 0
+    (resolver_costos la marca en "Observación").
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    out = pd.DataFrame(index=df.index)
+    for col in COLUMNAS_LOTE:
+        serie = df[col] if col in df.columns else pd.Series(pd.NA, index=df.index, dtype=object)
+        if col in _NUMERICAS:
+            out[col] = _numero(serie)
+        elif col == "Cantidad":
+            crudo = pd.to_numeric(serie, errors="coerce").astype(float)  # ve "inf" / "1e20", que _numero no
+            cant  = crudo if pd.api.types.is_numeric_dtype(serie) else _numero(serie)
+            mala  = (crudo.abs() >= CANTIDAD_MAX) | (cant.abs() >= CANTIDAD_MAX)  # inf incluido
+            out[col] = cant.mask(mala, 0).fillna(1).astype(int)
+        else:
+            out[col] = serie.astype("string").fillna("").str.strip().astype(object)
+    out["Moneda"] = np.where(out["Moneda"].str.upper().isin(["ARS", "$", "PESOS"]), "ARS", "USD")
+    for col in ("Importe", "Costo envío"):
+        out[col] = out[col].fillna(0.0)
+    return out[(out["Marca"] != "") | (out["Modelo"] != "")].reset_index(drop=True)
+
+
+def indexar_costos(resumen: pd.DataFrame) -> pd.DataFrame:
+    """
+    Hoja Resumen con claves normalizadas (_marca, _modelo) y el proveedor más
+    barato de cada modelo, lista para unir contra un lote.
+    """
+    provs = [c for c in resumen.columns if c not in ("Marca", "Modelo")]
+    costos = resumen[provs].apply(pd.to_numeric, errors="coerce")
+    out = costos.assign(_marca=resumen["Marca"].map(normalize), _modelo=resumen["Modelo"].map(normalize))
+    mat = costos.to_numpy(dtype=float)
+    hay = ~np.isnan(mat).all(axis=1)
+    mejor = np.where(np.isnan(mat), np.inf, mat).argmin(axis=1)
+    out["Mejor proveedor"] = np.where(hay, np.array(provs, dtype=object)[mejor], None)
+    out["Mejor costo"]     = np.where(hay, mat[np.arange(len(mat)), mejor], np.nan)
+    # Igual que la búsqueda por Marca/Modelo: manda la primera fila de cada modelo
+    return out.drop_duplicates(["_marca", "_modelo"]).reset_index(drop=True)
+
+
+def resolver_costos(lote: pd.DataFrame, costos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Completa "Costo USD" (y "Proveedor" si falta) de todas las filas con un
+    solo merge contra indexar_costos(): el costo del proveedor pedido o, sin
+    proveedor, el más barato. Los costos escritos en la tabla se respetan.
+    Agrega "Observación" para las filas que quedaron sin costo o sin cantidad.
+    """
+    provs = [c for c in costos.columns if c not in ("_marca", "_modelo", "Mejor proveedor", "Mejor costo")]
+    claves = pd.DataFrame({"_marca": lote["Marca"].map(normalize), "_modelo": lote["Modelo"].map(normalize)})
+    unido = claves.merge(costos, on=["_marca", "_modelo"], how="left", indicator=True)
+
+    prov = lote["Proveedor"].where(lote["Proveedor"] != "", unido["Mejor proveedor"].to_numpy()).fillna("")
+    col  = prov.map({p: i for i, p in enumerate(provs)}).fillna(-1).astype(int).to_numpy()  # -1 = desconocido
+    mat  = unido[provs].to_numpy(dtype=float)
+    del_prov = np.where(col >= 0, mat[np.arange(len(mat)), np.maximum(col, 0)], np.nan)
+
+    out = lote.copy()
+    out["Proveedor"] = prov.to_numpy()
+    out["Costo USD"] = out["Costo USD"].fillna(pd.Series(del_prov, index=out.index))
+    encontrado = (unido["_merge"] == "both").to_numpy()
+    out["Observación"] = np.select(
+        [(out["Cantidad"] <= 0).to_numpy(), out["Costo USD"].notna().to_numpy(), ~encontrado],
+        ["Cantidad inválida", "", "Modelo no está en el catálogo"],
+        default="Sin costo para ese proveedor",
+    )
+    return out
+
+
+def _grupos(lote: pd.DataFrame) -> np.ndarray:
+    sin_id = lote[_AGRUPAR].agg("|".join, axis=1)
+    return pd.factorize(lote["Pedido"].where(lote["Pedido"] != "", "sin-id|" + sin_id))[0]
+
+
+def textos_lote(lote: pd.DataFrame) -> pd.DataFrame:
+    """Un texto por pedido (en el orden de la tabla): columnas Pedido, Cliente, Ítems, Retiro, Texto."""
+    if lote.empty:
+        return pd.DataFrame(columns=["Pedido", "Cliente", "Ítems", "Retiro", "Texto"])
+    grupo  = _grupos(lote)
+    lineas = (lote["Cantidad"].astype(str) + "× " + lote["Marca"].str.upper() + " "
+              + lote["Modelo"].str.upper() + " " + lote["Color"] + "\n")
+    items  = lineas.groupby(grupo, sort=True).agg("".join)
+    datos  = lote.groupby(grupo, sort=True).first()
+    retiro = datos["Dirección"] == ""
+    textos = [_texto(it, d, r) for it, d, r in
+              zip(items, datos.to_dict("records"), retiro)]
+    return pd.DataFrame({
+        "Pedido":  datos["Pedido"].where(datos["Pedido"] != "", [f"{i + 1:03d}" for i in range(len(datos))]),
+        "Cliente": datos["Cliente"],
+        "Ítems":   lote.groupby(grupo, sort=True).size(),
+        "Retiro":  retiro,
+        "Texto":   textos,
+    }).reset_index(drop=True)
+
+
+def items_y_datos(lote: pd.DataFrame) -> list:
+    """[(items, datos), ...] por pedido, en el formato de guardar_pedidos()."""
+    out = []
+    campos = [h for h in CAMPOS_PEDIDO if h != "Estado"]
+    for _, filas in lote.groupby(_grupos(lote), sort=True):
+        datos = filas[campos].iloc[:1].to_dict("records")[0]  # tipos nativos (sqlite no toma numpy)
+        if datos["Dirección"] == "":
+            datos["Localidad"] = ""
+        out.append((filas[CAMPOS_ITEM].to_dict("records"), datos))
+    return out
+
+
+def _archivo(nombre: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", normalize(nombre)).strip("_")[:40] or "pedido"
+
+
+def paquete(lote: pd.DataFrame, textos: pd.DataFrame) -> bytes:
+    """ZIP con todos.txt, un .txt por pedido y la tabla resuelta (costos completados)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("todos.txt", "\n".join(textos["Texto"]))
+        for i, (ped, cliente, texto) in enumerate(zip(textos["Pedido"], textos["Cliente"], textos["Texto"]), 1):
+            z.writestr(f"{i:03d}_{_archivo(cliente or ped)}.txt", texto)
+        z.writestr("pedidos_resueltos.csv", lote.to_csv(index=False).encode("utf-8-sig"))
+    return buf.getvalue()
+
+
+def plantilla_csv() -> bytes:
+    return lote_vacio().to_csv(index=False).encode("utf-8-sig")
+
+
+def _lote_cli(tabla: Path, destino: Path) -> None:
+    import utils  # solo para el catálogo; el resto del módulo no depende de Streamlit
+
+    lote = resolver_costos(normalizar_lote(leer_lote(tabla, tabla.name)),
+                           indexar_costos(utils.load_catalogue()))
+    textos = textos_lote(lote)
+    destino.write_bytes(paquete(lote, textos))
+    observados = int((lote["Observación"] != "").sum())
+    print(f"{len(textos)} pedido(s), {len(lote)} ítem(s), {observados} con observaciones -> {destino}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "lote":
+        tabla = Path(sys.argv[2])
+        _lote_cli(tabla, Path(sys.argv[3]) if len(sys.argv) > 3 else tabla.with_suffix(".zip"))
+        sys.exit(0)
+    if len(sys.argv) < 2 or sys.argv[1] != "exportar":
+        print("\n".join(__doc__.strip().splitlines()[-2:]), file=sys.stderr)
+        sys.exit(2)
+    destino = Path(sys.argv[2]) if len(sys.argv) > 2 else config.PEDIDOS_FILE
+    print(f"{exportar_excel(destino)} fila(s) exportadas a {destino}")
@@ -0,0 +1,173 @@
+# perf.py
+"""
+Instrumentación opcional por rerun (sin Streamlit).
+
+Se activa con DRB_PERF=1 (o con `perf = true` en .streamlit/secrets.toml, ver
+activar()). Apagada, seccion() devuelve un context manager vacío y contar()
+retorna enseguida: no agrega costo al rerun.
+
+Prendida, cada rerun registra:
+  - total_ms y el tiempo de cada sección con nombre (tiempos inclusivos:
+    una sección anidada también cuenta dentro de la que la contiene),
+  - aciertos / fallos de cada caché,
+  - RSS del proceso al final del rerun y cuánto creció durante el rerun,
+y lo agrega como una línea JSON a config.PERF_LOG.
+
+Uso:  python perf.py [perf.jsonl]   # percentiles p50/p95/p99 del log
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+HISTORIAL = 500  # reruns que se guardan en memoria para el panel
+
+_ESTADO    = {"activo": os.environ.get("DRB_PERF", "").strip().lower() in ("1", "true", "si", "sí"),
+              "log":    config.PERF_LOG}
+_LOCAL     = threading.local()  # cada sesión de Streamlit corre en su propio hilo
+_HISTORIAL = deque(maxlen=HISTORIAL)
+_LOG_LOCK  = threading.Lock()
+_NULO      = nullcontext()
+
+
+def activo() -> bool:
+    return _ESTADO["activo"]
+
+
+def activar(valor: bool = True, log: Path | None = None) -> None:
+    """Prende/apaga la instrumentación; `log` cambia el archivo (p. ej. en bench/)."""
+    _ESTADO["activo"] = bool(valor)
+    if log is not None:
+        _ESTADO["log"] = Path(log)
+
+
+def rss_mb() -> float | None:
+    """Memoria residente actual del proceso (MB); None si no se puede leer."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Sin /proc (macOS): el pico, que es lo más parecido disponible
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+    except (ImportError, OSError):
+        return None
+
+
+# ===================== REGISTRO DEL RERUN =====================
+@contextmanager
+def rerun(sesion: str, path: Path | None = None):
+    """Envuelve un rerun completo; al salir (aunque sea por st.stop/rerun) lo registra."""
+    if not activo():
+        yield None
+        return
+    reg = {"ts": datetime.now().isoformat(timespec="milliseconds"), "sesion": sesion,
+           "secciones": {}, "cache": {}}
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    _LOCAL.reg = reg
+    try:
+        yield reg
+    finally:
+        _LOCAL.reg = None
+        reg["total_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        rss = rss_mb()
+        reg["rss_mb"]   = None if rss is None else round(rss, 1)
+        reg["rss_delta_mb"] = None if rss is None or rss0 is None else round(rss - rss0, 2)
+        _HISTORIAL.append(reg)
+        _escribir(reg, path or _ESTADO["log"])
+
+
+def _escribir(reg: dict, path: Path) -> None:
+    linea = json.dumps(reg, ensure_ascii=False) + "\n"
+    try:
+        with _LOG_LOCK, open(path, "a", encoding="utf-8") as f:
+            f.write(linea)
+    except OSError:
+        pass  # el log es best-effort: nunca rompe la app
+
+
+def seccion(nombre: str):
+    """Mide un bloque: `with perf.seccion("buscar"): ...`."""
+    if not _ESTADO["activo"] or getattr(_LOCAL, "reg", None) is None:
+        return _NULO
+    return _medir(_LOCAL.reg, nombre)
+
+
+@contextmanager
+def _medir(reg: dict, nombre: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - t0) * 1000
+        reg["secciones"][nombre] = round(reg["secciones"].get(nombre, 0.0) + ms, 3)
+
+
+def contar(cache: str, acierto: bool) -> None:
+    """Cuenta un acierto o fallo de caché en el rerun actual."""
+    if not _ESTADO["activo"]:
+        return
+    reg = getattr(_LOCAL, "reg", None)
+    if reg is None:
+        return
+    par = reg["cache"].setdefault(cache, [0, 0])
+    par[0 if acierto else 1] += 1
+
+
+# ===================== RESÚMENES =====================
+def historial() -> list:
+    return list(_HISTORIAL)
+
+
+def percentil(valores: list, p: float) -> float | None:
+    """Percentil con interpolación lineal (p en 0..100)."""
+    if not valores:
+        return None
+    vals = sorted(valores)
+    k = (len(vals) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(vals) - 1)
+    return vals[lo] + (vals[hi] - vals[lo]) * (k - lo)
+
+
+def resumen(registros: list, ps=(50, 95, 99)) -> dict:
+    """{nombre: {"n", "p50", "p95", "p99"}} para el total y cada sección (ms)."""
+    series = {"total": [r["total_ms"] for r in registros]}
+    for r in registros:
+        for nombre, ms in r.get("secciones", {}).items():
+            series.setdefault(nombre, []).append(ms)
+    return {
+        nombre: {"n": len(vals), **{f"p{p}": percentil(vals, p) for p in ps}}
+        for nombre, vals in series.items()
+    }
+
+
+def leer_log(path: Path = config.PERF_LOG) -> list:
+    registros = []
+    with open(path, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue  # línea cortada por un corte de luz, etc.
+    return registros
+
+
+if __name__ == "__main__":
+    log = Path(sys.argv[1]) if len(sys.argv) > 1 else config.PERF_LOG
+    regs = leer_log(log)
+    print(f"{len(regs)} rerun(s) en {log}")
+    print(f"{'sección':28} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for nombre, r in sorted(resumen(regs).items(), key=lambda kv: -(kv[1]["p95"] or 0)):
+        print(f"{nombre:28} {r['n']:6} {r['p50']:10.2f} {r['p95']:10.2f} {r['p99']:10.2f}")
@@ -0,0 +1,108 @@
+# precios.py
+"""
+Cálculo de precios de venta y totales de presupuesto, sin Streamlit ni pandas.
+
+Es la misma lógica que usa la solapa Presupuesto ("Calcular y Agregar" y el
+bloque "Detalle del Presupuesto"), para poder reutilizarla desde scripts.
+Los ítems guardan sus montos USD/ARS como números y los totales se mantienen
+al agregar o quitar ítems, sin volver a leer los textos de precio.
+"""
+import re
+
+GANANCIA_MINIMA_USD = 30.0   # ganancia mínima por ítem
+MULTIPLO_REDONDEO   = 5      # el precio final se redondea a múltiplos de 5 USD
+
+_USD_RE = re.compile(r"USD\s*([\d,]+)")
+_ARS_RE = re.compile(r"\$\s*([\d,]+)")
+
+
+def precio_manual(costo_usd: float, pct: float, descuento_usd: float = 0.0) -> float:
+    """Precio final en USD: costo + max(costo*pct/100, 30), redondeado a 5, menos descuento."""
+    gan   = max(costo_usd * pct / 100, GANANCIA_MINIMA_USD)
+    bruto = costo_usd + gan
+    return max(round(bruto / MULTIPLO_REDONDEO) * MULTIPLO_REDONDEO - descuento_usd, 0)
+
+
+def montos_manual(final_usd: float, blue: float, moneda: str) -> tuple[int | None, int | None]:
+    """
+    Montos (USD, ARS) redondeados a entero según la moneda elegida
+    ("USD", "Pesos" o "Ambos"); None = no se cotiza en esa moneda.
+    """
+    usd = round(final_usd) if moneda in ("USD", "Ambos") else None
+    ars = round(final_usd * blue) if moneda in ("Pesos", "Ambos") else None
+    return usd, ars
+
+
+def formato_montos(usd: int | None, ars: int | None) -> str:
+    """Texto del precio: "USD 450", "$ 540,000" o "USD 450 / $ 540,000"."""
+    if ars is None:
+        return f"USD {usd}"
+    if usd is None:
+        return f"$ {ars:,}"
+    return f"USD {usd} / $ {ars:,}"
+
+
+def parse_precio(precio: str) -> tuple[int, int]:
+    """Montos (USD, ARS) de un texto como "USD 450 / $ 540,000" (0 si no está)."""
+    m_usd = _USD_RE.search(precio)
+    m_ars = _ARS_RE.search(precio)
+    usd = int(m_usd.group(1).replace(",", "")) if m_usd else 0
+    ars = int(m_ars.group(1).replace(",", "")) if m_ars else 0
+    return usd, ars
+
+
+def formato_total(usd_total: int, pes_total: int) -> str:
+    if pes_total > 0 and usd_total == 0:
+        return f"$ {pes_total:,.0f}"
+    if usd_total > 0 and pes_total == 0:
+        return f"USD {usd_total}"
+    return f"USD {usd_total} / $ {pes_total:,.0f}"
+
+
+# ===================== ÍTEMS Y TOTALES DEL PRESUPUESTO =====================
+def item_presupuesto(marca: str, modelo: str, usd: int | None, ars: int | None,
+                     colores: str = "", proveedor: str = "") -> dict:
+    """Ítem con montos numéricos; "Precio" queda solo como texto para mostrar."""
+    return {
+        "Marca":     marca,
+        "Modelo":    modelo,
+        "Precio":    formato_montos(usd, ars),
+        "Colores":   colores,
+        "Proveedor": proveedor,
+        "USD":       usd,
+        "ARS":       ars,
+    }
+
+
+def montos(item: dict) -> tuple[int, int]:
+    """(USD, ARS) de un ítem; si no trae montos numéricos, se leen del texto "Precio"."""
+    if "USD" in item or "ARS" in item:
+        return item.get("USD") or 0, item.get("ARS") or 0
+    return parse_precio(item["Precio"])
+
+
+def totales_vacios() -> dict:
+    return {"USD": 0, "ARS": 0}
+
+
+def sumar_item(totales: dict, item: dict, signo: int = 1) -> None:
+    """Actualiza los totales al agregar (signo=1) o quitar (signo=-1) un ítem."""
+    usd, ars = montos(item)
+    totales["USD"] += signo * usd
+    totales["ARS"] += signo * ars
+
+
+def linea_item(item: dict) -> str:
+    line = f"- {item['Marca']} {item['Modelo']} • {item['Precio']}"
+    if item["Colores"]:
+        line += f" • {item['Colores']}"
+    return line
+
+
+def mensaje_presupuesto(items: list, totales: dict, hoy: str) -> str:
+    """Mensaje de WhatsApp del presupuesto armado desde los ítems y los totales."""
+    partes = [f"*Presupuesto DRB ELECTRO*\n_{hoy}_\n"]
+    partes += [linea_item(it).replace("•", "") for it in items]
+    partes.append("---------------------------")
+    partes.append(f"*TOTAL: {formato_total(totales['USD'], totales['ARS'])}*")
+    return "\n".join(partes)
@@ -0,0 +1,302 @@
+# reportes.py
+"""
+Resúmenes del historial de pedidos (sin Streamlit), por día y por semana.
+
+En el mismo SQLite del journal (pedidos.py) se guarda la tabla
+resumen_pedidos, ya agregada por período, dimensión y moneda:
+  - total, proveedor, marca, modelo y localidad ("(retiro)" si no hay),
+  - pedidos, ítems, unidades, costo USD (Costo USD × Cantidad),
+    importe y costo de envío (en la moneda del pedido).
+Importe y envío se repiten en cada ítem del journal: se cuentan una vez por
+pedido y clave. Un pedido con dos proveedores suma su importe a los dos;
+el total real es la dimensión "total".
+
+Se actualiza de forma incremental: guardar_pedidos() llama a acumular() en
+la misma transacción, que suma solo las filas con id mayor al último ya
+resumido. Si algo falla (o el journal viene de antes de este módulo), la
+próxima lectura se pone al día sola. Consultar un período lee solo sus
+filas de resumen: no depende del tamaño del historial.
+
+Uso:  python reportes.py [dia|semana] [AAAA-MM-DD]       # resumen del período
+      python reportes.py exportar desde hasta [ruta.xlsx]
+      python reportes.py reconstruir                      # rehace todo desde el journal
+"""
+import math
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+import config
+import pedidos
+
+PERIODOS    = ("dia", "semana")
+DIMENSIONES = ("total", "proveedor", "marca", "modelo", "localidad")
+METRICAS    = ("pedidos", "items", "unidades", "costo_usd", "importe", "envio")
+SIN_DATO    = "(sin dato)"
+RETIRO      = "(retiro)"
+
+# Nombres para mostrar / exportar
+COLUMNAS = {
+    "clave": "Clave", "moneda": "Moneda", "pedidos": "Pedidos", "items": "Ítems",
+    "unidades": "Unidades", "costo_usd": "Costo USD", "importe": "Importe",
+    "envio": "Costo envío",
+}
+
+_ESQUEMA = (
+    "CREATE TABLE IF NOT EXISTS resumen_pedidos ("
+    " periodo TEXT NOT NULL,"     # 'dia' | 'semana'
+    " inicio TEXT NOT NULL,"      # AAAA-MM-DD (lunes para 'semana')
+    " dimension TEXT NOT NULL,"
+    " clave TEXT NOT NULL,"
+    " moneda TEXT NOT NULL,"
+    " pedidos INTEGER NOT NULL, items INTEGER NOT NULL, unidades INTEGER NOT NULL,"
+    " costo_usd REAL NOT NULL, importe REAL NOT NULL, envio REAL NOT NULL,"
+    " PRIMARY KEY (periodo, inicio, dimension, clave, moneda)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS resumen_estado (clave TEXT PRIMARY KEY, valor INTEGER NOT NULL)",
+)
+_UPSERT_SQL = (
+    f"INSERT INTO resumen_pedidos (periodo, inicio, dimension, clave, moneda, {', '.join(METRICAS)}) "
+    f"VALUES (?, ?, ?, ?, ?, {', '.join('?' for _ in METRICAS)}) "
+    "ON CONFLICT (periodo, inicio, dimension, clave, moneda) DO UPDATE SET "
+    + ", ".join(f"{m} = {m} + excluded.{m}" for m in METRICAS)
+)
+_COLS_JOURNAL = ("Proveedor", "Marca", "Modelo", "Costo USD", "Cantidad", "Localidad",
+                 "Moneda", "Importe", "Costo envío")
+
+
+# ===================== ACUMULACIÓN INCREMENTAL =====================
+def _num(valor) -> float:
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+    return valor if math.isfinite(valor) else 0.0  # NaN / inf -> 0
+
+
+def _cantidad(valor) -> int:
+    # Igual que pedidos.normalizar_lote: lo que no es una cantidad suma 0 (y no rompe el resumen)
+    valor = _num(valor)
+    return int(valor) if abs(valor) < pedidos.CANTIDAD_MAX else 0
+
+
+def _texto(valor) -> str:
+    if valor is None or valor != valor:  # None / NaN
+        return ""
+    return " ".join(str(valor).split())
+
+
+def inicio_de(dia: date, periodo: str) -> date:
+    """Primer día del período que contiene `dia` (el lunes si es semana)."""
+    return dia - timedelta(days=dia.weekday()) if periodo == "semana" else dia
+
+
+def _claves(fila: dict) -> list:
+    """[(dimensión, clave)] a las que suma una fila del journal."""
+    marca, modelo = _texto(fila["Marca"]).upper(), _texto(fila["Modelo"]).upper()
+    return [
+        ("total",     ""),
+        ("proveedor", _texto(fila["Proveedor"]) or SIN_DATO),
+        ("marca",     marca or SIN_DATO),
+        ("modelo",    f"{marca} {modelo}".strip() or SIN_DATO),
+        ("localidad", _texto(fila["Localidad"]).upper() or RETIRO),
+    ]
+
+
+def _agregar(filas) -> dict:
+    """{(periodo, inicio, dimensión, clave, moneda): [métricas]} de un grupo de filas."""
+    acum, vistos, inicios = {}, set(), {}
+    for fila in filas:
+        dia = fila["creado"][:10]
+        if dia not in inicios:
+            d = date.fromisoformat(dia)
+            inicios[dia] = [(p, inicio_de(d, p).isoformat()) for p in PERIODOS]
+        moneda   = _texto(fila["Moneda"]) or SIN_DATO
+        cantidad = _cantidad(fila["Cantidad"])
+        costo    = _num(fila["Costo USD"]) * cantidad
+        for periodo, inicio in inicios[dia]:
+            for dimension, clave in _claves(fila):
+                k = (periodo, inicio, dimension, clave, moneda)
+                m = acum.setdefault(k, [0, 0, 0, 0.0, 0.0, 0.0])
+                m[1] += 1
+                m[2] += cantidad
+                m[3] += costo
+                if (k, fila["pedido_id"]) not in vistos:  # datos del pedido: una vez por clave
+                    vistos.add((k, fila["pedido_id"]))
+                    m[0] += 1
+                    m[4] += _num(fila["Importe"])
+                    m[5] += _num(fila["Costo envío"])
+    return acum
+
+
+def acumular(conn: sqlite3.Connection) -> int:
+    """
+    Suma a los resúmenes las filas del journal que todavía no están. Corre
+    dentro de la transacción de quien llama (un pedido siempre entra entero);
+    si falla no deja nada a medias. Devuelve cuántas filas sumó.
+    """
+    conn.execute("SAVEPOINT resumen")
+    try:
+        for sql in _ESQUEMA:
+            conn.execute(sql)
+        fila = conn.execute("SELECT valor FROM resumen_estado WHERE clave = 'ultimo_id'").fetchone()
+        ultimo = fila[0] if fila else 0
+        cur = conn.execute(
+            f"SELECT id, pedido_id, creado, {', '.join(pedidos._q(c) for c in _COLS_JOURNAL)} "
+            "FROM pedidos WHERE id > ? ORDER BY id", (ultimo,))
+        nombres = [d[0] for d in cur.description]
+        filas = [dict(zip(nombres, f)) for f in cur]
+        if filas:
+            conn.executemany(_UPSERT_SQL, [(*k, *m) for k, m in _agregar(filas).items()])
+            conn.execute("INSERT OR REPLACE INTO resumen_estado VALUES ('ultimo_id', ?)", (filas[-1]["id"],))
+    except BaseException:
+        conn.execute("ROLLBACK TO resumen")
+        raise
+    finally:
+        conn.execute("RELEASE resumen")
+    return len(filas)
+
+
+def _al_dia(conn: sqlite3.Connection) -> int:
+    """acumular() en su propia transacción; sin filas nuevas ni siquiera toma el lock."""
+    try:
+        fila = conn.execute("SELECT valor FROM resumen_estado WHERE clave = 'ultimo_id'").fetchone()
+        if (conn.execute("SELECT MAX(id) FROM pedidos").fetchone()[0] or 0) <= (fila[0] if fila else 0):
+            return 0
+    except sqlite3.OperationalError:
+        pass  # journal de antes de los resúmenes: todavía no hay tablas
+    conn.execute("BEGIN IMMEDIATE")  # lock de escritura: dos sesiones nunca suman lo mismo
+    try:
+        n = acumular(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return n
+
+
+def ponerse_al_dia(path: Path = config.PEDIDOS_DB) -> int:
+    conn = pedidos.connect(path)
+    try:
+        return _al_dia(conn)
+    finally:
+        conn.close()
+
+
+def reconstruir(path: Path = config.PEDIDOS_DB) -> int:
+    """Borra los resúmenes y los rehace desde el journal completo."""
+    conn = pedidos.connect(path)
+    try:
+        with conn:
+            for sql in _ESQUEMA:
+                conn.execute(sql)
+            conn.execute("DELETE FROM resumen_pedidos")
+            conn.execute("DELETE FROM resumen_estado")
+            return acumular(conn)
+    finally:
+        conn.close()
+
+
+# ===================== CONSULTAS =====================
+def _consulta(sql: str, args: tuple, path: Path) -> pd.DataFrame:
+    conn = pedidos.connect(path)
+    try:
+        _al_dia(conn)
+        return pd.read_sql_query(sql, conn, params=args)
+    finally:
+        conn.close()
+
+
+def resumen(dia: date, periodo: str = "dia", dimension: str = "total",
+            path: Path = config.PEDIDOS_DB) -> pd.DataFrame:
+    """Filas del período que contiene `dia` para una dimensión, de mayor a menor importe."""
+    return _consulta(
+        f"SELECT clave, moneda, {', '.join(METRICAS)} FROM resumen_pedidos "
+        "WHERE periodo = ? AND inicio = ? AND dimension = ? ORDER BY moneda, importe DESC, clave",
+        (periodo, inicio_de(dia, periodo).isoformat(), dimension), path)
+
+
+def _sumar_rango(dimension: str, desde: date, hasta: date, path: Path) -> pd.DataFrame:
+    """Una dimensión sumada entre dos fechas (inclusive), a partir de los resúmenes diarios."""
+    return _consulta(
+        f"SELECT clave, moneda, {', '.join(f'SUM({m}) AS {m}' for m in METRICAS)} "
+        "FROM resumen_pedidos WHERE periodo = 'dia' AND dimension = ? AND inicio BETWEEN ? AND ? "
+        "GROUP BY clave, moneda ORDER BY moneda, importe DESC, clave",
+        (dimension, desde.isoformat(), hasta.isoformat()), path)
+
+
+def serie(desde: date, hasta: date, periodo: str = "dia",
+          path: Path = config.PEDIDOS_DB) -> pd.DataFrame:
+    """Totales por período y moneda entre dos fechas (inclusive)."""
+    return _consulta(
+        f"SELECT inicio, moneda, {', '.join(METRICAS)} FROM resumen_pedidos "
+        "WHERE periodo = ? AND dimension = 'total' AND inicio BETWEEN ? AND ? ORDER BY inicio, moneda",
+        (periodo, inicio_de(desde, periodo).isoformat(), hasta.isoformat()), path)
+
+
+def para_mostrar(df: pd.DataFrame) -> pd.DataFrame:
+    """Nombres de columna de la app y "Total" = importe + envío."""
+    out = df.rename(columns={**COLUMNAS, "inicio": "Desde"})
+    out["Total"] = out["Importe"] + out["Costo envío"]
+    return out
+
+
+# ===================== EXPORTACIÓN =====================
+def exportar_periodo(desde: date, hasta: date, dest, path: Path = config.PEDIDOS_DB) -> int:
+    """
+    Excel del período (fechas inclusive) con openpyxl write-only: una hoja
+    "Por día" (una fila por día), una por dimensión y el detalle del journal
+    leído en streaming, así un rango grande no se arma en memoria. `dest` es una ruta o un archivo
+    binario abierto. Devuelve las filas de detalle escritas.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    hojas = {"Por día": para_mostrar(serie(desde, hasta, "dia", path))}
+    for dimension in DIMENSIONES[1:]:
+        hojas[dimension.capitalize()] = para_mostrar(_sumar_rango(dimension, desde, hasta, path))
+    for nombre, df in hojas.items():
+        ws = wb.create_sheet(nombre)
+        ws.append(list(df.columns))
+        for fila in df.itertuples(index=False):
+            ws.append(list(fila))
+
+    ws = wb.create_sheet("Pedidos")
+    ws.append(["Pedido", "Fecha", *config.HEADERS_PEDIDOS])
+    n = 0
+    for fila in pedidos.iter_filas(path, desde.isoformat(), (hasta + timedelta(days=1)).isoformat()):
+        ws.append(list(fila))
+        n += 1
+
+    if isinstance(dest, (str, Path)):
+        tmp = Path(dest).with_name(f".{Path(dest).stem}.{os.getpid()}.tmp.xlsx")
+        wb.save(tmp)
+        os.replace(tmp, dest)
+    else:
+        wb.save(dest)
+    return n
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["reconstruir"]:
+        print(f"{reconstruir()} fila(s) del journal resumidas")
+    elif args[:1] == ["exportar"] and len(args) >= 3:
+        desde, hasta = date.fromisoformat(args[1]), date.fromisoformat(args[2])
+        destino = Path(args[3]) if len(args) > 3 else config.PEDIDOS_DIR / f"Reporte_{desde}_{hasta}.xlsx"
+        print(f"{exportar_periodo(desde, hasta, destino)} fila(s) de detalle exportadas a {destino}")
+    elif not args or args[0] in PERIODOS:
+        periodo = args[0] if args else "dia"
+        dia = date.fromisoformat(args[1]) if len(args) > 1 else datetime.now().date()
+        print(f"{periodo} desde {inicio_de(dia, periodo)}")
+        for dimension in DIMENSIONES:
+            df = resumen(dia, periodo, dimension)
+            if not df.empty:
+                print(f"\n[{dimension}]")
+                print(para_mostrar(df).to_string(index=False))
+    else:
+        print("\n".join(__doc__.strip().splitlines()[-3:]), file=sys.stderr)
+        sys.exit(2)
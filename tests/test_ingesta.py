@@ -0,0 +1,80 @@
+import shutil
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import PatternFill
+
+import config
+import ingesta
+from catalogo import HOJA_RESUMEN
+
+
+def _diff(filas):
+    return pd.DataFrame([(estado, marca, modelo, variante, costo, None, "")
+                         for estado, marca, modelo, variante, costo in filas],
+                        columns=ingesta.COLUMNAS_DIFF)
+
+
+def _catalogo(tmp_path):
+    path = tmp_path / "Proveedores.xlsx"
+    shutil.copy2(config.CATALOGO_PATH, path)
+    wb = load_workbook(path)
+    rojo = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+    for nombre in ("Eze", HOJA_RESUMEN):
+        wb[nombre].conditional_formatting.add(
+            "D2:D500", CellIsRule(operator="greaterThan", formula=["1000"], fill=rojo))
+    wb.save(path)
+    return path
+
+
+def test_escribir_diff_conserva_formato(tmp_path):
+    path = _catalogo(tmp_path)
+    antes = load_workbook(path)
+    anchos = {n: {k: d.width for k, d in antes[n].column_dimensions.items()}
+              for n in ("Eze", HOJA_RESUMEN)}
+    ultima = max(f[0].row for f in antes["Eze"].iter_rows(min_row=2) if f[0].value is not None)
+
+    ingesta.escribir_diff("Eze", _diff([
+        ("Cambia", "APPLE", "IPHONE 13 128GB", "MIDNIGHT", 499.0),
+        ("Nuevo", "SAMSUNG", "S24 PLUS 256GB 5G", "BLACK", 612.5),
+        ("Sin match", None, None, "", 10.0),
+    ]), path)
+
+    wb = load_workbook(path)
+    for nombre in ("Eze", HOJA_RESUMEN):
+        ws = wb[nombre]
+        assert {k: d.width for k, d in ws.column_dimensions.items()} == anchos[nombre]
+        assert [str(r.sqref) for r in ws.conditional_formatting] == ["D2:D500"]
+
+    eze = wb["Eze"]
+    assert eze["D2"].value == 499 and eze["D2"].data_type == "n"
+    assert isinstance(eze["D2"].value, int)
+    nueva = [c.value for c in eze[ultima + 1]]
+    assert nueva == ["SAMSUNG", "S24 PLUS 256GB 5G", "USD", 612.5, "BLACK"]
+    assert eze.cell(ultima + 1, 2).style_id == eze.cell(ultima, 2).style_id
+
+    resumen = wb[HOJA_RESUMEN]
+    col = [c.value for c in resumen[1]].index("Eze") + 1
+    por_modelo = {r[1].value: r[col - 1].value for r in resumen.iter_rows(min_row=2)}
+    assert por_modelo["IPHONE 13 128GB"] == 499
+    assert por_modelo["S24 PLUS 256GB 5G"] == 612.5
+
+
+def test_escribir_diff_no_toca_otras_hojas(tmp_path):
+    path = _catalogo(tmp_path)
+    antes = {ws.title: [[c.value for c in f] for f in ws.iter_rows()] for ws in load_workbook(path)}
+
+    ingesta.escribir_diff("Eze", _diff([("Cambia", "APPLE", "IPHONE 14 128GB", "", 575.0)]), path)
+
+    despues = {ws.title: [[c.value for c in f] for f in ws.iter_rows()] for ws in load_workbook(path)}
+    assert list(despues) == list(antes)
+    for nombre in antes:
+        if nombre not in ("Eze", HOJA_RESUMEN):
+            assert despues[nombre] == antes[nombre]
+
+
+def test_aplicar_ignora_modelos_fuera_de_la_hoja():
+    hoja = pd.DataFrame({"Marca": ["APPLE"], "Modelo": ["IPHONE 13 128GB"], "Precio": [485.0]})
+    out = ingesta.aplicar(hoja, _diff([("Cambia", "APPLE", "IPHONE 99", "", 1.0)]))
+    assert out["Precio"].tolist() == [485.0]
@@ -1,9 +1,304 @@
 # utils.py
+import os
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+
 import pandas as pd
 import streamlit as st
 from pathlib import Path
+import busqueda
+import catalogo
 import config
+import margenes
+import perf
+from catalogo import HOJA_RESUMEN
+
+# "memoria" (DataFrames + índices en el proceso) o "sqlite" (catalogo_db.py)
+BACKEND = os.environ.get("DRB_CATALOGO_BACKEND", "memoria").strip().lower()
+
+# Los DataFrames del catálogo se comparten entre sesiones sin copiarse: con
+# Copy-on-Write una vista que se modifica copia solo lo que toca, y el frame
+# compartido queda intacto. En pandas 3 está siempre activo (y tocar la opción
+# avisa que está deprecada); en pandas 2 hay que prenderlo.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Caché de proceso: se invalida solo cuando cambia el archivo (mtime + tamaño).
+# Cada versión se arma completa (hojas, costos, derivados) y recién ahí se
+# publica reemplazando _WB_CACHE["data"]: un rerun ve la versión vieja o la
+# nueva, nunca una a medias.
+_WB_CACHE = {"key": None, "data": None}
+_WB_LOCK  = threading.RLock()
+
+VIGILANCIA_INTERVALO = 2.0  # segundos entre chequeos del Excel
+_VIGILANTE = {"thread": None, "error": None}
+
+
+def _file_key(path: Path) -> tuple[int, int]:
+    stat = Path(path).stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_or_compile() -> tuple[dict, pd.DataFrame]:
+    tables = catalogo.load_snapshot()
+    if tables is not None:
+        return tables, tables.pop(catalogo.TABLA_COSTOS)
+    # Mismos tipos que el snapshot (catalogo._normalize), con o sin pyarrow
+    sheets    = {name: catalogo._normalize(name, df) for name, df in catalogo.read_workbook().items()}
+    costos_df = catalogo.build_costos(sheets)
+    # Deja el snapshot listo para el próximo arranque en frío (si hay pyarrow).
+    # Es solo una optimización: si falla, se sigue con lo leído del Excel.
+    try:
+        catalogo.compile_snapshot(sheets=sheets)
+    except Exception:  # noqa: BLE001 - sin pyarrow, disco lleno, columna que Arrow no convierte...
+        pass
+    return sheets, costos_df
+
+
+def catalogue_version() -> tuple[int, int]:
+    """Versión actual del catálogo en disco (mtime_ns, tamaño)."""
+    return _file_key(config.CATALOGO_PATH)
+
+
+def _construir(key: tuple[int, int]) -> dict:
+    """Arma una versión completa del catálogo, con todos sus derivados."""
+    t0 = time.perf_counter()
+    # Tipos compactos una sola vez por versión: categóricas con diccionario
+    # compartido entre hojas (filtros "==" por código) y costos en float32
+    sheets, costos_df = catalogo.compactar(*_load_or_compile())
+    data = {
+        "version":    key,
+        "sheets":     MappingProxyType(sheets),
+        "costos_df":  costos_df,
+        "derived":    {},
+        "lock":       threading.RLock(),
+    }
+    _precalcular(data)
+    data["cargado"]  = datetime.now()
+    data["segundos"] = time.perf_counter() - t0
+    return data
+
+
+def _publicar(key: tuple[int, int]) -> dict:
+    data = _construir(key)
+    with _WB_LOCK:
+        _WB_CACHE["data"] = data
+        _WB_CACHE["key"]  = key
+    return data
+
+
+def load_workbook_frames() -> dict:
+    """
+    Lee Proveedores.xlsx una sola vez por versión del archivo.
+    Devuelve {"version", "sheets", "costos_df", "cargado", "segundos"}.
+    Si hay un snapshot compilado al día (ver catalogo.py) se usa ese en
+    lugar de openpyxl.
+
+    Con el vigilante corriendo (iniciar_vigilancia) siempre devuelve la última
+    versión lista y nunca lee el Excel en el rerun; sin vigilante (scripts),
+    recarga en el momento si el archivo cambió.
+
+    Es un recurso compartido por todas las sesiones: "sheets" es de solo
+    lectura y los frames no se copian (usar vista() si hay que modificarlos).
+    """
+    data = _WB_CACHE["data"]
+    if data is not None and _vigilando():
+        perf.contar("catalogo", True)
+        return data
+    key = catalogue_version()
+    with _WB_LOCK:
+        hit = _WB_CACHE["key"] == key
+        perf.contar("catalogo", hit)
+        return _WB_CACHE["data"] if hit else _publicar(key)
+
+
+def derived(name: str, builder, data: dict | None = None):
+    """
+    Estructura derivada del catálogo (índices, tablas precalculadas...).
+    Se construye una sola vez por versión y se descarta junto con ella.
+    """
+    data = data if data is not None else load_workbook_frames()
+    with data["lock"]:
+        cache = data["derived"]
+        hit = name in cache
+        perf.contar(name, hit)
+        if not hit:
+            cache[name] = builder(data)
+        return cache[name]
+
+
+# ===================== VIGILANTE DEL EXCEL =====================
+def _vigilando() -> bool:
+    thread = _VIGILANTE["thread"]
+    return thread is not None and thread.is_alive()
+
+
+def _vigilar(intervalo: float) -> None:
+    visto = fallido = None
+    while True:
+        time.sleep(intervalo)
+        try:
+            key = catalogue_version()
+        except OSError:
+            continue  # el archivo se está reemplazando
+        # Espera a que el archivo quede quieto un intervalo (copia en curso);
+        # una versión que ya falló no se vuelve a parsear hasta que cambie
+        if key in (_WB_CACHE["key"], fallido) or key != visto:
+            visto = key
+            continue
+        try:
+            _publicar(key)
+            _VIGILANTE["error"] = None
+            fallido = None
+        except Exception as exc:  # noqa: BLE001 - Excel a medio escribir, hoja faltante...
+            # Se sigue sirviendo la versión anterior; se reintenta en el próximo cambio
+            _VIGILANTE["error"] = f"{type(exc).__name__}: {exc}"
+            fallido = key
+        visto = None
+
+
+def iniciar_vigilancia(intervalo: float = VIGILANCIA_INTERVALO) -> None:
+    """
+    Carga el catálogo (si todavía no está) y arranca, una vez por proceso,
+    un hilo que chequea el Excel por polling y publica la versión nueva
+    ya procesada cuando cambia.
+    """
+    load_workbook_frames()
+    with _WB_LOCK:
+        if _vigilando():
+            return
+        thread = threading.Thread(target=_vigilar, args=(intervalo,),
+                                  name="vigilante-catalogo", daemon=True)
+        _VIGILANTE["thread"] = thread
+        thread.start()
+
+
+def catalogue_info() -> dict:
+    """Versión publicada: fecha del Excel, cuándo se cargó y cuánto tardó."""
+    data = load_workbook_frames()
+    try:
+        pendiente = catalogue_version() != data["version"]
+    except OSError:
+        pendiente = False
+    return {
+        "modificado": datetime.fromtimestamp(data["version"][0] / 1e9),
+        "cargado":    data["cargado"],
+        "segundos":   data["segundos"],
+        "pendiente":  pendiente,
+        "error":      _VIGILANTE["error"],
+    }
+
+
+def vista(df: pd.DataFrame) -> pd.DataFrame:
+    """Vista sin copia de un frame compartido; modificarla no afecta al original."""
+    return df.copy(deep=False)
+
 
-@st.cache_data
 def load_catalogue():
-    return pd.read_excel(config.CATALOGO_PATH).rename(columns=str.strip)
+    return vista(load_workbook_frames()["sheets"][HOJA_RESUMEN])
+
+
+def margin_tables(data: dict | None = None) -> dict:
+    """Tablas de precio por margen ({"10%", "5%", "Bajo Precio"}), ver margenes.FUENTE."""
+    return derived("margenes", lambda d: margenes.build_margin_tables(d["sheets"]), data)
+
+
+def _margin_rows(data: dict | None = None):
+    # Todas las tablas de margen comparten filas y orden: alcanza con indexar una
+    return next(iter(margin_tables(data).values()))
+
+
+def precios_index(data: dict | None = None) -> busqueda.SearchIndex:
+    """Índice de búsqueda Marca/Modelo sobre las tablas de margen."""
+    return derived("indice_precios",
+                   lambda d: busqueda.SearchIndex.from_frame(_margin_rows(d)), data)
+
+
+def catalogue_index(data: dict | None = None) -> busqueda.SearchIndex:
+    """Índice de búsqueda Marca/Modelo sobre la hoja Resumen."""
+    return derived("indice_resumen",
+                   lambda d: busqueda.SearchIndex.from_frame(d["sheets"][HOJA_RESUMEN]), data)
+
+
+def precios_lookup(data: dict | None = None) -> dict:
+    """(marca, modelo) -> posiciones en las tablas de margen."""
+    return derived("lookup_precios", lambda d: busqueda.build_lookup(_margin_rows(d)), data)
+
+
+def costos_lookup(data: dict | None = None) -> dict:
+    """(marca, modelo) -> posiciones en costos_df (todas las filas de todos los proveedores)."""
+    return derived("lookup_costos", lambda d: busqueda.build_lookup(d["costos_df"]), data)
+
+
+def catalogue_lookup(data: dict | None = None) -> dict:
+    """(marca, modelo) -> posiciones en la hoja Resumen."""
+    return derived("lookup_resumen",
+                   lambda d: busqueda.build_lookup(d["sheets"][HOJA_RESUMEN]), data)
+
+
+def indice_modelos(data: dict | None = None):
+    """Índice de tokens de la hoja Resumen para reconocer modelos en listas de proveedores."""
+    import ingesta
+    return derived("indice_modelos",
+                   lambda d: ingesta.IndiceModelos.from_frame(d["sheets"][HOJA_RESUMEN]), data)
+
+
+def costos_por_modelo(data: dict | None = None):
+    """Hoja Resumen con claves normalizadas y proveedor más barato, para resolver pedidos en lote."""
+    import pedidos
+    return derived("costos_por_modelo",
+                   lambda d: pedidos.indexar_costos(d["sheets"][HOJA_RESUMEN]), data)
+
+
+# ===================== TABLAS (según backend) =====================
+def margenes_disponibles() -> list:
+    return list(margenes.MARGENES)
+
+
+def _pool_sqlite(data: dict | None = None):
+    """
+    Pool de catalogo_db de esta versión: se arma (y se reimporta la base si
+    hace falta) al construir la versión, así un rerun nunca toca el Excel.
+    """
+    import catalogo_db
+    return derived("pool_sqlite", lambda d: catalogo_db.pool(), data)
+
+
+def tabla_precios(margen: str, data: dict | None = None):
+    """Tabla de precios del margen pedido, con buscar()/filas()."""
+    if BACKEND == "sqlite":
+        import catalogo_db
+        return derived(f"sqlite_precios_{margen}",
+                       lambda d: catalogo_db.tabla_precios(margen, _pool_sqlite(d)), data)
+    return derived(f"tabla_precios_{margen}", lambda d: busqueda.TablaMemoria(
+        margin_tables(d)[margen], precios_index(d), precios_lookup(d)), data)
+
+
+def tabla_costos(data: dict | None = None):
+    """Costos por proveedor (Marca, Modelo, Proveedor, Costo USD)."""
+    if BACKEND == "sqlite":
+        import catalogo_db
+        return derived("sqlite_costos", lambda d: catalogo_db.tabla_costos(_pool_sqlite(d)), data)
+    return derived("tabla_costos",
+                   lambda d: busqueda.TablaMemoria(d["costos_df"], lookup=costos_lookup(d)), data)
+
+
+def tabla_resumen(data: dict | None = None):
+    """Hoja Resumen (precio de cada proveedor por columna)."""
+    if BACKEND == "sqlite":
+        import catalogo_db
+        return derived("sqlite_resumen", lambda d: catalogo_db.tabla_resumen(_pool_sqlite(d)), data)
+    return derived("tabla_resumen", lambda d: busqueda.TablaMemoria(
+        d["sheets"][HOJA_RESUMEN], catalogue_index(d), catalogue_lookup(d)), data)
+
+
+def _precalcular(data: dict) -> None:
+    """Todo lo que usa la UI, armado antes de publicar la versión."""
+    if BACKEND == "sqlite":
+        _pool_sqlite(data)  # reimporta la base si el Excel cambió
+    for margen in margenes_disponibles():
+        tabla_precios(margen, data)
+    tabla_costos(data)
+    tabla_resumen(data)